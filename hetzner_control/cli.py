@@ -1,12 +1,20 @@
+from typing import Optional
+
 import typer
 
-import hetzner_control.commands.info as info
-import hetzner_control.commands.server as server
 from hetzner_control import __app_name__, __version__
+from hetzner_control.commands import lazy_group
+from hetzner_control.commands.output import OutputFormat, set_format
 
-app = typer.Typer()
-app.add_typer(server.app, name="server")
-app.add_typer(info.app, name="info")
+app = typer.Typer(
+    cls=lazy_group({
+        "server": ("hetzner_control.commands.server", "Operations with servers"),
+        "info": ("hetzner_control.commands.info", "Information about available data centers, images, ISOs and more"),
+        "sync": ("hetzner_control.commands.sync", "Update local inventory of servers, server types, datacenters and prices"),
+        "query": ("hetzner_control.commands.query", "Filter and aggregate servers of local inventory without requests to API"),
+        "apply": ("hetzner_control.commands.apply", "Create, delete and power servers to match fleet file"),
+    })
+)
 
 
 @app.command("version")
@@ -18,7 +26,29 @@ def get_version():
 
 
 @app.callback()
-def callback():
+def callback(
+        ctx: typer.Context,
+        output: OutputFormat = typer.Option(
+            OutputFormat.table.value,
+            "--output",
+            "-o",
+            case_sensitive=False,
+            help="Output format, machine-readable formats are streamed without styling",
+        ),
+        timings: bool = typer.Option(
+            False,
+            "--timings",
+            envvar="HTZ_TIMINGS",
+            help="Print requests latencies, parse and render durations to stderr at exit",
+        ),
+        timings_json: Optional[str] = typer.Option(
+            None,
+            "--timings-json",
+            envvar="HTZ_TIMINGS_JSON",
+            metavar="PATH",
+            help="Dump every request and phase duration as json to file at exit",
+        ),
+):
     """
     CLI app for managing servers on the Hetzner cloud platform
 
@@ -27,6 +57,15 @@ def callback():
 
     $HETZNER_API_TOKEN = your_api_key
     """
+    set_format(output)
+    if timings or timings_json:
+        from hetzner_control.commands.timings import report
+        from hetzner_control.core import HetznerHandler
+        from hetzner_control.core.timings import Timings
+
+        collected = Timings()
+        HetznerHandler.configure_timings(collected)
+        ctx.call_on_close(lambda: report(collected, print_table=timings, path=timings_json))
 
 
 def main():
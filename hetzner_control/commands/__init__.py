@@ -0,0 +1,90 @@
+import importlib
+from typing import Dict, List, Optional, Tuple, Type
+
+import click
+import typer
+from typer.core import TyperGroup
+
+
+class LazyGroup(TyperGroup):
+    """
+    Typer group, which imports subcommand modules only when they are requested.
+    Mapping 'lazy_commands' contains pairs: subcommand name -> (module path with 'app' object, short help),
+    short help is shown in help and shell completion without importing the module.
+    Module 'app' with a single command and without callback becomes a command, otherwise a group
+    """
+    lazy_commands: Dict[str, Tuple[str, str]] = {}
+
+    def list_commands(self, ctx: click.Context) -> List[str]:
+        return sorted(set(self.commands) | set(self.lazy_commands))
+
+    def get_command(self, ctx: click.Context, cmd_name: str) -> Optional[click.Command]:
+        if cmd_name not in self.commands and cmd_name in self.lazy_commands:
+            module = importlib.import_module(self.lazy_commands[cmd_name][0])
+            command = typer.main.get_command(module.app)
+            command.name = cmd_name
+            _add_output_option(command)
+            self.commands[cmd_name] = command
+        return super().get_command(ctx, cmd_name)
+
+    def get_short_help(self, ctx: click.Context, limit: int = 45) -> List[Tuple[str, str]]:
+        """
+        Short help of visible subcommands, taken from registry for not imported ones
+
+        :param ctx: click context
+        :param limit: maximum length of help
+        :return: list of (subcommand name, short help)
+        """
+        rows = []
+        for name in self.list_commands(ctx):
+            command = self.commands.get(name)
+            if command is None:
+                rows.append((name, click.utils.make_default_short_help(self.lazy_commands[name][1], limit)))
+            elif not command.hidden:
+                rows.append((name, command.get_short_help_str(limit)))
+        return rows
+
+    def format_commands(self, ctx: click.Context, formatter: click.HelpFormatter) -> None:
+        names = self.list_commands(ctx)
+        if names:
+            rows = self.get_short_help(ctx, limit=formatter.width - 6 - max(len(name) for name in names))
+            with formatter.section("Commands"):
+                formatter.write_dl(rows)
+
+    def shell_complete(self, ctx: click.Context, incomplete: str) -> List["click.shell_completion.CompletionItem"]:
+        from click.shell_completion import CompletionItem
+
+        results = [
+            CompletionItem(name, help=help_)
+            for name, help_ in self.get_short_help(ctx)
+            if name.startswith(incomplete)
+        ]
+        # options of the group itself
+        results.extend(click.Command.shell_complete(self, ctx, incomplete))
+        return results
+
+
+def _add_output_option(command: click.Command) -> None:
+    """
+    Add --output/-o to command and to every subcommand of group, if command hasn't its own option
+
+    :param command: click command or group
+    """
+    from .output import output_option
+
+    if isinstance(command, click.Group):
+        for subcommand in command.commands.values():
+            _add_output_option(subcommand)
+    if not any(param.name == "output" for param in command.params):
+        command.params.append(output_option())
+
+
+def lazy_group(commands: Dict[str, Tuple[str, str]]) -> Type[LazyGroup]:
+    """
+    Create LazyGroup class for passing as 'cls' argument in typer.Typer()
+
+    :param commands: subcommand name -> (module path, short help),
+     i.e. {"server": ("hetzner_control.commands.server", "Operations with servers")}
+    :return: LazyGroup subclass with given registry
+    """
+    return type("LazyGroup", (LazyGroup,), {"lazy_commands": dict(commands)})
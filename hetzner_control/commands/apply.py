@@ -0,0 +1,231 @@
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+import typer
+
+from . import output
+
+if TYPE_CHECKING:
+    from rich.console import Console
+
+    from ..core.fleet import Change, Plan
+
+# single command module, rich, PyYAML and handlers are imported when command runs
+app = typer.Typer(add_completion=False)
+
+_PLAN_COLUMNS = ["action", "group", "name", "id", "detail"]
+_RESULT_COLUMNS = ["action", "group", "name", "id", "result", "status", "message"]
+_KIND_STYLES = {"delete": "bold red", "stop": "yellow", "start": "green", "label": "cyan", "create": "bold green"}
+
+
+@app.command("apply", help="Create, delete and power servers to match fleet file")
+def apply(
+        file: typer.FileText = typer.Argument(..., help="Fleet file in YAML or json, '-' for stdin"),
+        dry_run: bool = typer.Option(False, "--dry-run", help="Only show plan"),
+        replace: bool = typer.Option(
+            False, "--replace", help="Replace servers of wrong type, location or image instead of reporting them",
+        ),
+        concurrency: int = typer.Option(8, min=1, help="Maximum number of requests in parallel"),
+        wait: bool = typer.Option(True, "--wait/--no-wait", help="Wait until started actions have finished"),
+        timeout: Optional[float] = typer.Option(None, min=0, help="Maximum seconds to wait for actions"),
+        yes: bool = typer.Option(False, "--yes", "-y", help="Don't ask confirmation"),
+) -> None:
+    """
+    Compare fleet file with servers labeled 'fleet=<name>', show plan and execute it.
+    Changes run concurrently under shared rate limiter, then started actions are polled
+    with one request per 50 actions. Exit with code 1 if some change failed
+
+    :return: None
+    """
+    from ..core.fleet import load_fleet, plan_fleet
+    from ..core.server import ServerHandler
+
+    try:
+        spec = load_fleet(file.read())
+    except ValueError as error:
+        raise typer.BadParameter(f"{error}", param_hint="'FILE'")
+    except ImportError as error:
+        typer.echo(f"{error}", err=True)
+        raise typer.Exit(code=1)
+
+    handler = ServerHandler()
+    plan = plan_fleet(spec, handler.list_servers(concurrency=concurrency, label_selector=spec.selector), replace)
+
+    if not output.is_table() and (dry_run or not plan):
+        output.write_rows(_PLAN_COLUMNS, (_plan_row(change) for change in plan.changes + plan.drift))
+        return
+    # with machine-readable output plan goes to stderr, so it's seen before confirmation
+    _print_plan(plan)
+    if dry_run or not plan:
+        return
+    if not yes:
+        typer.confirm(f"Apply {len(plan)} changes?", abort=True, err=True)
+
+    results = _execute(handler, plan, concurrency, wait, timeout)
+    failed = _print_results(plan, results)
+    if failed:
+        raise typer.Exit(code=1)
+
+
+def _get_console() -> "Console":
+    """
+    :return: console for tables, progress goes to stderr with machine-readable output
+    """
+    from rich.console import Console
+    return Console(stderr=not output.is_table())
+
+
+def _plan_row(change: "Change") -> List[Any]:
+    return [change.kind, change.group, change.name, change.server_id, change.detail]
+
+
+def _print_plan(plan: "Plan") -> None:
+    from rich.console import Text
+    from rich.table import Table
+
+    console = _get_console()
+    if plan.changes or plan.drift:
+        table = Table(title=f"Plan of fleet {plan.fleet}")
+        table.add_column("Action", justify="center")
+        table.add_column("Group", justify="center", style="bold cyan")
+        table.add_column("Name", justify="left")
+        table.add_column("ID", justify="center")
+        table.add_column("Detail", justify="left")
+        for change in plan.changes + plan.drift:
+            table.add_row(
+                Text(change.kind, style=_KIND_STYLES.get(change.kind, "bold magenta")),
+                change.group, change.name, f"{change.server_id or '-'}", change.detail,
+            )
+        with output.measure("render"):
+            console.print(table)
+
+    counts = plan.counts()
+    console.print(Text(
+        f"Plan: {counts['create']} to create, {counts['delete']} to delete, "
+        f"{counts['start'] + counts['stop']} to power, {counts['label']} to relabel, {plan.unchanged} unchanged",
+        style="bold",
+    ))
+    unassigned = sum(not change.group for change in plan.drift)
+    if len(plan.drift) > unassigned:
+        console.print(Text(
+            f"{len(plan.drift) - unassigned} servers differ from fleet file, use --replace to recreate them",
+            style="yellow",
+        ))
+    if unassigned:
+        console.print(Text(
+            f"{unassigned} servers of fleet have no 'fleet-group' label, label or delete them by hand",
+            style="yellow",
+        ))
+
+
+def _execute(
+        handler: Any,
+        plan: "Plan",
+        concurrency: int,
+        wait: bool,
+        timeout: Optional[float],
+) -> Dict["Change", Tuple[Optional[Dict[str, Any]], Optional[Exception]]]:
+    """
+    Execute plan with progress bar, then wait for started actions
+
+    :return: (json response or None, exception or None) by change, response has final state of action
+    """
+    from rich.progress import Progress
+
+    from ..core.actions import ActionsHandler
+    from ..core.fleet import action_ids, execute_plan
+
+    results = {}
+    with Progress(console=_get_console(), transient=True) as progress:
+        task = progress.add_task(f"Apply fleet {plan.fleet}", total=len(plan))
+        for change, data, error in execute_plan(handler, plan, concurrency=concurrency):
+            results[change] = (data, error)
+            progress.advance(task)
+
+    started = [id_ for data, _ in results.values() for id_ in action_ids(data)]
+    if not wait or not started:
+        return results
+
+    actions_handler = ActionsHandler()
+    with Progress(console=_get_console(), transient=True) as progress:
+        task = progress.add_task("Waiting for actions", total=len(started))
+
+        def on_update(actions: Dict[int, Dict[str, Any]]) -> None:
+            finished = sum(action["status"] in actions_handler.finished_statuses for action in actions.values())
+            progress.update(task, completed=finished)
+
+        actions = actions_handler.wait_for_actions(started, timeout=timeout, on_update=on_update)
+
+    for change, (data, error) in results.items():
+        final = [actions[id_] for id_ in action_ids(data) if id_ in actions]
+        if final:
+            # change is reported by its failed action if any, i.e. failed start of created server
+            action = next((action for action in final if action["status"] == "error"), final[0])
+            results[change] = ({**data, "action": action}, error)
+    return results
+
+
+def _result(data: Optional[Dict[str, Any]], error: Optional[Exception]) -> Tuple[str, Optional[str], str]:
+    """
+    :return: result "ok" or "error", status of action and error message
+    """
+    if error is not None:
+        return "error", None, f"{error}"
+    action = (data or {}).get("action")
+    if action and action["status"] == "error":
+        return "error", "error", (action.get("error") or {}).get("message") or ""
+    return "ok", (action["status"] if action else None), ""
+
+
+def _print_results(
+        plan: "Plan",
+        results: Dict["Change", Tuple[Optional[Dict[str, Any]], Optional[Exception]]],
+) -> int:
+    """
+    Print result of every change in order of plan
+
+    :return: number of failed changes
+    """
+    rows = []
+    for change in plan.changes:
+        result, status, message = _result(*results[change])
+        rows.append([change.kind, change.group, change.name, _server_id(change, results[change][0]), result, status,
+                     message])
+    failed = sum(row[4] == "error" for row in rows)
+
+    if not output.is_table():
+        output.write_rows(_RESULT_COLUMNS, rows)
+        return failed
+
+    from rich.console import Text
+    from rich.table import Table
+
+    table = Table(title=f"Apply fleet {plan.fleet}")
+    table.add_column("Action", justify="center")
+    table.add_column("Group", justify="center", style="bold cyan")
+    table.add_column("Name", justify="left")
+    table.add_column("ID", justify="center")
+    table.add_column("Result", justify="center")
+    table.add_column("Command status", justify="center")
+    table.add_column("Message", justify="left")
+    for kind, group, name, id_, result, status, message in rows:
+        table.add_row(
+            Text(kind, style=_KIND_STYLES[kind]), group, name, f"{id_ or '-'}",
+            Text(result, style=f"bold {'red' if result == 'error' else 'green'}"), status or "-", message,
+        )
+    console = _get_console()
+    with output.measure("render"):
+        console.print(table)
+    console.print(Text(
+        f"Succeeded: {len(rows) - failed}, failed: {failed}",
+        style=f"bold {'red' if failed else 'green'}"
+    ))
+    return failed
+
+
+def _server_id(change: "Change", data: Optional[Dict[str, Any]]) -> Optional[int]:
+    """
+    :return: ID of existing server or of created one
+    """
+    if change.server_id is not None:
+        return change.server_id
+    return ((data or {}).get("server") or {}).get("id")
@@ -1,11 +1,27 @@
+from typing import TYPE_CHECKING, Optional
+
 import typer
-from rich.console import Console
-from rich.table import Table
 
-from ..core.datacenters import DatacenterHandler
+from . import output
+
+if TYPE_CHECKING:
+    from ..core.datacenters import DatacenterHandler
 
 app = typer.Typer()
-_handler = DatacenterHandler()
+_handler: Optional["DatacenterHandler"] = None
+
+
+def _get_handler() -> "DatacenterHandler":
+    """
+    Create handler on first use, so importing this module doesn't require API token
+
+    :return: shared DatacenterHandler object
+    """
+    global _handler
+    if _handler is None:
+        from ..core.datacenters import DatacenterHandler
+        _handler = DatacenterHandler()
+    return _handler
 
 
 @app.callback()
@@ -23,8 +39,20 @@ def get_all_datacenters() -> None:
 
     :return: None
     """
-    global _handler
-    data = _handler.get_all_datacenters()
+    data = _get_handler().list_datacenters()
+
+    if not output.is_table():
+        output.write_rows(
+            ["id", "name", "location", "country", "city", "network_zone", "description"],
+            (
+                [dc.id, dc.name, dc.location_name, dc.country, dc.city, dc.network_zone, dc.description]
+                for dc in data
+            )
+        )
+        return
+
+    from rich.console import Console
+    from rich.table import Table
 
     table = Table()
     table.add_column("id", justify="center", style="green")
@@ -35,16 +63,17 @@ def get_all_datacenters() -> None:
     table.add_column("Network zone", justify="center", style="")
     table.add_column("Description", justify="center", style="")
 
-    for datacenter in data['datacenters']:
+    for datacenter in data:
         table.add_row(
-            f"{datacenter['id']}",
-            f"{datacenter['name']}",
-            f"{datacenter['location']['name']}",
-            f"{datacenter['location']['country']}",
-            f"{datacenter['location']['city']}",
-            f"{datacenter['location']['network_zone']}",
-            f"{datacenter['description']}",
+            f"{datacenter.id}",
+            f"{datacenter.name}",
+            f"{datacenter.location_name}",
+            f"{datacenter.country}",
+            f"{datacenter.city}",
+            f"{datacenter.network_zone}",
+            f"{datacenter.description}",
         )
 
     console = Console()
-    console.print(table)
+    with output.measure("render"):
+        console.print(table)
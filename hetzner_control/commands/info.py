@@ -1,17 +1,28 @@
 import typer
 
-import hetzner_control.commands.datacenters as datacenters
-import hetzner_control.commands.price as price
-import hetzner_control.commands.server_types as server_types
+from . import lazy_group
 
-app = typer.Typer()
-app.add_typer(price.app, name="price")
-app.add_typer(server_types.app, name="server")
-app.add_typer(datacenters.app, name="datacenter")
+app = typer.Typer(
+    cls=lazy_group({
+        "price": (
+            "hetzner_control.commands.price",
+            "Information about price for all resources available on the platform",
+        ),
+        "server": ("hetzner_control.commands.server_types", "Information about server types"),
+        "datacenter": ("hetzner_control.commands.datacenters", "Information about datacenters available on platform"),
+    })
+)
 
 
 @app.callback()
-def callback() -> None:
+def callback(
+        refresh: bool = typer.Option(False, "--refresh", help="Revalidate cached data with API"),
+        no_cache: bool = typer.Option(False, "--no-cache", help="Don't read or write on-disk cache"),
+) -> None:
     """
     Information about available data centers, images, ISOs and more
     """
+    if not no_cache:
+        from ..core import HetznerHandler
+        from ..core.cache import ResponseCache
+        HetznerHandler.configure_cache(ResponseCache(refresh=refresh))
@@ -0,0 +1,159 @@
+import csv
+import json
+import sys
+from enum import Enum
+from typing import Any, ContextManager, Iterable, List, Optional, Sequence, TextIO
+
+import click
+
+
+class OutputFormat(str, Enum):
+    """
+    Output formats available with global --output option
+    """
+    table = "table"
+    json = "json"
+    ndjson = "ndjson"
+    csv = "csv"
+    tsv = "tsv"
+    plain = "plain"
+
+
+_format = OutputFormat.table
+
+
+def set_format(format_: OutputFormat) -> None:
+    global _format
+    _format = OutputFormat(format_)
+
+
+def get_format() -> OutputFormat:
+    return _format
+
+
+def is_table() -> bool:
+    """
+    :return: True if commands should print rich tables, False if rows should be streamed by RowWriter
+    """
+    return _format == OutputFormat.table
+
+
+def output_option() -> click.Option:
+    """
+    Same --output/-o option as global one for subcommands, so format may be given after command,
+    i.e. 'htz server list -o ndjson'. It isn't passed to command function, only changes global format
+
+    :return: click.Option object
+    """
+    def callback(ctx: click.Context, param: click.Parameter, value: Optional[str]) -> None:
+        if value is not None:
+            set_format(OutputFormat(value))
+
+    return click.Option(
+        ["--output", "-o"],
+        type=click.Choice([format_.value for format_ in OutputFormat], case_sensitive=False),
+        default=None,
+        expose_value=False,
+        callback=callback,
+        help="Output format, same as global --output",
+    )
+
+
+def measure(phase: str) -> ContextManager[None]:
+    """
+    Same as HetznerHandler.measure(), core is imported on call, so this module stays lightweight
+
+    :param phase: name of phase, i.e. "render"
+    :return: context manager
+    """
+    from ..core import HetznerHandler
+    return HetznerHandler.measure(phase)
+
+
+class RowWriter:
+    """
+    Streaming writer of rows in machine-readable format (json, ndjson, csv, tsv, plain).
+    Every row is written to stream immediately, nothing is collected in memory.
+    Nested values (dicts, lists) are json-encoded in csv, tsv and plain formats
+    """
+
+    def __init__(
+            self,
+            columns: Sequence[str],
+            format_: Optional[OutputFormat] = None,
+            stream: Optional[TextIO] = None,
+    ):
+        """
+        :param columns: names of columns, used as keys in json and header in csv/tsv
+        :param format_: output format, by default format from global --output option
+        :param stream: output stream, by default sys.stdout
+        """
+        self.columns = list(columns)
+        self.format = OutputFormat(format_ or _format)
+        self.stream = stream or sys.stdout
+        self._rows = 0
+        self._csv = None
+
+        if self.format in (OutputFormat.csv, OutputFormat.tsv):
+            self._csv = csv.writer(
+                self.stream,
+                delimiter=("," if self.format == OutputFormat.csv else "\t"),
+                lineterminator="\n",
+            )
+            self._csv.writerow(self.columns)
+        elif self.format == OutputFormat.json:
+            self.stream.write("[")
+
+    def write(self, row: Sequence[Any]) -> None:
+        """
+        :param row: values in order of columns
+        """
+        if self._csv is not None:
+            self._csv.writerow([self._plain_value(value) for value in row])
+        elif self.format == OutputFormat.plain:
+            # tab separated values without header and quoting, for cut/awk/xargs
+            self.stream.write("\t".join(f"{self._plain_value(value)}" for value in row) + "\n")
+        else:
+            line = json.dumps(dict(zip(self.columns, row)), default=str)
+            if self.format == OutputFormat.json:
+                line = ("\n" if not self._rows else ",\n") + line
+            else:
+                line += "\n"
+            self.stream.write(line)
+        self._rows += 1
+
+    def write_many(self, rows: Iterable[Sequence[Any]]) -> None:
+        for row in rows:
+            self.write(row)
+        self.flush()
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+    def close(self) -> None:
+        if self.format == OutputFormat.json:
+            self.stream.write("\n]\n" if self._rows else "]\n")
+        self.flush()
+
+    def __enter__(self) -> "RowWriter":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    @staticmethod
+    def _plain_value(value: Any) -> Any:
+        if isinstance(value, (dict, list, tuple)):
+            return json.dumps(value, default=str)
+        return "" if value is None else value
+
+
+def write_rows(columns: List[str], rows: Iterable[Sequence[Any]]) -> None:
+    """
+    Stream rows to stdout in format from global --output option
+
+    :param columns: names of columns
+    :param rows: iterable of rows, values in order of columns
+    """
+    with RowWriter(columns) as writer, measure("render"):
+        writer.write_many(rows)
@@ -1,15 +1,129 @@
+import itertools
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
+
 import typer
-from rich.console import Console
-from rich.table import Table
 
-from ..core.pricing import PricingHandler
+from . import output
+
+if TYPE_CHECKING:
+    from rich.console import Console
+
+    from ..core.price_index import PriceIndex
+    from ..core.pricing import PricingHandler
 
+# rich and handler are imported on first use, so help and completion start fast
 app = typer.Typer()
-_handler = PricingHandler()
-_data = _handler.get_all_prices()["pricing"]
-_currency = _data["currency"]
-_vat = f"{float(_data['vat_rate']):6.4f}"
-_console = Console()
+_handler: Optional["PricingHandler"] = None
+_data: Optional[Dict[str, Any]] = None
+_console: Optional["Console"] = None
+
+# long format of prices in machine-readable output formats, one row per price
+_PRICE_COLUMNS = ["resource", "name", "location", "unit", "net", "gross", "currency"]
+_ESTIMATE_COLUMNS = [
+    "resource", "name", "location", "quantity", "hourly_net", "hourly_gross", "monthly_net", "monthly_gross", "currency",
+]
+
+
+def _get_handler() -> "PricingHandler":
+    """
+    Create handler on first use, so importing this module
+    (i.e. for other commands or shell completion) doesn't touch API
+
+    :return: shared PricingHandler object
+    """
+    global _handler
+    if _handler is None:
+        from ..core.pricing import PricingHandler
+        _handler = PricingHandler()
+    return _handler
+
+
+def _get_data() -> Dict[str, Any]:
+    """
+    Making request for prices only on first use
+
+    :return: 'pricing' part of json response as Dict[str, Any]
+    """
+    global _data
+    if _data is None:
+        _data = _get_handler().get_all_prices()["pricing"]
+    return _data
+
+
+def _get_index() -> "PriceIndex":
+    """
+    :return: PriceIndex object, built by shared handler on first use
+    """
+    return _get_handler().get_price_index()
+
+
+def _get_console() -> "Console":
+    """
+    Create console on first use
+
+    :return: shared rich.console.Console object
+    """
+    global _console
+    if _console is None:
+        from rich.console import Console
+        _console = Console()
+    return _console
+
+
+def _get_currency() -> str:
+    return _get_data()["currency"]
+
+
+def _get_vat() -> str:
+    return f"{float(_get_data()['vat_rate']):6.4f}"
+
+
+def _price_row(resource: str, name: Any, location: Any, unit: str, price: Dict[str, str]) -> List[Any]:
+    return [resource, name, location, unit, float(price["net"]), float(price["gross"]), _get_currency()]
+
+
+def _float_ip_rows() -> Iterator[List[Any]]:
+    yield _price_row("floating_ip", None, None, "month", _get_data()["floating_ip"]["price_monthly"])
+
+
+def _float_ips_rows() -> Iterator[List[Any]]:
+    for ips_type in _get_data()["floating_ips"]:
+        for location_type in ips_type["prices"]:
+            yield _price_row(
+                "floating_ips", ips_type["type"], location_type["location"], "month", location_type["price_monthly"]
+            )
+
+
+def _image_rows() -> Iterator[List[Any]]:
+    yield _price_row("image", None, None, "GB/month", _get_data()["image"]["price_per_gb_month"])
+
+
+def _typed_rows(resource: str, types: List[Dict[str, Any]]) -> Iterator[List[Any]]:
+    for type_ in types:
+        for location_type in type_["prices"]:
+            yield _price_row(resource, type_["name"], location_type["location"], "hour", location_type["price_hourly"])
+            yield _price_row(resource, type_["name"], location_type["location"], "month", location_type["price_monthly"])
+
+
+def _load_balancers_rows() -> Iterator[List[Any]]:
+    yield from _typed_rows("load_balancer", _get_data()["load_balancer_types"])
+
+
+def _server_backup_rows() -> Iterator[List[Any]]:
+    percentage = float(_get_data()["server_backup"]["percentage"])
+    yield ["server_backup", None, None, "percent", percentage, percentage, None]
+
+
+def _server_types_rows() -> Iterator[List[Any]]:
+    yield from _typed_rows("server", _get_data()["server_types"])
+
+
+def _traffic_rows() -> Iterator[List[Any]]:
+    yield _price_row("traffic", None, None, "TB", _get_data()["traffic"]["price_per_tb"])
+
+
+def _volume_rows() -> Iterator[List[Any]]:
+    yield _price_row("volume", None, None, "GB/month", _get_data()["volume"]["price_per_gb_month"])
 
 
 @app.callback()
@@ -24,6 +138,19 @@ def get_all_prices() -> None:
     """
     Print price for all resources available on the platform
     """
+    if not output.is_table():
+        output.write_rows(_PRICE_COLUMNS, itertools.chain(
+            _float_ip_rows(),
+            _float_ips_rows(),
+            _image_rows(),
+            _load_balancers_rows(),
+            _server_backup_rows(),
+            _server_types_rows(),
+            _traffic_rows(),
+            _volume_rows(),
+        ))
+        return
+
     get_float_ip_price()
     get_float_ips_price()
     get_image_price()
@@ -39,21 +166,28 @@ def get_float_ip_price() -> None:
     """
     Printing floating IP price as Table in console.
     """
+    if not output.is_table():
+        output.write_rows(_PRICE_COLUMNS, _float_ip_rows())
+        return
+
+    from rich.table import Table
+
+    currency = _get_currency()
     floating_ip_price = Table(title="Floating IP")
-    floating_ip_price.add_column(f"Month, {_currency}\nWithout VAT", justify="center", style="bold green")
-    floating_ip_price.add_column(f"Month, {_currency}\nWith VAT", justify="center", style="bold green")
+    floating_ip_price.add_column(f"Month, {currency}\nWithout VAT", justify="center", style="bold green")
+    floating_ip_price.add_column(f"Month, {currency}\nWith VAT", justify="center", style="bold green")
     floating_ip_price.add_column("VAT, %", justify="center", style="bold")
 
-    global _data
-    global _vat
-    ip_ = _data["floating_ip"]
+    data = _get_data()
+    vat = _get_vat()
+    ip_ = data["floating_ip"]
     floating_ip_price.add_row(
         f"{float(ip_['price_monthly']['net']):6.4f}",
         f"{float(ip_['price_monthly']['gross']):6.4f}",
-        _vat
+        vat
     )
-    global _console
-    _console.print(floating_ip_price)
+    with output.measure("render"):
+        _get_console().print(floating_ip_price)
 
 
 @app.command("float_ips", help="Information about price for floating IPs")
@@ -61,16 +195,23 @@ def get_float_ips_price() -> None:
     """
     Printing floating IPs price as Table in console
     """
+    if not output.is_table():
+        output.write_rows(_PRICE_COLUMNS, _float_ips_rows())
+        return
+
+    from rich.table import Table
+
+    currency = _get_currency()
     floating_ips_price = Table(title="Floating IPs")
     floating_ips_price.add_column("Type", justify="center")
     floating_ips_price.add_column("Location", justify="center")
-    floating_ips_price.add_column(f"Month, {_currency}\nWithout VAT", justify="center", style="bold green")
-    floating_ips_price.add_column(f"Month, {_currency}\nWith VAT", justify="center", style="bold green")
+    floating_ips_price.add_column(f"Month, {currency}\nWithout VAT", justify="center", style="bold green")
+    floating_ips_price.add_column(f"Month, {currency}\nWith VAT", justify="center", style="bold green")
     floating_ips_price.add_column("VAT, %", justify="center", style="bold")
 
-    global _data
-    global _vat
-    ips_ = _data["floating_ips"]
+    data = _get_data()
+    vat = _get_vat()
+    ips_ = data["floating_ips"]
     for i, ips_type in enumerate(ips_):
         for j, location_type in enumerate(ips_type['prices']):
             floating_ips_price.add_row(
@@ -78,10 +219,10 @@ def get_float_ips_price() -> None:
                 f"{location_type['location']}",
                 f"{float(location_type['price_monthly']['net']):6.4f}",
                 f"{float(location_type['price_monthly']['gross']):6.4f}",
-                _vat
+                vat
             )
-    global _console
-    _console.print(floating_ips_price)
+    with output.measure("render"):
+        _get_console().print(floating_ips_price)
 
 
 @app.command("image", help="Information about price for image")
@@ -89,21 +230,28 @@ def get_image_price() -> None:
     """
     Printing image price as Table in console
     """
+    if not output.is_table():
+        output.write_rows(_PRICE_COLUMNS, _image_rows())
+        return
+
+    from rich.table import Table
+
+    currency = _get_currency()
     image_price = Table(title="Image")
-    image_price.add_column(f"Month, {_currency}\nPrice per GB\nWithout VAT", justify="center", style="bold green")
-    image_price.add_column(f"Month, {_currency}\nPrice per GB\nWith VAT", justify="center", style="bold green")
+    image_price.add_column(f"Month, {currency}\nPrice per GB\nWithout VAT", justify="center", style="bold green")
+    image_price.add_column(f"Month, {currency}\nPrice per GB\nWith VAT", justify="center", style="bold green")
     image_price.add_column("VAT, %", justify="center", style="bold")
 
-    global _data
-    global _vat
-    image_ = _data["image"]
+    data = _get_data()
+    vat = _get_vat()
+    image_ = data["image"]
     image_price.add_row(
         f"{float(image_['price_per_gb_month']['net']):6.4f}",
         f"{float(image_['price_per_gb_month']['gross']):6.4f}",
-        _vat
+        vat
     )
-    global _console
-    _console.print(image_price)
+    with output.measure("render"):
+        _get_console().print(image_price)
 
 
 @app.command("load_balancer", help="Information about price and types for load balancer")
@@ -111,19 +259,26 @@ def get_load_balancers_price() -> None:
     """
     Printing load balancers types and price as Table in console
     """
+    if not output.is_table():
+        output.write_rows(_PRICE_COLUMNS, _load_balancers_rows())
+        return
+
+    from rich.table import Table
+
+    currency = _get_currency()
     load_balance_price = Table(title="Load Balancers")
     load_balance_price.add_column("id", justify="center", style="bold")
     load_balance_price.add_column("Name", justify="center", style="")
     load_balance_price.add_column("Location", justify="center", style="")
-    load_balance_price.add_column(f"Hour, {_currency}\nWithout VAT", justify="center", style="bold green")
-    load_balance_price.add_column(f"Hour, {_currency}\nWith VAT", justify="center", style="bold green")
-    load_balance_price.add_column(f"Month, {_currency}\nWithout VAT", justify="center", style="bold green")
-    load_balance_price.add_column(f"Month, {_currency}\nWith VAT", justify="center", style="bold green")
+    load_balance_price.add_column(f"Hour, {currency}\nWithout VAT", justify="center", style="bold green")
+    load_balance_price.add_column(f"Hour, {currency}\nWith VAT", justify="center", style="bold green")
+    load_balance_price.add_column(f"Month, {currency}\nWithout VAT", justify="center", style="bold green")
+    load_balance_price.add_column(f"Month, {currency}\nWith VAT", justify="center", style="bold green")
     load_balance_price.add_column("VAT, %", justify="center", style="bold")
 
-    global _data
-    global _vat
-    lb_ = _data["load_balancer_types"]
+    data = _get_data()
+    vat = _get_vat()
+    lb_ = data["load_balancer_types"]
     for i, lb_type in enumerate(lb_):
         for j, location_type in enumerate(lb_type['prices']):
             load_balance_price.add_row(
@@ -134,10 +289,10 @@ def get_load_balancers_price() -> None:
                 f"{float(location_type['price_hourly']['gross']):6.4f}",
                 f"{float(location_type['price_monthly']['net']):6.4f}",
                 f"{float(location_type['price_monthly']['gross']):6.4f}",
-                _vat
+                vat
             )
-    global _console
-    _console.print(load_balance_price)
+    with output.measure("render"):
+        _get_console().print(load_balance_price)
 
 
 @app.command("backup", help="Information about price for server backup")
@@ -145,19 +300,24 @@ def get_server_backup_price() -> None:
     """
     Printing server backups price as Table in console
     """
+    if not output.is_table():
+        output.write_rows(_PRICE_COLUMNS, _server_backup_rows())
+        return
+
+    from rich.table import Table
+
     server_backup_price = Table(title="Server backup")
     server_backup_price.add_column("Percentage, %", justify="center", style="bold")
     server_backup_price.add_column("About")
 
-    global _data
-    global _vat
-    server_backup_ = _data['server_backup']
+    data = _get_data()
+    server_backup_ = data['server_backup']
     server_backup_price.add_row(
         f"{float(server_backup_['percentage']):6.4f}",
         "increase base Server costs by specific percentage"
     )
-    global _console
-    _console.print(server_backup_price)
+    with output.measure("render"):
+        _get_console().print(server_backup_price)
 
 
 @app.command("server", help="Information about price and types for server")
@@ -165,19 +325,26 @@ def get_server_types_price() -> None:
     """
     Printing server configurations price as Table in console
     """
+    if not output.is_table():
+        output.write_rows(_PRICE_COLUMNS, _server_types_rows())
+        return
+
+    from rich.table import Table
+
+    currency = _get_currency()
     server_types_price = Table(title="Server types")
     server_types_price.add_column("id", justify="center", style="bold")
     server_types_price.add_column("Name", justify="center", style="")
     server_types_price.add_column("Location", justify="center", style="")
-    server_types_price.add_column(f"Hour, {_currency}\nWithout VAT", justify="center", style="bold green")
-    server_types_price.add_column(f"Hour, {_currency}\nWith VAT", justify="center", style="bold green")
-    server_types_price.add_column(f"Month, {_currency}\nWithout VAT", justify="center", style="bold green")
-    server_types_price.add_column(f"Month, {_currency}\nWith VAT", justify="center", style="bold green")
+    server_types_price.add_column(f"Hour, {currency}\nWithout VAT", justify="center", style="bold green")
+    server_types_price.add_column(f"Hour, {currency}\nWith VAT", justify="center", style="bold green")
+    server_types_price.add_column(f"Month, {currency}\nWithout VAT", justify="center", style="bold green")
+    server_types_price.add_column(f"Month, {currency}\nWith VAT", justify="center", style="bold green")
     server_types_price.add_column("VAT, %", justify="center", style="bold")
 
-    global _data
-    global _vat
-    servers_ = _data["server_types"]
+    data = _get_data()
+    vat = _get_vat()
+    servers_ = data["server_types"]
     for i, server_type_ in enumerate(servers_):
         for j, location_type in enumerate(server_type_['prices']):
             server_types_price.add_row(
@@ -188,10 +355,10 @@ def get_server_types_price() -> None:
                 f"{float(location_type['price_hourly']['gross']):6.4f}",
                 f"{float(location_type['price_monthly']['net']):6.4f}",
                 f"{float(location_type['price_monthly']['gross']):6.4f}",
-                _vat
+                vat
             )
-    global _console
-    _console.print(server_types_price)
+    with output.measure("render"):
+        _get_console().print(server_types_price)
 
 
 @app.command("traffic", help="Information about traffic price")
@@ -199,19 +366,25 @@ def get_traffic_price() -> None:
     """
     Printing traffic price as Table in console
     """
+    if not output.is_table():
+        output.write_rows(_PRICE_COLUMNS, _traffic_rows())
+        return
+
+    from rich.table import Table
+
+    currency = _get_currency()
     traffic_price = Table(title="Traffic")
-    traffic_price.add_column(f"per TB, {_currency}\nWithout VAT", justify="center", style="bold green")
-    traffic_price.add_column(f"per TB, {_currency}\nWith VAT", justify="center", style="bold green")
+    traffic_price.add_column(f"per TB, {currency}\nWithout VAT", justify="center", style="bold green")
+    traffic_price.add_column(f"per TB, {currency}\nWith VAT", justify="center", style="bold green")
 
-    global _data
-    global _vat
-    traffic_ = _data["traffic"]
+    data = _get_data()
+    traffic_ = data["traffic"]
     traffic_price.add_row(
         f"{float(traffic_['price_per_tb']['net']):6.4f}",
         f"{float(traffic_['price_per_tb']['gross']):6.4f}"
     )
-    global _console
-    _console.print(traffic_price)
+    with output.measure("render"):
+        _get_console().print(traffic_price)
 
 
 @app.command("volume", help="Information about volume price")
@@ -219,16 +392,118 @@ def get_volume_price() -> None:
     """
     Printing volume price as Table in console
     """
+    if not output.is_table():
+        output.write_rows(_PRICE_COLUMNS, _volume_rows())
+        return
+
+    from rich.table import Table
+
+    currency = _get_currency()
     volume_price = Table(title="Volume")
-    volume_price.add_column(f"Month, {_currency}\nper GB\nWithout VAT", justify="center", style="bold green")
-    volume_price.add_column(f"per GB, {_currency}\nper GB\nWith VAT", justify="center", style="bold green")
+    volume_price.add_column(f"Month, {currency}\nper GB\nWithout VAT", justify="center", style="bold green")
+    volume_price.add_column(f"per GB, {currency}\nper GB\nWith VAT", justify="center", style="bold green")
 
-    global _data
-    global _vat
-    volume_ = _data["volume"]
+    data = _get_data()
+    volume_ = data["volume"]
     volume_price.add_row(
         f"{float(volume_['price_per_gb_month']['net']):6.4f}",
         f"{float(volume_['price_per_gb_month']['gross']):6.4f}"
     )
-    global _console
-    _console.print(volume_price)
+    with output.measure("render"):
+        _get_console().print(volume_price)
+
+
+def _estimate_lines(
+        specs: List[str],
+        location: str,
+        backups: bool,
+        volume: float,
+        traffic: float,
+) -> Iterator[Tuple[str, Optional[str], Optional[str], float]]:
+    index = _get_index()
+    for spec in specs:
+        try:
+            resource, type_, spec_location, count = index.parse_spec(spec, location)
+        except ValueError as error:
+            raise typer.BadParameter(f"{error}", param_hint="SPEC")
+        yield resource, type_, spec_location, count
+        if backups and resource == "server":
+            yield "server_backup", type_, spec_location, count
+    if volume:
+        yield "volume", None, None, volume
+    if traffic:
+        yield "traffic", None, None, traffic
+
+
+@app.command("estimate", help="Estimate cost of servers, load balancers, volumes and traffic")
+def estimate(
+        specs: List[str] = typer.Argument(
+            None,
+            metavar="[SPEC]...",
+            help="Resources as [COUNT x]TYPE[@LOCATION], i.e. '3x cx21@fsn1' or 'lb11'",
+        ),
+        location: str = typer.Option("fsn1", "--location", "-l", help="Location of specs without '@LOCATION'"),
+        backups: bool = typer.Option(False, "--backups", help="Add backup surcharge to every server"),
+        volume: float = typer.Option(0.0, "--volume", min=0, help="Total size of volumes, GB"),
+        traffic: float = typer.Option(0.0, "--traffic", min=0, help="Traffic over included, TB"),
+        file: Optional[typer.FileText] = typer.Option(
+            None, "--file", "-f", help="File with one spec per line, '-' for stdin",
+        ),
+) -> None:
+    """
+    Sum monthly and hourly cost of resources, identical specs are priced once
+    """
+    specs = list(specs or [])
+    if file is not None:
+        specs.extend(line for line in (line.split("#", 1)[0].strip() for line in file) if line)
+    if not specs and not volume and not traffic:
+        raise typer.BadParameter("nothing to estimate, pass specs, --file, --volume or --traffic", param_hint="SPEC")
+
+    index = _get_index()
+    try:
+        result = index.estimate(_estimate_lines(specs, location.lower(), backups, volume, traffic))
+    except KeyError as error:
+        raise typer.BadParameter(error.args[0], param_hint="SPEC")
+
+    currency = index.currency
+    rows = [
+        [resource, type_, location_, quantity, price.hourly_net * quantity, price.hourly_gross * quantity,
+         price.monthly_net * quantity, price.monthly_gross * quantity, currency]
+        for (resource, type_, location_), (quantity, price) in result.lines.items()
+    ]
+    if not output.is_table():
+        rows.append(["total", None, None, None, result.hourly_net, result.hourly_gross,
+                     result.monthly_net, result.monthly_gross, currency])
+        output.write_rows(_ESTIMATE_COLUMNS, rows)
+        return
+
+    from rich.table import Table
+
+    estimate_table = Table(title="Estimate")
+    estimate_table.add_column("Resource", justify="center", style="bold")
+    estimate_table.add_column("Type", justify="center")
+    estimate_table.add_column("Location", justify="center")
+    estimate_table.add_column("Quantity", justify="right")
+    estimate_table.add_column(f"Hour, {currency}\nWith VAT", justify="right", style="bold green")
+    estimate_table.add_column(f"Month, {currency}\nWithout VAT", justify="right", style="bold green")
+    estimate_table.add_column(f"Month, {currency}\nWith VAT", justify="right", style="bold green")
+    for resource, type_, location_, quantity, _, hourly_gross, monthly_net, monthly_gross, _ in rows:
+        estimate_table.add_row(
+            resource,
+            type_ or "",
+            location_ or "",
+            f"{quantity:g}",
+            f"{hourly_gross:6.4f}",
+            f"{monthly_net:6.4f}",
+            f"{monthly_gross:6.4f}",
+        )
+    estimate_table.add_row(
+        "total", "", "", "",
+        f"{result.hourly_gross:6.4f}",
+        f"{result.monthly_net:6.4f}",
+        f"{result.monthly_gross:6.4f}",
+        style="bold",
+    )
+    estimate_table.add_row("VAT", "", "", "", f"{result.hourly_vat:6.4f}", "", f"{result.monthly_vat:6.4f}")
+    with output.measure("render"):
+        _get_console().print(estimate_table)
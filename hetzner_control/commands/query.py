@@ -0,0 +1,94 @@
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import typer
+
+from . import output
+
+# single command module, rich and sqlite3 are imported when command runs
+app = typer.Typer(add_completion=False)
+
+_EVENT_COLUMNS = ["server_id", "name", "at", "kind", "old", "new"]
+
+
+@app.command("query", help="Filter and aggregate servers of local inventory without requests to API")
+def query(
+        column: Optional[List[str]] = typer.Option(
+            None, "--column", "-c", help="Output column or 'label:KEY', may be repeated",
+        ),
+        where: Optional[List[str]] = typer.Option(
+            None, "--where", "-w", help="Condition, i.e. 'cores>=4', 'label:env=prod', 'name~web', may be repeated",
+        ),
+        selector: Optional[str] = typer.Option(None, "--selector", "-l", help="Label selector, i.e. 'role=web'"),
+        group_by: Optional[List[str]] = typer.Option(
+            None, "--group-by", "-g", help="Group by column or 'label:KEY', may be repeated",
+        ),
+        agg: Optional[List[str]] = typer.Option(
+            None, "--agg", "-a", help="Aggregate 'count' or 'sum|avg|min|max:COLUMN', may be repeated",
+        ),
+        sort: Optional[List[str]] = typer.Option(
+            None, help="Sort by output column, i.e. 'count:desc', may be repeated",
+        ),
+        limit: int = typer.Option(0, "--limit", "-n", min=0, help="Maximum number of rows, 0 for all"),
+        deleted: bool = typer.Option(False, "--deleted", help="Include servers deleted since they were synced"),
+        events: bool = typer.Option(
+            False, "--events", help="Show the latest created, status and deleted events instead of servers",
+        ),
+) -> None:
+    """
+    Run query against local SQLite inventory, updated with 'htz sync'
+
+    :return: None
+    """
+    import sqlite3
+
+    from ..core.inventory import Inventory
+
+    with Inventory() as inventory:
+        last_sync = inventory.last_sync()
+        if last_sync is None:
+            typer.echo("Inventory is empty, run 'htz sync' first", err=True)
+            raise typer.Exit(code=1)
+
+        if events:
+            names = _EVENT_COLUMNS
+            rows = [
+                (id_, name, datetime.fromtimestamp(at, timezone.utc).isoformat(timespec="seconds"), kind, old, new)
+                for id_, name, at, kind, old, new in inventory.events(limit=limit or None)
+            ]
+        else:
+            if group_by and not agg:
+                agg = ["count"]
+            try:
+                names, rows = inventory.query(
+                    columns=column or (),
+                    where=where or (),
+                    label_selector=selector,
+                    group_by=group_by or (),
+                    aggregates=agg or (),
+                    sort=sort or (),
+                    limit=limit or None,
+                    deleted=deleted,
+                )
+            except ValueError as error:
+                raise typer.BadParameter(f"{error}")
+            except sqlite3.Error as error:
+                typer.echo(f"Query failed: {error}", err=True)
+                raise typer.Exit(code=1)
+
+    if not output.is_table():
+        output.write_rows(names, rows)
+        return
+
+    from rich.console import Console
+    from rich.table import Table
+
+    synced = datetime.fromtimestamp(last_sync, timezone.utc).isoformat(timespec="seconds")
+    table = Table(title=f"Inventory, synced {synced}", caption=f"{len(rows)} rows")
+    for name in names:
+        table.add_column(name, justify="center", style=("bold cyan" if name in ("id", "server_id") else None))
+    for row in rows:
+        table.add_row(*("" if value is None else f"{round(value, 4) if isinstance(value, float) else value}"
+                        for value in row))
+    with output.measure("render"):
+        Console().print(table)
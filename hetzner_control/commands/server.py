@@ -1,12 +1,108 @@
+import time
+from enum import Enum
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set, Tuple
+
 import typer
-from rich.console import Console, Text
-from rich.table import Table
 
-from ..core.server import ServerHandler
+from . import output
+
+if TYPE_CHECKING:
+    from rich.console import Console, RenderableType, Text
+    from rich.table import Table
 
+    from ..core.actions import ActionsHandler
+    from ..core.cost import CostLine
+    from ..core.models import Server
+    from ..core.server import ServerHandler
+    from ..core.watch import ServerDiff, ServerSnapshot
+
+# rich, requests and handlers are imported on first use, so 'htz server --help' and completion start fast
 app = typer.Typer()
-_handler = ServerHandler()
-_console = Console()
+_handler: Optional["ServerHandler"] = None
+_actions_handler: Optional["ActionsHandler"] = None
+_console: Optional["Console"] = None
+
+# columns of 'server list' in machine-readable output formats
+_SERVER_LIST_COLUMNS = [
+    "id", "name", "status", "server_type", "cores", "memory", "disk",
+    "datacenter", "location", "price_monthly_gross", "labels", "created",
+]
+
+
+def _get_handler() -> "ServerHandler":
+    """
+    Create handler on first use, so importing this module doesn't require API token
+
+    :return: shared ServerHandler object
+    """
+    global _handler
+    if _handler is None:
+        from ..core.server import ServerHandler
+        _handler = ServerHandler()
+    return _handler
+
+
+def _get_actions_handler() -> "ActionsHandler":
+    """
+    Create actions handler on first use
+
+    :return: shared ActionsHandler object
+    """
+    global _actions_handler
+    if _actions_handler is None:
+        from ..core.actions import ActionsHandler
+        _actions_handler = ActionsHandler()
+    return _actions_handler
+
+
+def _get_console() -> "Console":
+    """
+    Create console on first use
+
+    :return: shared rich.console.Console object
+    """
+    global _console
+    if _console is None:
+        from rich.console import Console
+        _console = Console()
+    return _console
+
+
+def _wait_for_actions(action_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """
+    Wait until all actions have finished, showing progress bar with number of finished actions
+
+    :param action_ids: actions IDs
+    :return: actions by ID in their final state
+    """
+    from rich.progress import Progress
+
+    with Progress(console=_get_console(), transient=True) as progress:
+        task = progress.add_task("Waiting for actions", total=len(action_ids))
+
+        def on_update(actions: Dict[int, Dict[str, Any]]) -> None:
+            finished = sum(action["status"] in _get_actions_handler().finished_statuses for action in actions.values())
+            progress.update(task, completed=finished)
+
+        return _get_actions_handler().wait_for_actions(action_ids, on_update=on_update)
+
+
+def _action_text(action: Dict[str, Any]) -> "Text":
+    """
+    Create colored text with action command and status
+
+    :param action: action json object
+    :return: rich.console.Text object
+    """
+    from rich.console import Text
+
+    text = Text(
+        f"Command {action['command']}\nCommand status: {action['status']}",
+        style=f"bold {'red' if action['status'] == 'error' else 'green'}"
+    )
+    if action['status'] == 'error' and action.get('error'):
+        text.append(f"\n{action['error']['message']}", style="red")
+    return text
 
 
 @app.callback()
@@ -16,41 +112,569 @@ def callback():
     """
 
 
+def _server_list_table(first_page: bool) -> "Table":
+    """
+    Create table for one page of server list.
+    Column widths depend only on console width, so tables of consecutive pages are printed as one table
+
+    :param first_page: if True, table has title and header
+    :return: rich.table.Table object
+    """
+    from rich import box
+    from rich.table import Table
+
+    table = Table(
+        title=("Server List" if first_page else None),
+        show_header=first_page,
+        show_edge=False,
+        box=box.SIMPLE,
+        expand=True,
+    )
+    table.add_column("ID", justify="center", style="bold cyan", ratio=2)
+    table.add_column("Status", justify="center", style="bold cyan", ratio=2, min_width=8)
+    table.add_column("Name", justify="center", ratio=4, overflow="fold")
+    table.add_column("Server type", justify="center", style="magenta", ratio=2)
+    table.add_column("CPU core", justify="center", style="magenta", ratio=1, min_width=4)
+    table.add_column("Memory, GB", justify="center", style="magenta", ratio=2)
+    table.add_column("Disk, GB", justify="center", style="magenta", ratio=2)
+    table.add_column("Price", justify="center", style="green", ratio=2)
+    return table
+
+
 @app.command("list", help="Lists all servers you own")
-def get_servers() -> None:
+def get_servers(
+        concurrency: int = typer.Option(4, min=1, help="Maximum number of pages requested in parallel"),
+        selector: Optional[str] = typer.Option(None, "--selector", "-l", help="Label selector, i.e. 'role=web'"),
+        name: Optional[str] = typer.Option(None, help="Show only server with this name"),
+        status: Optional[List[str]] = typer.Option(None, help="Show only servers with this status, may be repeated"),
+        sort: Optional[List[str]] = typer.Option(None, help="Sort order, i.e. 'name' or 'created:desc', may be repeated"),
+        from_cache: bool = typer.Option(
+            False, "--from-cache", help="Read servers from local inventory updated with 'htz sync', without requests",
+        ),
+        watch: bool = typer.Option(False, "--watch", "-w", help="Poll servers and highlight changes until Ctrl+C"),
+        interval: float = typer.Option(
+            2.0, min=0.5, help="Watch mode: poll interval after change, seconds, it grows while nothing changes",
+        ),
+        max_interval: float = typer.Option(30.0, min=0.5, help="Watch mode: maximum poll interval, seconds"),
+) -> None:
     """
-    Making request to server list.
-    Output to the console in the form of a table a list of all servers and some of their properties.
+    Making requests to server list page by page, filtering and sorting is done by API.
+    Output to the console in the form of a table a list of all servers and some of their properties,
+    every page is printed as soon as it has been received.
 
+    :param concurrency: maximum number of pages requested in parallel
+    :param selector: label selector for choosing servers
+    :param name: server name
+    :param status: servers statuses
+    :param sort: sort order
+    :param from_cache: read servers from local inventory
+    :param watch: poll servers until interrupted
+    :param interval: minimal poll interval in watch mode
+    :param max_interval: maximal poll interval in watch mode
     :return: None
     """
-    global _handler
-    data = _handler.get_all_servers()
+    if watch:
+        if from_cache or not output.is_table():
+            raise typer.BadParameter("watch mode works only with API and table output", param_hint="'--watch'")
+        _watch_servers(
+            dict(concurrency=concurrency, label_selector=selector, name=name, status=status, sort=sort),
+            interval=interval,
+            max_interval=max_interval,
+        )
+        return
+
+    if from_cache:
+        pages = [_list_cached_servers(selector=selector, name=name, status=status, sort=sort)]
+    else:
+        pages = _get_handler().list_server_pages(
+            concurrency=concurrency,
+            label_selector=selector,
+            name=name,
+            status=status,
+            sort=sort,
+        )
+    if not output.is_table():
+        with output.RowWriter(_SERVER_LIST_COLUMNS) as writer:
+            for servers in pages:
+                with output.measure("render"):
+                    writer.write_many(_server_list_row(server) for server in servers)
+        return
+
+    for i, servers in enumerate(pages):
+        with output.measure("render"):
+            table = _server_list_table(first_page=not i)
+            for server in servers:
+                price = server.price
+                table.add_row(
+                    f"{server.id}",
+                    f"{server.status}",
+                    f"{server.name}",
+                    f"{server.server_type.description}",
+                    f"{server.server_type.cores}",
+                    f"{server.server_type.memory}",
+                    f"{server.server_type.disk}",
+                    (f"{price.monthly_gross:.4f}" if price else "-"),
+                )
+            _get_console().print(table)
 
-    table = Table(title="Server List")
-    table.add_column("ID", justify="center", style="bold cyan")
-    table.add_column("Status", justify="center", style="bold cyan")
-    table.add_column("Name", justify="center")
-    table.add_column("Server type", justify="center", style="magenta")
-    table.add_column("CPU core", justify="center", style="magenta")
-    table.add_column("Memory, GB", justify="center", style="magenta")
-    table.add_column("Disk, GB", justify="center", style="magenta")
-    table.add_column("Price", justify="center", style="green")
 
-    for server in data['servers']:
+# number of polls, while changed rows stay on top and highlighted
+_HIGHLIGHT_POLLS = 3
+# rows of watch view taken by title, header, summary and borders
+_WATCH_CHROME_ROWS = 7
+
+
+def _watch_servers(filters: Dict[str, Any], interval: float, max_interval: float) -> None:
+    """
+    Poll server list in one process with shared connection, filtering is done by API.
+    Only rows fitting the terminal are rendered, changed rows go first,
+    so refresh cost doesn't depend on size of server list
+
+    :param filters: arguments of ServerHandler.list_servers()
+    :param interval: poll interval after change, seconds
+    :param max_interval: maximum poll interval, seconds
+    :return: None
+    """
+    from rich.live import Live
+
+    from ..core.watch import AdaptiveInterval, ServerSnapshot
+
+    snapshot = ServerSnapshot()
+    pacing = AdaptiveInterval(minimum=interval, maximum=max_interval)
+    # server ID -> (number of poll, changed fields), "*" for new server
+    recent: Dict[int, Tuple[int, Set[str]]] = {}
+    console = _get_console()
+    poll = 0
+    with Live(console=console, auto_refresh=False) as live:
+        try:
+            while True:
+                poll += 1
+                started = time.monotonic()
+                diff = snapshot.update(_get_handler().list_servers(**filters))
+                if poll > 1:
+                    recent.update((id_, (poll, {"*"})) for id_ in diff.added)
+                    recent.update((id_, (poll, fields)) for id_, fields in diff.changed.items())
+                for id_ in list(recent):
+                    if id_ not in snapshot.servers or poll - recent[id_][0] >= _HIGHLIGHT_POLLS:
+                        del recent[id_]
+
+                delay = pacing.next(changed=(poll > 1 and diff.significant()), busy=snapshot.busy())
+                with output.measure("render"):
+                    view = _watch_view(snapshot, diff, recent, poll, delay, console.height - _WATCH_CHROME_ROWS)
+                    live.update(view, refresh=True)
+                time.sleep(max(0.0, delay - (time.monotonic() - started)))
+        except KeyboardInterrupt:
+            pass
+
+
+def _watch_view(
+        snapshot: "ServerSnapshot",
+        diff: "ServerDiff",
+        recent: Dict[int, Tuple[int, Set[str]]],
+        poll: int,
+        delay: float,
+        max_rows: int,
+) -> "RenderableType":
+    """
+    Create watch view: summary line and table of at most max_rows servers, recently changed ones first
+
+    :param snapshot: the latest server list
+    :param diff: changes found by the latest poll
+    :param recent: server ID -> (number of poll, changed fields) of recently changed servers
+    :param poll: number of the latest poll
+    :param delay: seconds to the next poll
+    :param max_rows: maximum number of table rows
+    :return: rich renderable
+    """
+    from collections import Counter
+
+    from rich.console import Group, Text
+    from rich.table import Table
+
+    servers = snapshot.servers
+    statuses = Counter(server.status for server in servers.values())
+    summary = Text(f"{len(servers)} servers: ")
+    summary.append(", ".join(f"{status} {count}" for status, count in sorted(statuses.items())), style="bold")
+    summary.append(f" | poll #{poll} at {time.strftime('%H:%M:%S')}, next in {delay:.0f}s")
+    if poll > 1 and diff:
+        summary.append(
+            f" | +{len(diff.added)} ~{len(diff.changed)} -{len(diff.removed)}", style="bold yellow",
+        )
+
+    ordered = sorted(recent, key=lambda id_: -recent[id_][0])
+    ordered.extend(id_ for id_ in servers if id_ not in recent)
+    shown = ordered[:max(1, max_rows)]
+
+    table = Table(title="Server List", expand=True)
+    table.add_column("ID", justify="center", style="bold cyan", ratio=2)
+    table.add_column("Status", justify="center", ratio=2, min_width=8)
+    table.add_column("Name", justify="center", ratio=4, overflow="fold")
+    table.add_column("Server type", justify="center", style="magenta", ratio=2)
+    table.add_column("In, GB", justify="right", ratio=2)
+    table.add_column("Out, GB", justify="right", ratio=2)
+    table.add_column("Price", justify="center", style="green", ratio=2)
+    for id_ in shown:
+        server = servers[id_]
+        changed_poll, fields = recent.get(id_, (0, set()))
+
+        def cell(value: str, field: str) -> "Text":
+            if changed_poll == poll and (field in fields or "*" in fields):
+                return Text(value, style="bold black on yellow")
+            if changed_poll and (field in fields or "*" in fields):
+                return Text(value, style="bold yellow")
+            return Text(value)
+
+        price = server.price
         table.add_row(
-            f"{server['id']}",
-            f"{server['status']}",
-            f"{server['name']}",
-            f"{server['server_type']['description']}",
-            f"{server['server_type']['cores']}",
-            f"{server['server_type']['memory']}",
-            f"{server['server_type']['disk']}",
-            f"{server['server_type']['prices'][0]['price_monthly']['gross'][:6]}",
+            f"{server.id}",
+            cell(f"{server.status}", "status"),
+            cell(f"{server.name}", "name"),
+            f"{server.server_type.name}",
+            cell(f"{server.ingoing_traffic / 1024 ** 3:.2f}", "ingoing_traffic"),
+            cell(f"{server.outgoing_traffic / 1024 ** 3:.2f}", "outgoing_traffic"),
+            (f"{price.monthly_gross:.4f}" if price else "-"),
         )
+    if len(ordered) > len(shown):
+        table.caption = f"{len(ordered) - len(shown)} more servers without changes"
+    return Group(summary, table)
 
-    global _console
-    _console.print(table)
+
+def _list_cached_servers(**filters: Any) -> List["Server"]:
+    """
+    Read servers from local inventory with the same filters as API
+
+    :param filters: label selector, name, status and sort
+    :return: list of Server objects
+    """
+    from ..core.inventory import Inventory
+
+    with Inventory() as inventory:
+        if inventory.last_sync() is None:
+            typer.echo("Inventory is empty, run 'htz sync' first", err=True)
+            raise typer.Exit(code=1)
+        try:
+            selector = filters.pop("selector")
+            return inventory.list_servers(label_selector=selector, **filters)
+        except ValueError as error:
+            raise typer.BadParameter(f"{error}")
+
+
+def _server_list_row(server: "Server") -> List[Any]:
+    """
+    Create row of 'server list' for machine-readable output
+
+    :param server: Server object
+    :return: values in order of _SERVER_LIST_COLUMNS
+    """
+    price = server.price
+    return [
+        server.id,
+        server.name,
+        server.status,
+        server.server_type.name,
+        server.server_type.cores,
+        server.server_type.memory,
+        server.server_type.disk,
+        server.datacenter,
+        server.location,
+        (price.monthly_gross if price else None),
+        server.labels,
+        server.created,
+    ]
+
+
+# columns of 'server cost' in machine-readable output formats, one row per group
+_COST_COLUMNS = [
+    "dimension", "group", "servers", "unpriced", "hourly_net", "hourly_gross", "monthly_net", "monthly_gross",
+    "backup_monthly_gross", "traffic_overage_tb", "traffic_monthly_gross", "currency",
+]
+
+
+def _cost_row(dimension: str, group: Optional[str], line: "CostLine", currency: str) -> List[Any]:
+    return [
+        dimension, group, line.servers, line.unpriced, line.hourly_net, line.hourly_gross, line.monthly_net,
+        line.monthly_gross, line.backup_gross, line.overage_tb, line.traffic_gross, currency,
+    ]
+
+
+@app.command("cost", help="Current monthly and hourly spend by label, server type and location")
+def get_cost(
+        concurrency: int = typer.Option(4, min=1, help="Maximum number of pages requested in parallel"),
+        selector: Optional[str] = typer.Option(None, "--selector", "-l", help="Label selector, i.e. 'env=prod'"),
+        label_key: Optional[str] = typer.Option(
+            None, "--label-key", help="Group by values of this label, by default by every 'key=value' label",
+        ),
+) -> None:
+    """
+    Price servers of one paginated listing with in-memory price index, without requests per server.
+    Monthly spend includes backup surcharge and outgoing traffic over included, projected to the whole month
+
+    :param concurrency: maximum number of pages requested in parallel
+    :param selector: label selector for choosing servers
+    :param label_key: label for grouping
+    :return: None
+    """
+    from ..core.cost import FleetCost
+    from ..core.pricing import PricingHandler
+
+    index = PricingHandler().get_price_index()
+    cost = FleetCost(index, label_key=label_key)
+    cost.add_many(_get_handler().list_servers(concurrency=concurrency, label_selector=selector))
+
+    dimensions = (
+        ("label" if label_key is None else f"label:{label_key}", cost.by_label),
+        ("server_type", cost.by_type),
+        ("location", cost.by_location),
+    )
+    if not output.is_table():
+        rows = [
+            _cost_row(dimension, group, line, index.currency)
+            for dimension, groups in dimensions
+            for group, line in sorted(groups.items())
+        ]
+        rows.append(_cost_row("total", None, cost.total, index.currency))
+        output.write_rows(_COST_COLUMNS, rows)
+        return
+
+    from rich.table import Table
+
+    currency = index.currency
+    tables = []
+    for dimension, groups in dimensions:
+        table = Table(title=f"Spend by {dimension}", title_justify="left")
+        table.add_column(dimension.replace("_", " ").capitalize(), style="bold cyan")
+        table.add_column("Servers", justify="right")
+        table.add_column(f"Hour, {currency}\nWith VAT", justify="right", style="green")
+        table.add_column(f"Month, {currency}\nWithout VAT", justify="right", style="green")
+        table.add_column(f"Month, {currency}\nWith VAT", justify="right", style="bold green")
+        table.add_column(f"Backups, {currency}\nWith VAT", justify="right")
+        table.add_column(f"Traffic, {currency}\nWith VAT", justify="right")
+        for group, line in sorted(groups.items(), key=lambda item: -item[1].monthly_gross):
+            table.add_row(
+                group,
+                f"{line.servers}",
+                f"{line.hourly_gross:.4f}",
+                f"{line.monthly_net:.2f}",
+                f"{line.monthly_gross:.2f}",
+                f"{line.backup_gross:.2f}",
+                f"{line.traffic_gross:.2f}",
+            )
+        tables.append(table)
+
+    total = cost.total
+    summary = Table(title="Total", title_justify="left")
+    summary.add_column("Servers", justify="right")
+    summary.add_column(f"Hour, {currency}\nWith VAT", justify="right", style="green")
+    summary.add_column(f"Month, {currency}\nWithout VAT", justify="right", style="green")
+    summary.add_column(f"Month, {currency}\nWith VAT", justify="right", style="bold green")
+    summary.add_column("Traffic in/out, TB", justify="right")
+    summary.add_column("Overage, TB", justify="right")
+    summary.add_row(
+        f"{total.servers}",
+        f"{total.hourly_gross:.4f}",
+        f"{total.monthly_net:.2f}",
+        f"{total.monthly_gross:.2f}",
+        f"{cost.ingoing_tb:.3f} / {cost.outgoing_tb:.3f}",
+        f"{total.overage_tb:.3f}",
+    )
+    with output.measure("render"):
+        _get_console().print(*tables, summary, sep="\n")
+    if total.unpriced:
+        from rich.console import Text
+
+        _get_console().print(Text(
+            f"{total.unpriced} servers have no price in their location and aren't included in amounts",
+            style="yellow",
+        ))
+
+
+class MetricType(str, Enum):
+    """
+    Same as core.server.ServerHandler.metric_types, duplicated so help doesn't import core
+    """
+    cpu = "cpu"
+    disk = "disk"
+    network = "network"
+
+
+# columns of 'server metrics' in machine-readable output formats, one row per server and series,
+# rows of groups have no id and name
+_METRICS_COLUMNS = ["id", "name", "group", "series", "samples", "p50", "p95", "max", "last"]
+_SPARK_CHARS = "▁▂▃▄▅▆▇█"
+_SPARK_WIDTH = 30
+
+
+def _sparkline(values: List[float]) -> str:
+    """
+    :param values: values in time order
+    :return: text of at most _SPARK_WIDTH block characters scaled from 0 to maximum
+    """
+    from ..core.server_metrics import downsample
+
+    points = downsample(values, _SPARK_WIDTH)
+    top = max(points, default=0) or 1
+    return "".join(_SPARK_CHARS[min(len(_SPARK_CHARS) - 1, int(value / top * len(_SPARK_CHARS)))] for value in points)
+
+
+def _format_value(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.2f}"
+
+
+@app.command("metrics", help="CPU, disk and network metrics of servers with p50/p95/max")
+def get_metrics(
+        ids: Optional[List[int]] = typer.Argument(None, help="IDs of servers"),
+        selector: Optional[str] = typer.Option(None, "--selector", "-l", help="Label selector, i.e. 'role=web'"),
+        type_: List[MetricType] = typer.Option(
+            [MetricType.cpu.value], "--type", "-t", case_sensitive=False, help="Metric type, may be repeated",
+        ),
+        range_: str = typer.Option("1h", "--range", help="Period before now, i.e. 30m, 6h, 7d"),
+        step: Optional[int] = typer.Option(None, min=1, help="Resolution of time series in seconds, chosen by API"),
+        group_by: Optional[str] = typer.Option(
+            None, "--group-by", "-g", help="Aggregate servers by value of this label",
+        ),
+        sparklines: bool = typer.Option(False, "--sparklines", help="Show time series as sparklines"),
+        top: int = typer.Option(0, "--top", "-n", min=0, help="Show only N rows with the highest p95, 0 for all"),
+        concurrency: int = typer.Option(8, min=1, help="Maximum number of requests in flight"),
+) -> None:
+    """
+    Fetch metrics of servers concurrently under shared rate limiter and summarize every time series.
+    Table shows rows sorted by p95, the most loaded first, machine-readable rows are streamed as responses arrive.
+    Exit with code 1 if metrics of some server weren't received
+
+    :return: None
+    """
+    from datetime import datetime, timezone
+
+    from ..core.server_metrics import GroupStats, SeriesStats, parse_duration, time_series
+
+    try:
+        period = parse_duration(range_)
+    except ValueError as error:
+        raise typer.BadParameter(f"{error}", param_hint="'--range'")
+
+    servers: Dict[int, "Server"] = {}
+    if selector:
+        servers = {
+            server.id: server for server in _get_handler().list_servers(concurrency=concurrency, label_selector=selector)
+        }
+    # IDs and servers matching selector are merged as in bulk commands
+    targets = list(dict.fromkeys(list(ids or []) + list(servers)))
+    if not targets:
+        raise typer.BadParameter("Pass at least one server ID or --selector matching some servers")
+    if group_by:
+        servers.update(_fetch_servers([id_ for id_ in targets if id_ not in servers], concurrency))
+
+    end = datetime.now(timezone.utc).replace(microsecond=0)
+    types = list(dict.fromkeys(item.value for item in type_))
+    results = _get_handler().bulk_metrics(targets, types, end - period, end, step=step, concurrency=concurrency)
+
+    def group_of(id_server: int) -> Optional[str]:
+        if group_by is None:
+            return None
+        server = servers.get(id_server)
+        return server.labels.get(group_by, "-") if server is not None else "-"
+
+    groups = GroupStats()
+    rows: List[Tuple[int, str, Optional[str], str, SeriesStats, List[float]]] = []
+    failed: Dict[int, Exception] = {}
+    writer = None if output.is_table() else output.RowWriter(_METRICS_COLUMNS)
+    for id_server, data, error in results:
+        if error is not None:
+            failed[id_server] = error
+            continue
+        server = servers.get(id_server)
+        name = server.name if server is not None else ""
+        group = group_of(id_server)
+        series = time_series(data)
+        if group is not None:
+            groups.add(group, series)
+        for series_name, values in sorted(series.items()):
+            stats = SeriesStats(values)
+            if writer is not None:
+                writer.write([id_server, name, group, series_name, stats.samples, stats.p50, stats.p95, stats.max,
+                              stats.last])
+            else:
+                rows.append((id_server, name, group, series_name, stats, values))
+        if writer is not None:
+            writer.flush()
+
+    if writer is not None:
+        for group, series_name, _, stats in groups.summary():
+            writer.write([None, None, group, series_name, stats.samples, stats.p50, stats.p95, stats.max, None])
+        writer.close()
+    else:
+        _print_metrics(rows, groups, top, sparklines, types, range_)
+
+    for id_server, error in failed.items():
+        typer.echo(f"Metrics of server {id_server} weren't received: {error}", err=True)
+    if failed:
+        raise typer.Exit(code=1)
+
+
+def _print_metrics(
+        rows: List[Tuple[int, str, Optional[str], str, Any, List[float]]],
+        groups: Any,
+        top: int,
+        sparklines: bool,
+        types: List[str],
+        range_: str,
+) -> None:
+    """
+    Print table of series sorted by p95 and table of groups, if servers were grouped
+
+    :param rows: (server ID, name, group, series name, SeriesStats, values)
+    :param groups: GroupStats object
+    :param top: number of rows to show, 0 for all
+    :param sparklines: add column with sparkline
+    :param types: requested metric types
+    :param range_: requested period
+    :return: None
+    """
+    from rich.table import Table
+
+    rows.sort(key=lambda row: (-(row[4].p95 if row[4].p95 is not None else -1), row[0], row[3]))
+    shown = rows[:top] if top else rows
+    table = Table(title=f"Metrics {', '.join(types)} for {range_}", caption=(
+        f"{len(shown)} of {len(rows)} series" if len(shown) < len(rows) else None
+    ))
+    table.add_column("ID", justify="center", style="bold cyan")
+    table.add_column("Name", justify="center")
+    grouped = any(row[2] is not None for row in rows)
+    if grouped:
+        table.add_column("Group", justify="center")
+    table.add_column("Series", justify="left")
+    table.add_column("p50", justify="right", style="green")
+    table.add_column("p95", justify="right", style="bold magenta")
+    table.add_column("Max", justify="right", style="red")
+    if sparklines:
+        table.add_column("Trend", justify="left", no_wrap=True)
+    for id_server, name, group, series_name, stats, values in shown:
+        cells = [f"{id_server}", name]
+        if grouped:
+            cells.append(f"{group}")
+        cells.extend([series_name, _format_value(stats.p50), _format_value(stats.p95), _format_value(stats.max)])
+        if sparklines:
+            cells.append(_sparkline(values))
+        table.add_row(*cells)
+
+    tables = [table]
+    summary = list(groups.summary())
+    if summary:
+        group_table = Table(title="Groups")
+        group_table.add_column("Group", justify="center", style="bold cyan")
+        group_table.add_column("Series", justify="left")
+        group_table.add_column("Servers", justify="right")
+        group_table.add_column("p50", justify="right", style="green")
+        group_table.add_column("p95", justify="right", style="bold magenta")
+        group_table.add_column("Max", justify="right", style="red")
+        for group, series_name, count, stats in summary:
+            group_table.add_row(
+                group, series_name, f"{count}",
+                _format_value(stats.p50), _format_value(stats.p95), _format_value(stats.max),
+            )
+        tables.append(group_table)
+    with output.measure("render"):
+        _get_console().print(*tables, sep="\n")
 
 
 @app.command("info", help="Get a detailed description of the server by its ID")
@@ -63,8 +687,35 @@ def get_server(
     :param id_server: server ID
     return None
     """
-    global _handler
-    data = _handler.get_server(id_server=id_server)['server']
+    data = _get_handler().get_server(id_server=id_server)['server']
+
+    if not output.is_table():
+        output.write_rows(
+            [
+                "id", "name", "status", "created", "backup_window", "datacenter", "image", "iso",
+                "labels", "volumes", "ipv4", "ipv6", "ingoing_traffic", "outgoing_traffic", "load_balancers",
+            ],
+            [[
+                data['id'],
+                data['name'],
+                data['status'],
+                data['created'],
+                data['backup_window'],
+                data['datacenter']['name'],
+                (data['image']['name'] if data['image'] else None),
+                (data['iso']['description'] if data['iso'] else None),
+                data['labels'],
+                data['volumes'],
+                data['public_net']['ipv4']['ip'],
+                data['public_net']['ipv6']['ip'],
+                data['ingoing_traffic'],
+                data['outgoing_traffic'],
+                data['load_balancers'],
+            ]]
+        )
+        return
+
+    from rich.table import Table
 
     table_base = Table(title=f"Base info for {data['id']} server", style="bold")
     table_base.add_column("Created Date", justify="center", style="green")
@@ -102,12 +753,15 @@ def get_server(
         f"{data['load_balancers']}",
     )
 
-    global _console
-    _console.print(
-        table_base,
-        table_net,
-        sep='\n'
-    )
+    with output.measure("render"):
+        _get_console().print(
+            table_base,
+            table_net,
+            sep='\n'
+        )
+
+
+_CREATE_COLUMNS = ["id", "name", "root_password", "command", "status"]
 
 
 @app.command("create", help="Create a server with custom options")
@@ -118,6 +772,7 @@ def create_server(
         server_type: str = typer.Option("cx11", help="ID or name of the Server type"),
         automount: bool = typer.Option(False, help="Auto-mount Volumes after attach"),
         start_after_create: bool = typer.Option(False, help="Start Server right after creation"),
+        wait: bool = typer.Option(False, "--wait", help="Wait until server creating has finished"),
 ) -> None:
     """
     Making request to create server with specific options.
@@ -130,10 +785,10 @@ def create_server(
     :param server_type: ID or name of the Server type
     :param automount: Auto-mount volumes after attach
     :param start_after_create: Start Server right after creation
+    :param wait: wait until all actions of server creating have finished
     :return: None
     """
-    global _handler
-    data = _handler.create_server(
+    data = _get_handler().create_server(
         name=name,
         image=image,
         location=location,
@@ -142,69 +797,264 @@ def create_server(
         start_after_create=start_after_create
     )
 
-    global _console
+    actions = {action["id"]: action for action in [data["action"], *(data.get("next_actions") or [])]}
+    if wait:
+        actions.update(_wait_for_actions(list(actions)))
+
+    if not output.is_table():
+        server = data["server"]
+        output.write_rows(_CREATE_COLUMNS, (
+            [server["id"], server["name"], data.get("root_password"), action["command"], action["status"]]
+            for action in actions.values()
+        ))
+        return
+
+    from rich.console import Text
+
     text = Text("Server has been created\n", style="bold green")
     text.append("Your root_password: ", style="bold cyan")
     text.append(data["root_password"], style="")
-    _console.print(text)
+    _get_console().print(text)
 
+    if wait:
+        for action in actions.values():
+            _get_console().print(_action_text(action))
 
-@app.command("delete", help="Delete a server")
+
+def _fetch_servers(ids: List[int], concurrency: int) -> Dict[int, "Server"]:
+    """
+    Request servers by IDs concurrently, servers which weren't received are skipped
+
+    :param ids: servers IDs
+    :param concurrency: maximum number of requests in flight
+    :return: Server objects by ID
+    """
+    import copy
+    from concurrent.futures import ThreadPoolExecutor
+
+    import requests
+
+    from ..core.exceptions import APIError
+    from ..core.models import Server
+
+    handler = copy.copy(_get_handler())
+    handler.terminate_on_error = False
+
+    def fetch(id_server: int) -> Optional[Server]:
+        try:
+            return Server(handler.get_server(id_server)["server"])
+        except (APIError, requests.RequestException):
+            return None
+
+    if not ids:
+        return {}
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return {server.id: server for server in executor.map(fetch, ids) if server is not None}
+
+
+def _resolve_ids(ids: Optional[List[int]], selector: Optional[str]) -> List[int]:
+    """
+    Collect servers IDs from arguments and servers matching label selector
+
+    :param ids: IDs passed as arguments
+    :param selector: label selector, i.e. "role=web"
+    :return: list of unique IDs in original order
+    """
+    result = list(ids or [])
+    if selector:
+        result.extend(server["id"] for server in _get_handler().iter_servers(label_selector=selector))
+    if not result:
+        raise typer.BadParameter("Pass at least one server ID or --selector matching some servers")
+    return list(dict.fromkeys(result))
+
+
+def _run_bulk(operation: str, ids: List[int], concurrency: int, title: str, wait: bool = False) -> None:
+    """
+    Perform operation on every server with progress bar, then print table with result for every server.
+    Exit with code 1 if operation failed for some server
+
+    :param operation: name of ServerHandler method, one of ServerHandler.bulk_operations
+    :param ids: servers IDs
+    :param concurrency: maximum number of requests in flight
+    :param title: title of result table
+    :param wait: wait until started actions have finished
+    :return: None
+    """
+    from rich.console import Text
+    from rich.progress import Progress
+    from rich.table import Table
+
+    results = {}
+    with Progress(console=_get_console(), transient=True) as progress:
+        task = progress.add_task(title, total=len(ids))
+        for id_server, data, error in _get_handler().bulk(operation, ids, concurrency=concurrency):
+            results[id_server] = (data, error)
+            progress.advance(task)
+
+    if wait:
+        started = {
+            data["action"]["id"]: id_server
+            for id_server, (data, error) in results.items()
+            if data and data.get("action")
+        }
+        for action_id, action in _wait_for_actions(list(started)).items():
+            id_server = started[action_id]
+            results[id_server] = ({**results[id_server][0], "action": action}, None)
+
+    if not output.is_table():
+        failed = _write_bulk_rows(ids, results)
+        if failed:
+            raise typer.Exit(code=1)
+        return
+
+    table = Table(title=title)
+    table.add_column("ID", justify="center", style="bold cyan")
+    table.add_column("Result", justify="center")
+    table.add_column("Command status", justify="center")
+    table.add_column("Message", justify="left")
+
+    failed = 0
+    for id_server in ids:
+        data, error = results[id_server]
+        if error is not None:
+            failed += 1
+            table.add_row(f"{id_server}", Text("error", style="bold red"), "-", f"{error}")
+        elif data and data.get("action") and data["action"]["status"] == "error":
+            failed += 1
+            message = (data["action"].get("error") or {}).get("message", "")
+            table.add_row(f"{id_server}", Text("error", style="bold red"), "error", f"{message}")
+        else:
+            status = data["action"]["status"] if data and data.get("action") else "-"
+            table.add_row(f"{id_server}", Text("ok", style="bold green"), f"{status}", "")
+
+    with output.measure("render"):
+        _get_console().print(table)
+    _get_console().print(Text(
+        f"Succeeded: {len(ids) - failed}, failed: {failed}",
+        style=f"bold {'red' if failed else 'green'}"
+    ))
+    if failed:
+        raise typer.Exit(code=1)
+
+
+def _write_bulk_rows(ids: List[int], results: Dict[int, Any]) -> int:
+    """
+    Write result of bulk operation for every server in machine-readable format
+
+    :param ids: servers IDs
+    :param results: (json response or None, exception or None) by server ID
+    :return: number of failed servers
+    """
+    failed = 0
+    with output.RowWriter(["id", "result", "status", "message"]) as writer:
+        for id_server in ids:
+            data, error = results[id_server]
+            action = (data or {}).get("action")
+            if error is not None:
+                writer.write([id_server, "error", None, f"{error}"])
+            elif action and action["status"] == "error":
+                writer.write([id_server, "error", "error", (action.get("error") or {}).get("message")])
+            else:
+                writer.write([id_server, "ok", (action["status"] if action else None), None])
+                continue
+            failed += 1
+    return failed
+
+
+@app.command("delete", help="Delete servers by IDs or label selector")
 def delete_server(
-        id_server: int = typer.Argument(..., help="ID of the Server"),
+        ids: Optional[List[int]] = typer.Argument(None, help="IDs of the Servers"),
+        selector: Optional[str] = typer.Option(None, "--selector", "-l", help="Label selector, i.e. 'role=web'"),
+        concurrency: int = typer.Option(8, min=1, help="Maximum number of requests in parallel"),
+        yes: bool = typer.Option(False, "--yes", "-y", help="Don't ask confirmation for deleting by selector"),
 ) -> None:
     """
-    Making request for deleting server by ID.
+    Making request for deleting servers by ID.
     Output in console status of this operation.
 
-    :param id_server: uniq server ID
+    :param ids: uniq servers IDs
+    :param selector: label selector for choosing servers
+    :param concurrency: maximum number of requests in parallel
+    :param yes: skip confirmation
     :return: None
     """
-    global _handler
-    _handler.delete_server(id_server=id_server)
+    if ids and len(ids) == 1 and not selector:
+        data = _get_handler().delete_server(id_server=ids[0])
+        if not output.is_table():
+            _write_bulk_rows(ids, {ids[0]: (data, None)})
+            return
 
-    global _console
-    text = Text("Server has been deleted", style="bold green")
-    _console.print(text)
+        from rich.console import Text
+
+        text = Text("Server has been deleted", style="bold green")
+        _get_console().print(text)
+        return
+
+    ids = _resolve_ids(ids, selector)
+    if selector and not yes:
+        typer.confirm(f"Delete {len(ids)} servers?", abort=True)
+    _run_bulk("delete_server", ids, concurrency, title="Delete servers")
 
 
-@app.command("down", help="Power off server by ID")
+@app.command("down", help="Power off servers by IDs or label selector")
 def shut_down_server(
-        id_server: int = typer.Argument(..., help="ID of the Server"),
+        ids: Optional[List[int]] = typer.Argument(None, help="IDs of the Servers"),
+        selector: Optional[str] = typer.Option(None, "--selector", "-l", help="Label selector, i.e. 'role=web'"),
+        concurrency: int = typer.Option(8, min=1, help="Maximum number of requests in parallel"),
+        wait: bool = typer.Option(False, "--wait", help="Wait until actions have finished"),
 ) -> None:
     """
-    Making request to shut down server by ID.
+    Making request to shut down servers by ID.
 
-    :param id_server: uniq server ID
+    :param ids: uniq servers IDs
+    :param selector: label selector for choosing servers
+    :param concurrency: maximum number of requests in parallel
+    :param wait: wait until actions have finished
     :return: None
     """
-    global _handler
-    data = _handler.server_down(id_server=id_server)
+    if ids and len(ids) == 1 and not selector:
+        action = _get_handler().server_down(id_server=ids[0])['action']
+        if wait:
+            action = _wait_for_actions([action['id']]).get(action['id'], action)
 
-    global _console
-    text = Text(
-        f"Command {data['action']['command']}\nCommand status: {data['action']['status']}",
-        style="bold green"
-    )
-    _console.print(text)
+        if not output.is_table():
+            _write_bulk_rows(ids, {ids[0]: ({"action": action}, None)})
+        else:
+            _get_console().print(_action_text(action))
+        if action['status'] == 'error':
+            raise typer.Exit(code=1)
+        return
+
+    _run_bulk("server_down", _resolve_ids(ids, selector), concurrency, title="Power off servers", wait=wait)
 
 
-@app.command("up", help="Power on server by ID")
+@app.command("up", help="Power on servers by IDs or label selector")
 def start_up_server(
-        id_server: int = typer.Argument(..., help="ID of the Server"),
+        ids: Optional[List[int]] = typer.Argument(None, help="IDs of the Servers"),
+        selector: Optional[str] = typer.Option(None, "--selector", "-l", help="Label selector, i.e. 'role=web'"),
+        concurrency: int = typer.Option(8, min=1, help="Maximum number of requests in parallel"),
+        wait: bool = typer.Option(False, "--wait", help="Wait until actions have finished"),
 ) -> None:
     """
-    Making request to start up server by ID.
+    Making request to start up servers by ID.
 
-    :param id_server: uniq server ID
+    :param ids: uniq servers IDs
+    :param selector: label selector for choosing servers
+    :param concurrency: maximum number of requests in parallel
+    :param wait: wait until actions have finished
     :return: None
     """
-    global _handler
-    data = _handler.server_up(id_server=id_server)
+    if ids and len(ids) == 1 and not selector:
+        action = _get_handler().server_up(id_server=ids[0])['action']
+        if wait:
+            action = _wait_for_actions([action['id']]).get(action['id'], action)
 
-    global _console
-    text = Text(
-        f"Command {data['action']['command']}\nCommand status: {data['action']['status']}",
-        style="bold green"
-    )
-    _console.print(text)
+        if not output.is_table():
+            _write_bulk_rows(ids, {ids[0]: ({"action": action}, None)})
+        else:
+            _get_console().print(_action_text(action))
+        if action['status'] == 'error':
+            raise typer.Exit(code=1)
+        return
+
+    _run_bulk("server_up", _resolve_ids(ids, selector), concurrency, title="Power on servers", wait=wait)
@@ -1,12 +1,62 @@
+from enum import Enum
+from typing import TYPE_CHECKING, Optional
+
 import typer
-from rich.console import Console
-from rich.table import Table
 
-from ..core.server_types import ServerTypesHandler
+from . import output
+
+if TYPE_CHECKING:
+    from ..core.server_types import ServerTypeCatalog, ServerTypesHandler
 
 app = typer.Typer()
-_handler = ServerTypesHandler()
-_console = Console()
+_handler: Optional["ServerTypesHandler"] = None
+_catalog: Optional["ServerTypeCatalog"] = None
+
+_SERVER_TYPE_COLUMNS = ["id", "name", "cpu_type", "cores", "disk", "memory", "storage_type"]
+_FIND_COLUMNS = [
+    "name", "cpu_type", "cores", "memory", "disk", "location", "hourly_gross", "monthly_net", "monthly_gross",
+]
+
+
+class CpuType(str, Enum):
+    shared = "shared"
+    dedicated = "dedicated"
+
+
+class SortKey(str, Enum):
+    """
+    Same as core.server_types.SORT_KEYS, duplicated so help doesn't import core
+    """
+    price = "price"
+    cores = "cores"
+    memory = "memory"
+    disk = "disk"
+    name = "name"
+
+
+def _get_handler() -> "ServerTypesHandler":
+    """
+    Create handler on first use, so importing this module doesn't require API token
+
+    :return: shared ServerTypesHandler object
+    """
+    global _handler
+    if _handler is None:
+        from ..core.server_types import ServerTypesHandler
+        _handler = ServerTypesHandler()
+    return _handler
+
+
+def _get_catalog() -> "ServerTypeCatalog":
+    """
+    Join server types with prices on first use, later searches don't make requests
+
+    :return: shared ServerTypeCatalog object
+    """
+    global _catalog
+    if _catalog is None:
+        _catalog = _get_handler().get_catalog()
+    return _catalog
 
 
 @app.callback()
@@ -21,8 +71,17 @@ def get_all_server_types() -> None:
     """
     Print as table specification for all server types
     """
-    global _handler
-    data = _handler.get_all_server_types()["server_types"]
+    data = _get_handler().list_server_types()
+
+    if not output.is_table():
+        output.write_rows(_SERVER_TYPE_COLUMNS, (
+            [type_.id, type_.name, type_.cpu_type, type_.cores, type_.disk, type_.memory, type_.storage_type]
+            for type_ in data
+        ))
+        return
+
+    from rich.console import Console
+    from rich.table import Table
 
     table = Table(title="Server types")
     table.add_column("id", justify="center", style="bold cyan")
@@ -35,16 +94,16 @@ def get_all_server_types() -> None:
 
     for type_ in data:
         table.add_row(
-            f"{type_['id']}",
-            f"{type_['name']}",
-            f"{type_['cpu_type']}",
-            f"{type_['cores']}",
-            f"{type_['disk']}",
-            f"{type_['memory']}",
-            f"{type_['storage_type']}",
+            f"{type_.id}",
+            f"{type_.name}",
+            f"{type_.cpu_type}",
+            f"{type_.cores}",
+            f"{type_.disk}",
+            f"{type_.memory}",
+            f"{type_.storage_type}",
         )
-    global _console
-    _console.print(table)
+    with output.measure("render"):
+        Console().print(table)
 
 
 @app.command("select", help="Information for a specific server type by ID")
@@ -54,8 +113,14 @@ def get_server_type(
     """
      Print as table specification for server type by ID
     """
-    global _handler
-    data = _handler.get_server_type(id)["server_type"]
+    data = _get_handler().get_server_type(id)["server_type"]
+
+    if not output.is_table():
+        output.write_rows(_SERVER_TYPE_COLUMNS, [[data[column] for column in _SERVER_TYPE_COLUMNS]])
+        return
+
+    from rich.console import Console
+    from rich.table import Table
 
     table = Table(title=f"Server types for {id}")
     table.add_column("Name", justify="center")
@@ -73,5 +138,75 @@ def get_server_type(
         f"{data['memory']}",
         f"{data['storage_type']}",
     )
-    global _console
-    _console.print(table)
+    with output.measure("render"):
+        Console().print(table)
+
+
+@app.command("find", help="Find server types matching requirements, the cheapest first")
+def find_server_types(
+        min_cores: int = typer.Option(0, "--min-cores", min=0, help="Minimal number of CPU cores"),
+        min_memory: float = typer.Option(0.0, "--min-memory", min=0, help="Minimal memory, GB"),
+        min_disk: int = typer.Option(0, "--min-disk", min=0, help="Minimal disk size, GB"),
+        cpu_type: Optional[CpuType] = typer.Option(None, "--cpu-type", case_sensitive=False, help="CPU type"),
+        location: Optional[str] = typer.Option(
+            None, "--location", "-l", help="Location name, by default each type is shown in its cheapest location",
+        ),
+        sort: SortKey = typer.Option(SortKey.price.value, "--sort", case_sensitive=False, help="Sort matches by"),
+        limit: int = typer.Option(0, "--limit", "-n", min=0, help="Show only first N matches, 0 for all"),
+) -> None:
+    """
+    Print server types with enough cores, memory and disk, with their prices
+    """
+    catalog = _get_catalog()
+    if location is not None and location.lower() not in catalog.locations():
+        raise typer.BadParameter(
+            f"unknown location {location!r}, expected one of {', '.join(catalog.locations())}",
+            param_hint="'--location'",
+        )
+    matches = catalog.find(
+        min_cores=min_cores,
+        min_memory=min_memory,
+        min_disk=min_disk,
+        cpu_type=(cpu_type.value if cpu_type is not None else None),
+        location=(location.lower() if location is not None else None),
+        sort=sort.value,
+    )
+    if limit:
+        matches = matches[:limit]
+
+    if not output.is_table():
+        output.write_rows(_FIND_COLUMNS, (
+            [type_.name, type_.cpu_type, type_.cores, type_.memory, type_.disk, price.location,
+             price.hourly_gross, price.monthly_net, price.monthly_gross]
+            for type_, price in matches
+        ))
+        return
+
+    from rich.console import Console
+    from rich.table import Table
+
+    table = Table(title="Matching server types")
+    table.add_column("Name", justify="center", style="bold cyan")
+    table.add_column("CPU type", justify="center")
+    table.add_column("CPU Cores", justify="center", style="magenta")
+    table.add_column("Memory", justify="center", style="magenta")
+    table.add_column("Disk", justify="center", style="magenta")
+    table.add_column("Location", justify="center")
+    table.add_column("Hour\nWith VAT", justify="right", style="bold green")
+    table.add_column("Month\nWithout VAT", justify="right", style="bold green")
+    table.add_column("Month\nWith VAT", justify="right", style="bold green")
+
+    for type_, price in matches:
+        table.add_row(
+            f"{type_.name}",
+            f"{type_.cpu_type}",
+            f"{type_.cores}",
+            f"{type_.memory}",
+            f"{type_.disk}",
+            f"{price.location}",
+            f"{price.hourly_gross:6.4f}",
+            f"{price.monthly_net:6.4f}",
+            f"{price.monthly_gross:6.4f}",
+        )
+    with output.measure("render"):
+        Console().print(table)
@@ -0,0 +1,69 @@
+import time
+
+import typer
+
+from . import output
+
+# single command module, rich, handlers and sqlite3 are imported when command runs
+app = typer.Typer(add_completion=False)
+
+_SYNC_COLUMNS = ["inventory", "added", "updated", "deleted", "unchanged", "seconds"]
+
+
+@app.command("sync", help="Update local inventory of servers, server types, datacenters and prices")
+def sync(
+        concurrency: int = typer.Option(4, min=1, help="Maximum number of pages requested in parallel"),
+) -> None:
+    """
+    Download full server listing and write only changed servers to local SQLite inventory,
+    servers which no longer exist are marked as deleted.
+    Server types, datacenters and prices are taken through on-disk cache, so unchanged ones cost one revalidation
+
+    :param concurrency: maximum number of pages requested in parallel
+    :return: None
+    """
+    from ..core import HetznerHandler
+    from ..core.cache import ResponseCache
+    from ..core.datacenters import DatacenterHandler
+    from ..core.inventory import Inventory
+    from ..core.pricing import PricingHandler
+    from ..core.server import ServerHandler
+    from ..core.server_types import ServerTypesHandler
+
+    if HetznerHandler.get_cache() is None:
+        HetznerHandler.configure_cache(ResponseCache())
+
+    start = time.perf_counter()
+    server_types = ServerTypesHandler().get_all_server_types()["server_types"]
+    datacenters = DatacenterHandler().get_all_datacenters()["datacenters"]
+    pricing = PricingHandler().get_all_prices()["pricing"]
+    with Inventory() as inventory:
+        result = inventory.sync(
+            ServerHandler().iter_servers(concurrency=concurrency),
+            server_types=server_types,
+            datacenters=datacenters,
+            pricing=pricing,
+        )
+        path = f"{inventory.path}"
+    elapsed = time.perf_counter() - start
+
+    if not output.is_table():
+        output.write_rows(
+            _SYNC_COLUMNS, [[path, result.added, result.updated, result.deleted, result.unchanged, elapsed]],
+        )
+        return
+
+    from rich.console import Console
+    from rich.table import Table
+
+    table = Table(title=f"Inventory {path}")
+    table.add_column("Added", justify="center", style="bold green")
+    table.add_column("Updated", justify="center", style="bold cyan")
+    table.add_column("Deleted", justify="center", style="bold red")
+    table.add_column("Unchanged", justify="center")
+    table.add_column("Time, s", justify="center", style="magenta")
+    table.add_row(
+        f"{result.added}", f"{result.updated}", f"{result.deleted}", f"{result.unchanged}", f"{elapsed:.2f}",
+    )
+    with output.measure("render"):
+        Console().print(table)
@@ -0,0 +1,56 @@
+from typing import Optional
+
+from ..core.timings import Timings
+
+
+def report(timings: Timings, print_table: bool = True, path: Optional[str] = None) -> None:
+    """
+    Print summary of requests latencies and phases durations to stderr and/or dump all measurements to json file.
+    Stderr is used, so machine-readable output in stdout stays untouched
+
+    :param timings: Timings object of finished run
+    :param print_table: print summary tables
+    :param path: path of json file, None to skip dumping
+    :return: None
+    """
+    if path:
+        timings.dump(path)
+    if not print_table:
+        return
+
+    from rich.console import Console
+    from rich.table import Table
+
+    console = Console(stderr=True)
+    requests = Table(title="Requests", title_justify="left")
+    requests.add_column("Endpoint", style="bold cyan")
+    requests.add_column("Count", justify="right")
+    requests.add_column("Errors", justify="right", style="red")
+    requests.add_column("Retries", justify="right")
+    requests.add_column("Avg, ms", justify="right", style="magenta")
+    requests.add_column("Max, ms", justify="right", style="magenta")
+    requests.add_column("KB", justify="right")
+
+    total_latency = 0.0
+    for endpoint, entry in sorted(timings.by_endpoint().items(), key=lambda item: -item[1]["latency_total"]):
+        total_latency += entry["latency_total"]
+        requests.add_row(
+            endpoint,
+            f"{entry['count']}",
+            f"{entry['errors']}",
+            f"{entry['retries']}",
+            f"{entry['latency_total'] / entry['count'] * 1000:.1f}",
+            f"{entry['latency_max'] * 1000:.1f}",
+            f"{entry['bytes'] / 1024:.1f}",
+        )
+
+    phases = Table(title="Phases", title_justify="left")
+    phases.add_column("Phase", style="bold cyan")
+    phases.add_column("Count", justify="right")
+    phases.add_column("Total, ms", justify="right", style="magenta")
+    phases.add_row("requests (sum of latencies)", f"{len(timings.requests)}", f"{total_latency * 1000:.1f}")
+    for phase, duration in timings.phases.items():
+        phases.add_row(phase, f"{timings.phase_counts[phase]}", f"{duration * 1000:.1f}")
+    phases.add_row("total (wall clock)", "", f"{timings.elapsed() * 1000:.1f}", style="bold")
+
+    console.print(requests, phases, sep="\n")
@@ -1,19 +1,40 @@
+import itertools
 import os
-from typing import Dict, Any
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import ContextManager, Dict, Any, Deque, Iterable, Iterator, Optional, Tuple, Union
 
+import requests
 from rich.console import Text
 
-from .exceptions import ExMessageHandler
+from .cache import ResponseCache
+from .exceptions import APIError, ExMessageHandler
+from .hooks import REQUEST_END, REQUEST_START, Hooks, Metrics
+from .timings import Timings
+from .transport import Transport
 
 
 class HetznerHandler:
     """
     Abstract Handler class for other Handlers
     """
+    _transport: Optional[Transport] = None
+    _cache: Optional[ResponseCache] = None
+    _timings: Optional[Timings] = None
+    _metrics: Optional[Metrics] = None
+    # request events of all Handlers, see core.hooks
+    _hooks = Hooks()
+    # if False, unsuccessful response raises APIError instead of printing message and terminating program
+    terminate_on_error = True
 
     @staticmethod
     def get_prefix():
-        return "https://api.hetzner.cloud/v1"
+        """
+        Base url of API, may be replaced with HETZNER_API_URL environment variable (i.e. for local fake API)
+        """
+        return os.getenv("HETZNER_API_URL", default="https://api.hetzner.cloud/v1").rstrip("/")
 
     @staticmethod
     def get_headers() -> Dict[str, str]:
@@ -23,6 +44,115 @@ class HetznerHandler:
         }
         return headers
 
+    @staticmethod
+    def get_transport() -> Transport:
+        """
+        Return transport shared by all Handlers, create it on first use
+
+        :return: Transport object
+        """
+        if HetznerHandler._transport is None:
+            HetznerHandler._transport = Transport(hooks=HetznerHandler._hooks)
+        return HetznerHandler._transport
+
+    @staticmethod
+    def configure_transport(**options: Any) -> Transport:
+        """
+        Replace shared transport with a new one, configured by given options
+
+        :param options: keyword arguments for Transport(), i.e. pool_maxsize, read_timeout
+        :return: new Transport object
+        """
+        if HetznerHandler._transport is not None:
+            HetznerHandler._transport.close()
+        options.setdefault("hooks", HetznerHandler._hooks)
+        HetznerHandler._transport = Transport(**options)
+        return HetznerHandler._transport
+
+    @staticmethod
+    def get_cache() -> Optional[ResponseCache]:
+        """
+        Return on-disk cache shared by all Handlers, None if caching is disabled
+
+        :return: ResponseCache object or None
+        """
+        return HetznerHandler._cache
+
+    @staticmethod
+    def configure_cache(cache: Optional[ResponseCache]) -> None:
+        """
+        Enable on-disk cache of reference data for all Handlers, or disable it with None
+
+        :param cache: ResponseCache object or None
+        """
+        HetznerHandler._cache = cache
+
+    @staticmethod
+    def get_timings() -> Optional[Timings]:
+        """
+        Return collector of requests and phases durations, None if timings are disabled
+
+        :return: Timings object or None
+        """
+        return HetznerHandler._timings
+
+    @staticmethod
+    def configure_timings(timings: Optional[Timings]) -> None:
+        """
+        Enable recording of requests and phases durations for all Handlers, or disable it with None.
+        Requests are recorded by 'request_end' hook
+
+        :param timings: Timings object or None
+        """
+        if HetznerHandler._timings is not None:
+            HetznerHandler._hooks.unregister(REQUEST_END, HetznerHandler._timings.on_request_end)
+        if timings is not None:
+            HetznerHandler._hooks.register(REQUEST_END, timings.on_request_end)
+        HetznerHandler._timings = timings
+
+    @staticmethod
+    def get_hooks() -> Hooks:
+        """
+        Return registry of request events callbacks shared by all Handlers:
+        request_start, request_end, retry and throttle
+
+        :return: Hooks object
+        """
+        return HetznerHandler._hooks
+
+    @staticmethod
+    def get_metrics() -> Optional[Metrics]:
+        """
+        Return request counters and latency histograms per endpoint, None if metrics are disabled
+
+        :return: Metrics object or None
+        """
+        return HetznerHandler._metrics
+
+    @staticmethod
+    def configure_metrics(metrics: Optional[Metrics]) -> None:
+        """
+        Start collecting metrics of all Handlers requests into given object, or stop it with None
+
+        :param metrics: Metrics object or None
+        """
+        if HetznerHandler._metrics is not None:
+            HetznerHandler._metrics.detach(HetznerHandler._hooks)
+        if metrics is not None:
+            metrics.attach(HetznerHandler._hooks)
+        HetznerHandler._metrics = metrics
+
+    @staticmethod
+    def measure(phase: str) -> ContextManager[None]:
+        """
+        Add duration of code block to phase (i.e. 'parse', 'render'), if timings are enabled
+
+        :param phase: name of phase
+        :return: context manager
+        """
+        timings = HetznerHandler._timings
+        return nullcontext() if timings is None else timings.measure(phase)
+
     @staticmethod
     def create_exception_message(response: Dict[str, Any]) -> Text:
         """
@@ -36,6 +166,222 @@ class HetznerHandler:
         message.append(response['error']['message'], style="red")
         return message
 
+    @staticmethod
+    def get_error_message(resp: requests.Response) -> str:
+        """
+        Extract error message from unsuccessful response
+
+        :param resp: requests.Response object
+        :return: 'error.message' from json response, or response text if it isn't json
+        """
+        try:
+            return resp.json()["error"]["message"]
+        except (ValueError, KeyError, TypeError):
+            return resp.text
+
+    def _request(
+            self,
+            method: str,
+            url: str,
+            expected_status: Union[int, Tuple[int, ...]] = 200,
+            headers: Optional[Dict[str, str]] = None,
+            **kwargs: Any
+    ) -> requests.Response:
+        """
+        Making request through shared transport with handler headers
+
+        :param method: HTTP method, i.e. "GET"
+        :param url: full url of endpoint
+        :param expected_status: status code (or codes) of successful response
+        :param headers: additional headers for this request
+        :param kwargs: other arguments for Transport.request(), i.e. idempotent=True
+         for POST request, which is safe to repeat
+        :return: requests.Response object
+        """
+        hooks = self._hooks
+        notify = hooks.active
+        if notify:
+            hooks.emit(REQUEST_START, method=method, url=url)
+        start = time.perf_counter()
+        try:
+            resp = self.get_transport().request(
+                method,
+                url,
+                headers=({**self.headers, **headers} if headers else self.headers),
+                **kwargs
+            )
+        except requests.RequestException as error:
+            if notify:
+                hooks.emit(
+                    REQUEST_END, method=method, url=url, status=None, latency=time.perf_counter() - start,
+                    bytes=0, retries=getattr(error, "retries", 0), backoff_time=getattr(error, "backoff_time", 0.0),
+                    error=error,
+                )
+            if not self.terminate_on_error:
+                raise
+            raise ExMessageHandler(
+                self.create_exception_message({"error": {"message": f"request failed: {error}"}}),
+                terminate_after=True
+            )
+
+        if notify:
+            hooks.emit(
+                REQUEST_END,
+                method=method,
+                url=(resp.url or url),
+                status=resp.status_code,
+                latency=time.perf_counter() - start,
+                bytes=len(resp.content),
+                retries=getattr(resp, "retries", 0),
+                backoff_time=getattr(resp, "backoff_time", 0.0),
+                error=None,
+            )
+
+        if isinstance(expected_status, int):
+            expected_status = (expected_status,)
+        if resp.status_code not in expected_status:
+            if not self.terminate_on_error:
+                raise APIError(resp.status_code, self.get_error_message(resp))
+            raise ExMessageHandler(
+                self.create_exception_message({"error": {"message": self.get_error_message(resp)}}),
+                terminate_after=True
+            )
+        return resp
+
+    def _cached_get(self, url: str, ttl: float) -> Dict[str, Any]:
+        """
+        Making GET request to endpoint with rarely changed data through on-disk cache.
+        Fresh entry is returned without request, expired one is revalidated by ETag/Last-Modified
+
+        :param url: full url of endpoint
+        :param ttl: time to live of cache entry in seconds
+        :return: json response as Dict[str, Any]
+        """
+        cache = self.get_cache()
+        if cache is None:
+            resp = self._request("GET", url)
+            with self.measure("parse"):
+                return resp.json()
+
+        key = cache.make_key(url, self.headers["Authorization"])
+        entry = cache.load(key)
+        if entry is not None and cache.is_fresh(entry, ttl):
+            return entry["body"]
+
+        conditional_headers = {}
+        if entry is not None and entry.get("etag"):
+            conditional_headers["If-None-Match"] = entry["etag"]
+        if entry is not None and entry.get("last_modified"):
+            conditional_headers["If-Modified-Since"] = entry["last_modified"]
+
+        resp = self._request(
+            "GET",
+            url,
+            expected_status=((200, 304) if conditional_headers else 200),
+            headers=conditional_headers
+        )
+        if resp.status_code == 304:
+            entry["stored_at"] = time.time()
+        else:
+            with self.measure("parse"):
+                body = resp.json()
+            entry = {
+                "stored_at": time.time(),
+                "etag": resp.headers.get("ETag"),
+                "last_modified": resp.headers.get("Last-Modified"),
+                "body": body,
+            }
+        cache.store(key, entry)
+        return entry["body"]
+
+    def _iter_pages(
+            self,
+            url: str,
+            params: Optional[Dict[str, Any]] = None,
+            per_page: int = 50,
+            concurrency: int = 1,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Making requests to paginated endpoint page by page, following 'meta.pagination.next_page'.
+        If concurrency > 1 and first page reports 'last_page', the rest pages are
+        prefetched in parallel (at most 'concurrency' requests in flight), pages are still yielded in order
+
+        :param url: full url of collection endpoint
+        :param params: additional query parameters
+        :param per_page: number of entries per page (API allows at most 50)
+        :param concurrency: maximum number of parallel page requests
+        :return: iterator over json responses of each page
+        """
+        page = 1
+        while page:
+            data = self._get_page(url, params, page, per_page)
+            yield data
+
+            pagination = self.get_pagination(data)
+            last_page = pagination.get("last_page")
+            if concurrency > 1 and page == 1 and last_page and last_page > 1:
+                yield from self._prefetch_pages(url, params, range(2, last_page + 1), per_page, concurrency)
+                return
+            page = pagination.get("next_page")
+
+    def _prefetch_pages(
+            self,
+            url: str,
+            params: Optional[Dict[str, Any]],
+            pages: Iterable[int],
+            per_page: int,
+            concurrency: int,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Making requests for given pages in thread pool, keeping at most 'concurrency' requests in flight
+
+        :return: iterator over json responses in order of 'pages'
+        """
+        pages = iter(pages)
+        in_flight: Deque[Future] = deque()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            try:
+                for page in itertools.islice(pages, concurrency):
+                    in_flight.append(executor.submit(self._get_page, url, params, page, per_page))
+                while in_flight:
+                    data = in_flight.popleft().result()
+                    for page in itertools.islice(pages, 1):
+                        in_flight.append(executor.submit(self._get_page, url, params, page, per_page))
+                    yield data
+            finally:
+                for future in in_flight:
+                    future.cancel()
+
+    def _get_page(
+            self,
+            url: str,
+            params: Optional[Dict[str, Any]],
+            page: int,
+            per_page: int,
+    ) -> Dict[str, Any]:
+        """
+        Making request for one page of collection endpoint
+
+        :return: json response as Dict[str, Any]
+        """
+        resp = self._request(
+            "GET",
+            url,
+            params={**(params or {}), "page": page, "per_page": per_page}
+        )
+        with self.measure("parse"):
+            return resp.json()
+
+    @staticmethod
+    def get_pagination(data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Extract 'meta.pagination' part from json response of collection endpoint
+
+        :param data: json response as Dict[str, Any]
+        :return: pagination info, empty dict if response isn't paginated
+        """
+        return (data.get("meta") or {}).get("pagination") or {}
+
     @staticmethod
     def __get_api_token() -> str:
         token = os.getenv("HETZNER_API_TOKEN", default=None)
@@ -0,0 +1,140 @@
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from . import HetznerHandler
+from .models import Action
+
+
+class ActionsHandler(HetznerHandler):
+    """
+    Hetzner Handler class for tracking asynchronous actions (power on/off, server creating, etc.)
+    """
+    # statuses after which action doesn't change
+    finished_statuses = ("success", "error")
+    # maximum number of IDs in one request, API doesn't return more entries per page
+    batch_size = 50
+
+    def __init__(self):
+        self.api_link = f"{self.get_prefix()}/actions"
+        self.headers = self.get_headers()
+
+    def get_actions(self, ids: Iterable[int]) -> List[Dict[str, Any]]:
+        """
+        Making batched requests for actions by IDs, one request per 50 IDs
+
+        :param ids: actions IDs
+        :return: list of actions
+        """
+        actions = []
+        for batch in self.batches(ids):
+            for page in self._iter_pages(self.api_link, params={"id": batch}, per_page=self.batch_size):
+                actions.extend(page.get("actions", []))
+        return actions
+
+    @classmethod
+    def batches(cls, ids: Iterable[int]) -> List[List[int]]:
+        """
+        :param ids: actions IDs
+        :return: IDs split into batches of at most 'batch_size', one request per batch
+        """
+        ids = list(ids)
+        return [ids[i:i + cls.batch_size] for i in range(0, len(ids), cls.batch_size)]
+
+    def list_actions(self, ids: Iterable[int]) -> List[Action]:
+        """
+        Same as get_actions(), but actions are parsed to Action models
+
+        :param ids: actions IDs
+        :return: list of Action objects
+        """
+        return [Action(action) for action in self.get_actions(ids)]
+
+    def wait_for_actions(
+            self,
+            ids: Iterable[int],
+            timeout: Optional[float] = None,
+            min_interval: float = 1.0,
+            max_interval: float = 10.0,
+            backoff: float = 1.5,
+            on_update: Optional[Callable[[Dict[int, Dict[str, Any]]], None]] = None,
+    ) -> Dict[int, Dict[str, Any]]:
+        """
+        Poll actions until every one of them has finished (status 'success' or 'error').
+        Every cycle makes one batched request for still running actions only.
+        Polling interval grows by 'backoff' while nothing changes and drops to 'min_interval' on progress
+
+        :param ids: actions IDs
+        :param timeout: maximum seconds to wait, None to wait without limit
+        :param min_interval: minimum seconds between polls
+        :param max_interval: maximum seconds between polls
+        :param backoff: multiplier of interval after poll without changes
+        :param on_update: called with all known actions after every poll
+        :return: actions by ID in their last known state
+        """
+        poller = ActionPoller(ids, timeout, min_interval, max_interval, backoff, on_update)
+        while poller.pending:
+            delay = poller.update(self.get_actions(sorted(poller.pending)))
+            if delay is None:
+                break
+            time.sleep(delay)
+        return poller.actions
+
+
+class ActionPoller:
+    """
+    State of polling actions until they have finished, shared by ActionsHandler and AsyncActionsHandler.
+    It makes no I/O: caller requests pending actions, passes them to update() and sleeps for returned interval
+    """
+
+    def __init__(
+            self,
+            ids: Iterable[int],
+            timeout: Optional[float] = None,
+            min_interval: float = 1.0,
+            max_interval: float = 10.0,
+            backoff: float = 1.5,
+            on_update: Optional[Callable[[Dict[int, Dict[str, Any]]], None]] = None,
+    ):
+        """
+        Arguments are the same as of ActionsHandler.wait_for_actions()
+        """
+        self.pending = set(ids)
+        self.actions: Dict[int, Dict[str, Any]] = {}
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.interval = min_interval
+        self.on_update = on_update
+
+    def update(self, received: List[Dict[str, Any]]) -> Optional[float]:
+        """
+        Take the latest state of pending actions
+
+        :param received: actions returned by API for pending IDs
+        :return: seconds to wait before the next poll, None if polling is over
+        """
+        changed = False
+        # actions unknown to API can't finish, so stop waiting for them
+        self.pending &= {action["id"] for action in received}
+        for action in received:
+            previous = self.actions.get(action["id"])
+            if previous is None or previous.get("progress") != action.get("progress") \
+                    or previous["status"] != action["status"]:
+                changed = True
+            self.actions[action["id"]] = action
+            if action["status"] in ActionsHandler.finished_statuses:
+                self.pending.discard(action["id"])
+
+        if self.on_update is not None:
+            self.on_update(self.actions)
+        if not self.pending:
+            return None
+
+        self.interval = self.min_interval if changed else min(self.interval * self.backoff, self.max_interval)
+        if self.deadline is None:
+            return self.interval
+        remaining = self.deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        return min(self.interval, remaining)
@@ -0,0 +1,645 @@
+import asyncio
+import json
+import time
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None
+
+from .. import __app_name__, __version__
+from . import HetznerHandler
+from .actions import ActionPoller, ActionsHandler
+from .exceptions import APIError
+from .hooks import REQUEST_END, REQUEST_START
+from .models import Action, Datacenter, Server, ServerType
+from .price_index import PriceIndex
+from .ratelimit import BULK, RateLimiter
+from .retry import RetryPolicy
+from .server import ServerHandler
+from .server_types import ServerTypeCatalog
+from .transport import RequestAttempts
+
+
+class AsyncHetznerHandler:
+    """
+    Abstract Handler class for asyncio-based Handlers.
+    All of them share one httpx.AsyncClient, so connections are pooled without thread per request.
+    Requires optional dependency: pip install hetzner-control[async]
+    """
+    _client: Optional["httpx.AsyncClient"] = None
+    retry_policy = RetryPolicy()
+
+    def __init__(self):
+        self.headers = HetznerHandler.get_headers()
+
+    @staticmethod
+    def get_client() -> "httpx.AsyncClient":
+        """
+        Return client shared by all async Handlers, create it on first use.
+        Client is bound to the event loop it is used in, close it with close_client() before loop exits
+
+        :return: httpx.AsyncClient object
+        """
+        if AsyncHetznerHandler._client is None:
+            AsyncHetznerHandler.configure_client()
+        return AsyncHetznerHandler._client
+
+    @staticmethod
+    def configure_client(
+            max_connections: int = 100,
+            max_keepalive_connections: int = 20,
+            connect_timeout: float = 5.0,
+            read_timeout: float = 30.0,
+            **options: Any
+    ) -> "httpx.AsyncClient":
+        """
+        Replace shared client with a new one. Previous client should be closed by caller
+
+        :param max_connections: maximum number of simultaneous connections, other requests wait in pool
+        :param max_keepalive_connections: number of idle connections to keep alive
+        :param connect_timeout: seconds to wait for connection establishing
+        :param read_timeout: seconds to wait for the server response
+        :param options: other arguments for httpx.AsyncClient(), i.e. transport
+        :return: new httpx.AsyncClient object
+        """
+        if httpx is None:
+            raise ImportError("Async handlers require httpx: pip install hetzner-control[async]")
+
+        AsyncHetznerHandler._client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            headers={
+                "User-Agent": f"{__app_name__}/{__version__}",
+                "Accept": "application/json",
+            },
+            **options
+        )
+        return AsyncHetznerHandler._client
+
+    @staticmethod
+    async def close_client() -> None:
+        """
+        Close shared client and all its connections
+        """
+        if AsyncHetznerHandler._client is not None:
+            await AsyncHetznerHandler._client.aclose()
+            AsyncHetznerHandler._client = None
+
+    async def _request(
+            self,
+            method: str,
+            url: str,
+            expected_status: Union[int, Tuple[int, ...]] = 200,
+            idempotent: Optional[bool] = None,
+            priority: Optional[int] = None,
+            **kwargs: Any
+    ) -> "httpx.Response":
+        """
+        Making request through shared client with handler headers.
+        Request waits for budget of RateLimiter shared with HetznerHandler transport without blocking event loop
+        and is repeated after '429 Too Many Requests' for any method, as Transport.request() does.
+        Idempotent requests are repeated after transient errors according to 'retry_policy'.
+        Hooks shared with HetznerHandler are notified about request start, end, retries and throttling
+
+        :param method: HTTP method, i.e. "GET"
+        :param url: full url of endpoint
+        :param expected_status: status code (or codes) of successful response
+        :param idempotent: whether request may be repeated, by default depends on method
+        :param priority: ratelimit.INTERACTIVE or ratelimit.BULK, by default depends on method
+        :param kwargs: other arguments for httpx.AsyncClient.request()
+        :return: httpx.Response object
+        """
+        attempts = HetznerHandler.get_transport().attempts(
+            method, url, priority, idempotent, retry_policy=self.retry_policy,
+        )
+        hooks = HetznerHandler.get_hooks()
+        notify = hooks.active
+        if notify:
+            hooks.emit(REQUEST_START, method=method, url=url)
+        start = time.perf_counter()
+        try:
+            resp = await self._send(attempts, **kwargs)
+        except httpx.TransportError as error:
+            if notify:
+                hooks.emit(
+                    REQUEST_END, method=method, url=url, status=None, latency=time.perf_counter() - start,
+                    bytes=0, retries=attempts.retries, backoff_time=attempts.backoff_time, error=error,
+                )
+            raise
+
+        if notify:
+            hooks.emit(
+                REQUEST_END,
+                method=method,
+                url=f"{resp.url}",
+                status=resp.status_code,
+                latency=time.perf_counter() - start,
+                bytes=len(resp.content),
+                retries=attempts.retries,
+                backoff_time=attempts.backoff_time,
+                error=None,
+            )
+
+        if isinstance(expected_status, int):
+            expected_status = (expected_status,)
+        if resp.status_code not in expected_status:
+            raise APIError(resp.status_code, HetznerHandler.get_error_message(resp))
+        return resp
+
+    async def _send(self, attempts: RequestAttempts, **kwargs: Any) -> "httpx.Response":
+        """
+        Send request until RequestAttempts decides that response is final, sleeping in event loop between attempts
+
+        :param attempts: retry state of this request
+        :param kwargs: other arguments for httpx.AsyncClient.request()
+        :return: final httpx.Response object
+        """
+        while True:
+            if attempts.limiter is not None:
+                await self._acquire(attempts.limiter, attempts.priority)
+            try:
+                resp = await self.get_client().request(attempts.method, attempts.url, headers=self.headers, **kwargs)
+            except httpx.TransportError as error:
+                delay = attempts.after_error(
+                    error, not_connected=isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout)),
+                )
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+
+            delay = attempts.after_response(resp.status_code, resp.headers)
+            if delay is None:
+                return resp
+            if delay:
+                await asyncio.sleep(delay)
+
+    @staticmethod
+    async def _acquire(limiter: RateLimiter, priority: int) -> None:
+        """
+        Wait for token of rate limiter, sleeping in event loop instead of blocking it
+        """
+        wait = limiter.try_acquire(priority)
+        while wait:
+            await asyncio.sleep(wait)
+            wait = limiter.try_acquire(priority)
+
+    async def _iter_pages(
+            self,
+            url: str,
+            params: Optional[Dict[str, Any]] = None,
+            per_page: int = 50,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Making requests to paginated endpoint page by page, following 'meta.pagination.next_page'
+
+        :param url: full url of collection endpoint
+        :param params: additional query parameters
+        :param per_page: number of entries per page (API allows at most 50)
+        :return: async iterator over json responses of each page
+        """
+        page = 1
+        while page:
+            resp = await self._request(
+                "GET",
+                url,
+                params={**(params or {}), "page": page, "per_page": per_page}
+            )
+            data = resp.json()
+            yield data
+            page = HetznerHandler.get_pagination(data).get("next_page")
+
+
+async def _bounded(
+        call: Callable[[int], Awaitable[Dict[str, Any]]],
+        ids: Iterable[int],
+        concurrency: int,
+) -> AsyncIterator[Tuple[int, Optional[Dict[str, Any]], Optional[Exception]]]:
+    """
+    Run call for every ID with at most 'concurrency' calls in flight, failed call doesn't stop others
+
+    :return: async iterator over (ID, json response or None, exception or None) in order of completion
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(id_: int) -> Tuple[int, Optional[Dict[str, Any]], Optional[Exception]]:
+        async with semaphore:
+            try:
+                return id_, await call(id_), None
+            except (APIError, httpx.TransportError) as error:
+                return id_, None, error
+
+    for future in asyncio.as_completed([run(id_) for id_ in ids]):
+        yield await future
+
+
+class AsyncServerHandler(AsyncHetznerHandler):
+    """
+    Async Hetzner Handler class for actions with servers
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.api_link = f"{HetznerHandler.get_prefix()}/servers"
+
+    async def get_all_servers(self) -> Dict[str, Any]:
+        """
+        Making requests to Hetzner for lists of servers you own in your account.
+        Servers from all pages are collected into 'servers' of the first page response
+
+        :return: json response as Dict[str, Any]
+        """
+        data = None
+        async for page in self._iter_pages(self.api_link):
+            if data is None:
+                data = page
+            else:
+                data["servers"].extend(page["servers"])
+        return data
+
+    async def iter_servers(
+            self,
+            per_page: int = 50,
+            label_selector: Optional[str] = None,
+            name: Optional[str] = None,
+            status: Optional[Iterable[str]] = None,
+            sort: Optional[Iterable[str]] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Making requests to Hetzner for servers, yielding them one by one, filtering is done by API
+
+        :param per_page: number of servers per page (API allows at most 50)
+        :param label_selector: return only servers with matching labels, i.e. "role=web,env!=prod"
+        :param name: return only server with this name
+        :param status: return only servers with one of these statuses, i.e. ["running", "off"]
+        :param sort: sort order, i.e. ["name", "created:desc"]
+        :return: async iterator over servers
+        """
+        params = ServerHandler.get_filters(label_selector=label_selector, name=name, status=status, sort=sort)
+        async for page in self._iter_pages(self.api_link, params=params, per_page=per_page):
+            for server in page.get("servers", []):
+                yield server
+
+    async def list_servers(self, **kwargs: Any) -> AsyncIterator[Server]:
+        """
+        Same as iter_servers(), but servers are parsed to Server models.
+        Servers of the same type share one ServerType object
+
+        :param kwargs: arguments of iter_servers()
+        :return: async iterator over Server objects
+        """
+        server_types: Dict[int, ServerType] = {}
+        async for server in self.iter_servers(**kwargs):
+            with HetznerHandler.measure("parse"):
+                parsed = Server(server, server_types)
+            yield parsed
+
+    async def get_server(self, id_server: int) -> Dict[str, Any]:
+        """
+        Making request for detailed info about server by ID
+
+        :param id_server: server ID
+        :return: json response as Dict[str, Any]
+        """
+        resp = await self._request("GET", f"{self.api_link}/{id_server}")
+        return resp.json()
+
+    async def create_server(
+            self,
+            name: str,
+            image: str,
+            location: str,
+            server_type: str,
+            automount: bool = False,
+            start_after_create: bool = False,
+            labels: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Making a request to Hetzner for create a server with specific parameters
+
+        :param name: server name
+        :param image: server image
+        :param location: server location
+        :param server_type: id or name of the image the server is created from
+        :param automount: auto-mount Volumes after attach
+        :param start_after_create: start Server right after creation
+        :param labels: user-defined labels of server
+        :return: json response as Dict[str, Any]
+        """
+        post_data = ServerHandler.create_payload(
+            name, image, location, server_type, automount, start_after_create, labels,
+        )
+        resp = await self._request(
+            "POST",
+            self.api_link,
+            expected_status=201,
+            content=json.dumps(post_data)
+        )
+        return resp.json()
+
+    async def delete_server(self, id_server: int) -> Dict[str, Any]:
+        """
+        Making request to delete server by ID
+
+        :param id_server: uniq server id
+        :return: json response with deleting action as Dict[str, Any]
+        """
+        resp = await self._request("DELETE", f"{self.api_link}/{id_server}")
+        return resp.json()
+
+    async def update_server(self, id_server: int, labels: Dict[str, str]) -> Dict[str, Any]:
+        """
+        Making request to replace labels of server by ID
+
+        :param id_server: server ID
+        :param labels: new labels, labels which are not passed are removed
+        :return: json response as Dict[str, Any]
+        """
+        resp = await self._request("PUT", f"{self.api_link}/{id_server}", content=json.dumps({"labels": labels}))
+        return resp.json()
+
+    async def get_server_metrics(
+            self,
+            id_server: int,
+            types: Iterable[str],
+            start: datetime,
+            end: datetime,
+            step: Optional[int] = None,
+            priority: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Making request for time series of server metrics
+
+        :param id_server: server ID
+        :param types: metric types, some of "cpu", "disk", "network"
+        :param start: start of period, timezone-aware
+        :param end: end of period, timezone-aware
+        :param step: resolution of time series in seconds, chosen by API if None
+        :param priority: ratelimit.INTERACTIVE or ratelimit.BULK, by default INTERACTIVE as for any GET
+        :return: json response as Dict[str, Any]
+        """
+        resp = await self._request(
+            "GET", f"{self.api_link}/{id_server}/metrics",
+            params=ServerHandler.metrics_params(types, start, end, step), priority=priority,
+        )
+        with HetznerHandler.measure("parse"):
+            return resp.json()
+
+    def bulk(
+            self,
+            operation: str,
+            ids: Iterable[int],
+            concurrency: int = 8,
+    ) -> AsyncIterator[Tuple[int, Optional[Dict[str, Any]], Optional[Exception]]]:
+        """
+        Perform the same operation on many servers with at most 'concurrency' requests in flight.
+        Failed request doesn't stop others, its error is returned with result
+
+        :param operation: one of ServerHandler.bulk_operations
+        :param ids: servers IDs
+        :param concurrency: maximum number of requests in flight
+        :return: async iterator over (server ID, json response or None, exception or None) in order of completion
+        """
+        if operation not in ServerHandler.bulk_operations:
+            raise ValueError(f"Unsupported bulk operation: {operation}")
+        return _bounded(getattr(self, operation), ids, concurrency)
+
+    def bulk_metrics(
+            self,
+            ids: Iterable[int],
+            types: Iterable[str],
+            start: datetime,
+            end: datetime,
+            step: Optional[int] = None,
+            concurrency: int = 8,
+    ) -> AsyncIterator[Tuple[int, Optional[Dict[str, Any]], Optional[Exception]]]:
+        """
+        Same as get_server_metrics() for many servers, requests have BULK priority
+
+        :return: async iterator over (server ID, json response or None, exception or None) in order of completion
+        """
+        types = list(types)
+        return _bounded(
+            lambda id_: self.get_server_metrics(id_, types, start, end, step, BULK), ids, concurrency,
+        )
+
+    async def server_down(self, id_server: int) -> Dict[str, Any]:
+        """
+        Makes request to shut down the server by id
+
+        :param id_server: server ID
+        :return: json response as Dict[str, Any]
+        """
+        return await self.__make_action(id_server=id_server, action="shutdown")
+
+    async def server_up(self, id_server: int) -> Dict[str, Any]:
+        """
+        Making request to power on the server by id
+
+        :param id_server: server ID
+        :return: json response as Dict[str, Any]
+        """
+        return await self.__make_action(id_server=id_server, action="poweron")
+
+    async def __make_action(
+            self,
+            id_server: int,
+            action: str,
+            params: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Making a request to perform a specific action on the server by ID
+
+        :param id_server: server ID
+        :param action: action to be taken on the server
+        :param params: parameters that are required for certain actions
+        :return: json response as Dict[str, Any]
+        """
+        resp = await self._request(
+            "POST",
+            f"{self.api_link}/{id_server}/actions/{action}",
+            expected_status=201,
+            params=(params if params else {})
+        )
+        return resp.json()
+
+
+class AsyncPricingHandler(AsyncHetznerHandler):
+    """
+    Async Hetzner Handler class that provides reference information
+     about prices for all resources available on the platform
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.api_link = f"{HetznerHandler.get_prefix()}/pricing"
+        self._index: Optional[PriceIndex] = None
+
+    async def get_all_prices(self) -> Dict[str, Any]:
+        """
+        Making request to server for prices for all resources available on the platform
+
+        :return: json response as Dict[str, Any]
+        """
+        resp = await self._request("GET", self.api_link)
+        return resp.json()
+
+    async def get_price_index(self) -> PriceIndex:
+        """
+        Build index of all prices on first call, later calls return the same object
+
+        :return: PriceIndex object
+        """
+        if self._index is None:
+            data = (await self.get_all_prices())["pricing"]
+            with HetznerHandler.measure("parse"):
+                self._index = PriceIndex(data)
+        return self._index
+
+
+class AsyncServerTypesHandler(AsyncHetznerHandler):
+    """
+    Async Hetzner Handler class that provides reference information about server types
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.api_link = f"{HetznerHandler.get_prefix()}/server_types"
+
+    async def get_all_server_types(self) -> Dict[str, Any]:
+        """
+        Making request to server for information about all server types
+
+        :return: json response as Dict[str, Any]
+        """
+        resp = await self._request("GET", self.api_link)
+        return resp.json()
+
+    async def get_server_type(self, id_: int) -> Dict[str, Any]:
+        """
+        Making request to server for information about server type by ID
+
+        :return: json response as Dict[str, Any]
+        """
+        resp = await self._request("GET", f"{self.api_link}/{id_}")
+        return resp.json()
+
+    async def list_server_types(self) -> List[ServerType]:
+        """
+        Same as get_all_server_types(), but server types are parsed to ServerType models
+
+        :return: list of ServerType objects
+        """
+        data = (await self.get_all_server_types())["server_types"]
+        with HetznerHandler.measure("parse"):
+            return [ServerType(type_) for type_ in data]
+
+    async def get_catalog(self) -> ServerTypeCatalog:
+        """
+        Join server types with prices, both are requested concurrently
+
+        :return: ServerTypeCatalog object
+        """
+        server_types, index = await asyncio.gather(self.list_server_types(), AsyncPricingHandler().get_price_index())
+        with HetznerHandler.measure("parse"):
+            return ServerTypeCatalog(server_types, index)
+
+
+class AsyncDatacenterHandler(AsyncHetznerHandler):
+    """
+    Async Hetzner Handler class that provides reference information about datacenters
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.api_link = f"{HetznerHandler.get_prefix()}/datacenters"
+
+    async def get_all_datacenters(self) -> Dict[str, Any]:
+        """
+        Making request to server for information about all available datacenters
+
+        :return: json response as Dict[str, Any]
+        """
+        resp = await self._request("GET", self.api_link)
+        return resp.json()
+
+    async def list_datacenters(self) -> List[Datacenter]:
+        """
+        Same as get_all_datacenters(), but datacenters are parsed to Datacenter models
+
+        :return: list of Datacenter objects
+        """
+        data = (await self.get_all_datacenters())["datacenters"]
+        with HetznerHandler.measure("parse"):
+            return [Datacenter(datacenter) for datacenter in data]
+
+
+class AsyncActionsHandler(AsyncHetznerHandler):
+    """
+    Async Hetzner Handler class for tracking asynchronous actions (power on/off, server creating, etc.)
+    """
+    finished_statuses = ActionsHandler.finished_statuses
+    batch_size = ActionsHandler.batch_size
+
+    def __init__(self):
+        super().__init__()
+        self.api_link = f"{HetznerHandler.get_prefix()}/actions"
+
+    async def get_actions(self, ids: Iterable[int]) -> List[Dict[str, Any]]:
+        """
+        Making batched requests for actions by IDs, one request per 50 IDs, batches are requested concurrently
+
+        :param ids: actions IDs
+        :return: list of actions
+        """
+        async def get_batch(batch: List[int]) -> List[Dict[str, Any]]:
+            actions = []
+            async for page in self._iter_pages(self.api_link, params={"id": batch}, per_page=self.batch_size):
+                actions.extend(page.get("actions", []))
+            return actions
+
+        batches = await asyncio.gather(*(get_batch(batch) for batch in ActionsHandler.batches(ids)))
+        return [action for batch in batches for action in batch]
+
+    async def list_actions(self, ids: Iterable[int]) -> List[Action]:
+        """
+        Same as get_actions(), but actions are parsed to Action models
+
+        :param ids: actions IDs
+        :return: list of Action objects
+        """
+        return [Action(action) for action in await self.get_actions(ids)]
+
+    async def wait_for_actions(
+            self,
+            ids: Iterable[int],
+            timeout: Optional[float] = None,
+            min_interval: float = 1.0,
+            max_interval: float = 10.0,
+            backoff: float = 1.5,
+            on_update: Optional[Callable[[Dict[int, Dict[str, Any]]], None]] = None,
+    ) -> Dict[int, Dict[str, Any]]:
+        """
+        Same as ActionsHandler.wait_for_actions(), sleeping between polls doesn't block event loop
+
+        :param ids: actions IDs
+        :param timeout: maximum seconds to wait, None to wait without limit
+        :param min_interval: minimum seconds between polls
+        :param max_interval: maximum seconds between polls
+        :param backoff: multiplier of interval after poll without changes
+        :param on_update: called with all known actions after every poll
+        :return: actions by ID in their last known state
+        """
+        poller = ActionPoller(ids, timeout, min_interval, max_interval, backoff, on_update)
+        while poller.pending:
+            delay = poller.update(await self.get_actions(sorted(poller.pending)))
+            if delay is None:
+                break
+            await asyncio.sleep(delay)
+        return poller.actions
@@ -0,0 +1,87 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .. import __app_name__
+
+
+class ResponseCache:
+    """
+    On-disk cache for json responses of rarely changed endpoints (pricing, server types, datacenters).
+    Every entry is a separate json file, which is replaced atomically,
+    so parallel processes never read partially written entry
+    """
+
+    def __init__(self, directory: Optional[str] = None, refresh: bool = False):
+        """
+        :param directory: directory for cache files, by default $XDG_CACHE_HOME/hetzner-control
+        :param refresh: if True, entries are revalidated with API even if their TTL hasn't expired
+        """
+        self.directory = Path(directory) if directory else self.default_directory()
+        self.refresh = refresh
+
+    @staticmethod
+    def default_directory() -> Path:
+        base = os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        return Path(base) / __app_name__
+
+    @staticmethod
+    def make_key(url: str, token: str) -> str:
+        """
+        Create cache key for endpoint and API token (i.e. project), token itself isn't stored on disk
+
+        :param url: full url of endpoint
+        :param token: API token or Authorization header value
+        :return: hex digest
+        """
+        return hashlib.sha256(f"{token}\n{url}".encode()).hexdigest()
+
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Read cache entry
+
+        :param key: key from make_key()
+        :return: entry with 'stored_at', 'etag', 'last_modified', 'body' or None, if entry missing or broken
+        """
+        try:
+            with open(self.directory / f"{key}.json", encoding="utf-8") as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(entry, dict) or "body" not in entry:
+            return None
+        return entry
+
+    def store(self, key: str, entry: Dict[str, Any]) -> None:
+        """
+        Write cache entry atomically. Failed write isn't an error, entry is just not cached
+
+        :param key: key from make_key()
+        :param entry: entry with 'stored_at', 'etag', 'last_modified', 'body'
+        """
+        try:
+            self.directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=f".{key}.", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as file:
+                    json.dump(entry, file)
+                os.replace(tmp_path, self.directory / f"{key}.json")
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError:
+            pass
+
+    def is_fresh(self, entry: Dict[str, Any], ttl: float) -> bool:
+        """
+        Check, that entry may be returned without request to API
+
+        :param entry: entry from load()
+        :param ttl: time to live of entry in seconds
+        :return: True if entry is fresh
+        """
+        return not self.refresh and time.time() - entry.get("stored_at", 0) < ttl
@@ -0,0 +1,133 @@
+import calendar
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional
+
+from .models import Server
+from .price_index import SERVER, SERVER_BACKUP, TRAFFIC, PriceIndex
+
+# traffic in API responses is in bytes, included traffic of 20 TB is 20 * 1024 ** 4
+BYTES_PER_TB = 1024 ** 4
+
+
+def month_progress(now: Optional[datetime] = None) -> float:
+    """
+    :param now: current time, UTC now by default
+    :return: share of current month passed, from 1/(hours in month) to 1
+    """
+    now = now or datetime.now(timezone.utc)
+    hours = calendar.monthrange(now.year, now.month)[1] * 24
+    passed = (now.day - 1) * 24 + now.hour + now.minute / 60
+    return max(1.0, passed) / hours
+
+
+class CostLine:
+    """
+    Spend of group of servers, monthly amounts include backup surcharge and traffic overage.
+    Servers without price in their location are counted in 'unpriced' and add nothing to amounts
+    """
+    __slots__ = (
+        "servers", "unpriced", "hourly_net", "hourly_gross", "monthly_net", "monthly_gross",
+        "backup_gross", "traffic_gross", "overage_tb",
+    )
+
+    def __init__(self):
+        self.servers = 0
+        self.unpriced = 0
+        self.hourly_net = 0.0
+        self.hourly_gross = 0.0
+        self.monthly_net = 0.0
+        self.monthly_gross = 0.0
+        self.backup_gross = 0.0
+        self.traffic_gross = 0.0
+        self.overage_tb = 0.0
+
+    def add(self, other: "CostLine") -> None:
+        for name in self.__slots__:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
+    def __repr__(self) -> str:
+        return f"CostLine(servers={self.servers}, monthly_gross={self.monthly_gross:.4f})"
+
+
+class FleetCost:
+    """
+    Current spend of servers grouped by label, server type and location.
+    Prices are taken from PriceIndex, so servers of one listing are priced without any requests.
+    Outgoing traffic of current month is projected to the whole month and traffic over included is charged,
+    ingoing traffic is free and only reported
+    """
+
+    def __init__(self, index: PriceIndex, label_key: Optional[str] = None, now: Optional[datetime] = None):
+        """
+        :param index: prices of all resources
+        :param label_key: group by values of this label, by default by every 'key=value' label of server
+        :param now: current time for traffic projection, UTC now by default
+        """
+        self.index = index
+        self.label_key = label_key
+        self.progress = month_progress(now)
+        self.total = CostLine()
+        self.by_label: Dict[str, CostLine] = {}
+        self.by_type: Dict[str, CostLine] = {}
+        self.by_location: Dict[str, CostLine] = {}
+        self.ingoing_tb = 0.0
+        self.outgoing_tb = 0.0
+
+    def server_cost(self, server: Server) -> CostLine:
+        """
+        :param server: Server object
+        :return: spend of one server
+        """
+        line = CostLine()
+        line.servers = 1
+        type_name = server.server_type.name
+        price = self.index.find(SERVER, type_name, server.location) or server.price
+        if price is not None:
+            line.hourly_net, line.hourly_gross = price.hourly_net, price.hourly_gross
+            line.monthly_net, line.monthly_gross = price.monthly_net, price.monthly_gross
+        else:
+            line.unpriced = 1
+
+        # backup_window is set only for servers with enabled backups
+        backup = self.index.find(SERVER_BACKUP, type_name, server.location) if server.backup_window else None
+        if backup is not None:
+            line.hourly_net += backup.hourly_net
+            line.hourly_gross += backup.hourly_gross
+            line.monthly_net += backup.monthly_net
+            line.monthly_gross += backup.monthly_gross
+            line.backup_gross = backup.monthly_gross
+
+        projected = server.outgoing_traffic / self.progress
+        line.overage_tb = max(0.0, projected - server.included_traffic) / BYTES_PER_TB
+        traffic = self.index.find(TRAFFIC) if line.overage_tb else None
+        if traffic is not None:
+            line.monthly_net += traffic.monthly_net * line.overage_tb
+            line.monthly_gross += traffic.monthly_gross * line.overage_tb
+            line.traffic_gross = traffic.monthly_gross * line.overage_tb
+        return line
+
+    def _groups(self, server: Server) -> Iterable[str]:
+        if self.label_key is not None:
+            return (server.labels.get(self.label_key, "-"),)
+        return [f"{key}={value}" for key, value in sorted(server.labels.items())] or ["-"]
+
+    def add(self, server: Server) -> CostLine:
+        """
+        Add server to total and groups. Server with several labels is counted in every label group
+
+        :param server: Server object
+        :return: spend of this server
+        """
+        line = self.server_cost(server)
+        self.total.add(line)
+        self.by_type.setdefault(server.server_type.name, CostLine()).add(line)
+        self.by_location.setdefault(server.location, CostLine()).add(line)
+        for group in self._groups(server):
+            self.by_label.setdefault(group, CostLine()).add(line)
+        self.ingoing_tb += server.ingoing_traffic / BYTES_PER_TB
+        self.outgoing_tb += server.outgoing_traffic / BYTES_PER_TB
+        return line
+
+    def add_many(self, servers: Iterable[Server]) -> None:
+        for server in servers:
+            self.add(server)
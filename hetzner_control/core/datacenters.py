@@ -1,14 +1,15 @@
-from typing import Dict, Any
+from typing import Dict, Any, List
 
-import requests
-
-from . import HetznerHandler, ExMessageHandler
+from . import HetznerHandler
+from .models import Datacenter
 
 
 class DatacenterHandler(HetznerHandler):
     """
     Hetzner Handler class that provides reference information about datacenters
     """
+    # seconds to keep response in on-disk cache
+    cache_ttl = 24 * 60 * 60
 
     def __init__(self):
         self.api_link = f"{self.get_prefix()}/datacenters"
@@ -20,14 +21,14 @@ class DatacenterHandler(HetznerHandler):
 
         :return: json response as Dict[str, Any]
         """
-        resp = requests.get(
-            url=self.api_link,
-            headers=self.headers
-        )
-
-        if resp.status_code != 200:
-            raise ExMessageHandler(
-                self.create_exception_message(resp.json()),
-                terminate_after=True
-            )
-        return resp.json()
+        return self._cached_get(self.api_link, ttl=self.cache_ttl)
+
+    def list_datacenters(self) -> List[Datacenter]:
+        """
+        Same as get_all_datacenters(), but datacenters are parsed to Datacenter models
+
+        :return: list of Datacenter objects
+        """
+        data = self.get_all_datacenters()["datacenters"]
+        with self.measure("parse"):
+            return [Datacenter(datacenter) for datacenter in data]
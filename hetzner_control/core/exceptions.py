@@ -32,3 +32,15 @@ class ExMessageHandler(BaseExceptionHandler):
         print by rich.console.Console() error message rich.console.Text() to stdout
         """
         Console().print(self.message)
+
+
+class APIError(BaseExceptionHandler):
+    """
+    Exception class for unsuccessful API response.
+    Unlike ExMessageHandler it neither prints nor terminates program, so it can be handled by library users
+    """
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"{status_code}: {message}")
+        self.status_code = status_code
+        self.message = message
@@ -0,0 +1,425 @@
+import copy
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import requests
+
+try:
+    import yaml
+except ImportError:  # pragma: no cover
+    yaml = None
+
+from .exceptions import APIError
+from .models import Server
+from .server import ServerHandler
+
+# labels which mark servers managed by fleet file, servers without them are never touched
+FLEET_LABEL = "fleet"
+GROUP_LABEL = "fleet-group"
+DEFAULT_NAME = "{fleet}-{group}-{index}"
+POWER_STATUSES = ("running", "off")
+
+# kinds of changes, in order they are submitted, so deleting starts before creating
+DELETE = "delete"
+STOP = "stop"
+START = "start"
+LABEL = "label"
+CREATE = "create"
+KINDS = (DELETE, STOP, START, LABEL, CREATE)
+# servers which differ from group in these properties are replaced only with replace=True
+DRIFT = "drift"
+
+_LABEL_VALUE = re.compile(r"^[A-Za-z0-9]([A-Za-z0-9._-]{0,61}[A-Za-z0-9])?$")
+_GROUP_FIELDS = ("count", "server_type", "location", "image", "labels", "status", "name")
+
+
+class GroupSpec:
+    """
+    Desired state of group of identical servers
+    """
+    __slots__ = ("name", "count", "server_type", "location", "image", "labels", "status", "name_template")
+
+    def __init__(
+            self,
+            name: str,
+            count: int,
+            server_type: str,
+            location: str,
+            image: str,
+            labels: Optional[Dict[str, str]] = None,
+            status: str = "running",
+            name_template: str = DEFAULT_NAME,
+    ):
+        self.name = name
+        self.count = count
+        self.server_type = server_type
+        self.location = location
+        self.image = image
+        self.labels = dict(labels or {})
+        self.status = status
+        self.name_template = name_template
+
+    def server_labels(self, fleet: str) -> Dict[str, str]:
+        """
+        :param fleet: name of fleet
+        :return: labels of every server of group, with fleet and group labels
+        """
+        return {**self.labels, FLEET_LABEL: fleet, GROUP_LABEL: self.name}
+
+    def __repr__(self) -> str:
+        return f"GroupSpec(name={self.name!r}, count={self.count}, server_type={self.server_type!r})"
+
+
+class FleetSpec:
+    """
+    Desired state of all servers of fleet file:
+
+        fleet: staging
+        defaults:
+          image: ubuntu-22.04
+          location: fsn1
+        groups:
+          web:
+            count: 3
+            server_type: cpx21
+            labels: {role: web}
+          worker:
+            count: 10
+            server_type: cx31
+            status: off
+    """
+
+    def __init__(self, name: str, groups: Dict[str, GroupSpec]):
+        self.name = name
+        self.groups = groups
+
+    @property
+    def selector(self) -> str:
+        """
+        :return: label selector of servers of this fleet
+        """
+        return f"{FLEET_LABEL}={self.name}"
+
+    @classmethod
+    def from_dict(cls, data: Any) -> "FleetSpec":
+        """
+        :param data: decoded fleet file
+        :return: FleetSpec object
+        :raise ValueError: invalid fleet file, message names the wrong field
+        """
+        if not isinstance(data, dict):
+            raise ValueError("fleet file must be a mapping with 'fleet' and 'groups'")
+        unknown = set(data) - {"fleet", "defaults", "groups"}
+        if unknown:
+            raise ValueError(f"unknown fields: {', '.join(sorted(unknown))}")
+        name = data.get("fleet")
+        if not isinstance(name, str) or not _LABEL_VALUE.match(name):
+            raise ValueError("'fleet' must be a name of letters, digits, '.', '_' and '-', up to 63 characters")
+
+        defaults = data.get("defaults") or {}
+        groups = data.get("groups") or {}
+        if not isinstance(defaults, dict) or not isinstance(groups, dict):
+            raise ValueError("'defaults' and 'groups' must be mappings")
+        result = {}
+        for group, fields in groups.items():
+            fields = fields or {}
+            if not isinstance(fields, dict):
+                raise ValueError(f"groups.{group} must be a mapping")
+            merged = {**defaults, **fields}
+            # labels of defaults are extended by labels of group, not replaced
+            if isinstance(defaults.get("labels"), dict) and isinstance(fields.get("labels"), dict):
+                merged["labels"] = {**defaults["labels"], **fields["labels"]}
+            result[f"{group}"] = _group_spec(f"{group}", merged)
+        return cls(name, result)
+
+
+def _group_spec(name: str, fields: Dict[str, Any]) -> GroupSpec:
+    where = f"groups.{name}"
+    if not _LABEL_VALUE.match(name):
+        raise ValueError(f"{where}: group name must be a valid label value")
+    unknown = set(fields) - set(_GROUP_FIELDS)
+    if unknown:
+        raise ValueError(f"{where}: unknown fields: {', '.join(sorted(unknown))}")
+    for field in ("server_type", "location", "image"):
+        if not isinstance(fields.get(field), str) or not fields[field]:
+            raise ValueError(f"{where}.{field} is required")
+
+    count = fields.get("count", 1)
+    if not isinstance(count, int) or isinstance(count, bool) or count < 0:
+        raise ValueError(f"{where}.count must be a non-negative integer")
+    status = fields.get("status", "running")
+    if isinstance(status, bool):
+        # YAML 1.1 reads unquoted on/off as booleans
+        status = "running" if status else "off"
+    if status not in POWER_STATUSES:
+        raise ValueError(f"{where}.status must be one of: {', '.join(POWER_STATUSES)}")
+    labels = fields.get("labels") or {}
+    if not isinstance(labels, dict):
+        raise ValueError(f"{where}.labels must be a mapping")
+    labels = {f"{key}": f"{value}" for key, value in labels.items()}
+    if FLEET_LABEL in labels or GROUP_LABEL in labels:
+        raise ValueError(f"{where}.labels: '{FLEET_LABEL}' and '{GROUP_LABEL}' are set by fleet")
+
+    template = fields.get("name", DEFAULT_NAME)
+    try:
+        template.format(fleet="f", group="g", index=1)
+    except (AttributeError, KeyError, IndexError, ValueError):
+        raise ValueError(f"{where}.name must be a template with {{fleet}}, {{group}} and {{index}}")
+    if "{index" not in template:
+        raise ValueError(f"{where}.name must contain {{index}}, names of servers are unique")
+
+    return GroupSpec(
+        name=name,
+        count=count,
+        server_type=fields["server_type"],
+        location=fields["location"],
+        image=fields["image"],
+        labels=labels,
+        status=status,
+        name_template=template,
+    )
+
+
+def load_fleet(text: str) -> FleetSpec:
+    """
+    Parse fleet file. YAML requires optional dependency: pip install hetzner-control[apply],
+    fleet file in json format is read without it
+
+    :param text: content of fleet file
+    :return: FleetSpec object
+    :raise ValueError: invalid fleet file
+    :raise ImportError: file isn't json and PyYAML isn't installed
+    """
+    if yaml is None:
+        try:
+            data = json.loads(text)
+        except ValueError:
+            raise ImportError("PyYAML is required for fleet files in YAML: pip install hetzner-control[apply]")
+    else:
+        try:
+            data = yaml.safe_load(text)
+        except yaml.YAMLError as error:
+            raise ValueError(f"invalid YAML: {error}")
+    return FleetSpec.from_dict(data)
+
+
+class Change:
+    """
+    One request of plan
+    """
+    __slots__ = ("kind", "group", "name", "server_id", "detail", "spec")
+
+    def __init__(
+            self,
+            kind: str,
+            group: str,
+            name: str,
+            server_id: Optional[int] = None,
+            detail: str = "",
+            spec: Optional[GroupSpec] = None,
+    ):
+        """
+        :param kind: one of KINDS or DRIFT
+        :param group: name of group
+        :param name: server name
+        :param server_id: ID of existing server, None for creating
+        :param detail: human-readable reason of change
+        :param spec: group of created or relabeled server
+        """
+        self.kind = kind
+        self.group = group
+        self.name = name
+        self.server_id = server_id
+        self.detail = detail
+        self.spec = spec
+
+    def __repr__(self) -> str:
+        return f"Change(kind={self.kind!r}, name={self.name!r}, server_id={self.server_id})"
+
+
+class Plan:
+    """
+    Changes which bring live servers to fleet file, in order of KINDS.
+    Drift of kept servers is reported separately and isn't executed
+    """
+
+    def __init__(self, fleet: str, changes: List[Change], drift: List[Change], unchanged: int):
+        self.fleet = fleet
+        self.changes = changes
+        self.drift = drift
+        self.unchanged = unchanged
+
+    def counts(self) -> Dict[str, int]:
+        """
+        :return: number of changes by kind, every kind is present
+        """
+        result = dict.fromkeys(KINDS, 0)
+        for change in self.changes:
+            result[change.kind] += 1
+        return result
+
+    def __bool__(self) -> bool:
+        return bool(self.changes)
+
+    def __len__(self) -> int:
+        return len(self.changes)
+
+
+def _drift(server: Server, spec: GroupSpec) -> List[str]:
+    """
+    :return: descriptions of properties, in which server differs from group
+    """
+    result = []
+    if server.server_type.name != spec.server_type:
+        result.append(f"type {server.server_type.name} -> {spec.server_type}")
+    if server.location != spec.location:
+        result.append(f"location {server.location} -> {spec.location}")
+    # image is absent for servers created from deleted snapshots
+    image = (server.get_extra("image") or {}).get("name")
+    if image and image != spec.image:
+        result.append(f"image {image} -> {spec.image}")
+    return result
+
+
+def _id(server: Server) -> int:
+    return server.id
+
+
+def plan_fleet(spec: FleetSpec, servers: Iterable[Server], replace: bool = False) -> Plan:
+    """
+    Compare fleet file with live servers. Servers of fleet are matched to groups by GROUP_LABEL,
+    groups are scaled by deleting the newest servers and creating servers with unused names,
+    so creating never waits for deleting. Servers of groups removed from file are deleted.
+    Servers of fleet without GROUP_LABEL are never deleted, they are only reported as drift
+
+    :param spec: desired state
+    :param servers: live servers, servers of other fleets and without labels are ignored
+    :param replace: replace servers of wrong type, location or image, by default only report them
+    :return: Plan object
+    """
+    by_group: Dict[str, List[Server]] = {}
+    names = set()
+    for server in servers:
+        if server.labels.get(FLEET_LABEL) != spec.name:
+            continue
+        by_group.setdefault(server.labels.get(GROUP_LABEL, ""), []).append(server)
+        names.add(server.name)
+
+    changes: Dict[str, List[Change]] = {kind: [] for kind in KINDS}
+    drift: List[Change] = []
+    unchanged = 0
+    for group, members in sorted(by_group.items()):
+        if not group:
+            # labeled by hand or by other tool, the group it was meant for is unknown
+            drift.extend(
+                Change(DRIFT, group, server.name, server.id, f"no '{GROUP_LABEL}' label")
+                for server in sorted(members, key=_id)
+            )
+        elif group not in spec.groups:
+            changes[DELETE].extend(
+                Change(DELETE, group, server.name, server.id, "group removed") for server in sorted(members, key=_id)
+            )
+
+    for group, group_spec in spec.groups.items():
+        members = sorted(by_group.get(group, []), key=_id)
+        drifted = {server.id: _drift(server, group_spec) for server in members}
+        if replace:
+            for server in members:
+                if drifted[server.id]:
+                    detail = "replace: " + ", ".join(drifted[server.id])
+                    changes[DELETE].append(Change(DELETE, group, server.name, server.id, detail))
+            members = [server for server in members if not drifted[server.id]]
+        else:
+            # servers matching group are kept first, so scaling down removes drifted ones
+            members.sort(key=lambda server: bool(drifted[server.id]))
+
+        kept, excess = members[:group_spec.count], members[group_spec.count:]
+        changes[DELETE].extend(Change(DELETE, group, server.name, server.id, "scale down") for server in excess)
+
+        labels = group_spec.server_labels(spec.name)
+        for server in kept:
+            changed = False
+            if group_spec.status == "running" and server.status == "off":
+                changes[START].append(Change(START, group, server.name, server.id, "off -> running"))
+                changed = True
+            elif group_spec.status == "off" and server.status == "running":
+                changes[STOP].append(Change(STOP, group, server.name, server.id, "running -> off"))
+                changed = True
+            if server.labels != labels:
+                changes[LABEL].append(Change(LABEL, group, server.name, server.id, "labels", group_spec))
+                changed = True
+            if drifted[server.id]:
+                drift.append(Change(DRIFT, group, server.name, server.id, ", ".join(drifted[server.id])))
+            unchanged += not changed
+
+        index = 0
+        for _ in range(group_spec.count - len(kept)):
+            index += 1
+            name = group_spec.name_template.format(fleet=spec.name, group=group, index=index)
+            while name in names:
+                index += 1
+                name = group_spec.name_template.format(fleet=spec.name, group=group, index=index)
+            names.add(name)
+            changes[CREATE].append(Change(
+                CREATE, group, name, None, f"{group_spec.server_type} in {group_spec.location}", group_spec,
+            ))
+
+    return Plan(spec.name, [change for kind in KINDS for change in changes[kind]], drift, unchanged)
+
+
+def execute_plan(
+        handler: ServerHandler,
+        plan: Plan,
+        concurrency: int = 8,
+) -> Iterator[Tuple[Change, Optional[Dict[str, Any]], Optional[Exception]]]:
+    """
+    Execute changes of plan with bounded worker pool, all requests share rate limiter of transport.
+    Changes are submitted in order of plan, so deleting starts first and frees quota for creating.
+    Failed request doesn't stop other changes, its error is returned with result
+
+    :param handler: ServerHandler object
+    :param plan: Plan object
+    :param concurrency: maximum number of requests in flight
+    :return: iterator over (change, json response or None, exception or None) in order of completion
+    """
+    handler = copy.copy(handler)
+    handler.terminate_on_error = False
+
+    def run(change: Change) -> Dict[str, Any]:
+        if change.kind == CREATE:
+            return handler.create_server(
+                name=change.name,
+                image=change.spec.image,
+                location=change.spec.location,
+                server_type=change.spec.server_type,
+                start_after_create=(change.spec.status == "running"),
+                labels=change.spec.server_labels(plan.fleet),
+            )
+        if change.kind == DELETE:
+            return handler.delete_server(change.server_id)
+        if change.kind == STOP:
+            return handler.server_down(change.server_id)
+        if change.kind == START:
+            return handler.server_up(change.server_id)
+        return handler.update_server(change.server_id, labels=change.spec.server_labels(plan.fleet))
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {executor.submit(run, change): change for change in plan.changes}
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result(), None
+            except (APIError, requests.RequestException) as error:
+                yield futures[future], None, error
+
+
+def action_ids(data: Optional[Dict[str, Any]]) -> List[int]:
+    """
+    :param data: json response of change
+    :return: IDs of action and next actions started by change
+    """
+    if not data:
+        return []
+    actions = ([data["action"]] if data.get("action") else []) + list(data.get("next_actions") or [])
+    return [action["id"] for action in actions]
@@ -0,0 +1,180 @@
+import bisect
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .timings import get_endpoint
+
+# events of the core client and keyword arguments their callbacks receive
+REQUEST_START = "request_start"  # method, url
+REQUEST_END = "request_end"  # method, url, status, latency, bytes, retries, backoff_time, error
+RETRY = "retry"  # method, url, attempt, delay, status, error
+THROTTLE = "throttle"  # method, url, delay
+EVENTS = (REQUEST_START, REQUEST_END, RETRY, THROTTLE)
+
+
+class Hooks:
+    """
+    Registry of callbacks for request events of the core client.
+    Callbacks are called synchronously in the thread making request, with keyword arguments of event.
+    While nothing is registered 'active' is False, so instrumented code skips preparing event data
+    """
+
+    def __init__(self):
+        # tuples are replaced on change, so emit() doesn't need a lock
+        self._callbacks: Dict[str, Tuple[Callable[..., None], ...]] = {event: () for event in EVENTS}
+        self.active = False
+        self._lock = threading.Lock()
+
+    def register(self, event: str, callback: Callable[..., None]) -> Callable[..., None]:
+        """
+        :param event: one of EVENTS
+        :param callback: function accepting keyword arguments of event
+        :return: the same callback
+        """
+        if event not in self._callbacks:
+            raise ValueError(f"Unknown event: {event}, expected one of {', '.join(EVENTS)}")
+        with self._lock:
+            self._callbacks[event] += (callback,)
+            self.active = True
+        return callback
+
+    def unregister(self, event: str, callback: Callable[..., None]) -> None:
+        with self._lock:
+            self._callbacks[event] = tuple(item for item in self._callbacks[event] if item != callback)
+            self.active = any(self._callbacks.values())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._callbacks = {event: () for event in EVENTS}
+            self.active = False
+
+    def emit(self, event: str, **data: Any) -> None:
+        for callback in self._callbacks[event]:
+            callback(**data)
+
+
+class Metrics:
+    """
+    Request counters and latency histograms per method and endpoint, collected from Hooks events.
+    Exportable as dict snapshot or Prometheus text format
+    """
+    # upper bounds of latency histogram buckets in seconds, the last bucket is +Inf
+    buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, prefix: str = "hetzner_api"):
+        """
+        :param prefix: prefix of Prometheus metric names
+        """
+        self.prefix = prefix
+        # (method, endpoint) -> counters and histogram
+        self._endpoints: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def attach(self, hooks: Hooks) -> "Metrics":
+        hooks.register(REQUEST_END, self.on_request_end)
+        hooks.register(RETRY, self.on_retry)
+        hooks.register(THROTTLE, self.on_throttle)
+        return self
+
+    def detach(self, hooks: Hooks) -> None:
+        hooks.unregister(REQUEST_END, self.on_request_end)
+        hooks.unregister(RETRY, self.on_retry)
+        hooks.unregister(THROTTLE, self.on_throttle)
+
+    def _entry(self, method: str, url: str) -> Dict[str, Any]:
+        key = (method.upper(), get_endpoint(url))
+        entry = self._endpoints.get(key)
+        if entry is None:
+            entry = self._endpoints[key] = {
+                "requests": {},
+                "retries": 0,
+                "throttles": 0,
+                "bytes": 0,
+                "latency_sum": 0.0,
+                "latency_buckets": [0] * (len(self.buckets) + 1),
+            }
+        return entry
+
+    def on_request_end(
+            self,
+            method: str,
+            url: str,
+            status: Optional[int],
+            latency: float,
+            bytes: int,
+            error: Optional[Exception] = None,
+            **data: Any
+    ) -> None:
+        # status of requests failed without response is "error"
+        status_label = f"{status}" if status is not None else "error"
+        with self._lock:
+            entry = self._entry(method, url)
+            entry["requests"][status_label] = entry["requests"].get(status_label, 0) + 1
+            entry["bytes"] += bytes
+            entry["latency_sum"] += latency
+            entry["latency_buckets"][bisect.bisect_left(self.buckets, latency)] += 1
+
+    def on_retry(self, method: str, url: str, **data: Any) -> None:
+        with self._lock:
+            self._entry(method, url)["retries"] += 1
+
+    def on_throttle(self, method: str, url: str, **data: Any) -> None:
+        with self._lock:
+            self._entry(method, url)["throttles"] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        :return: "GET /v1/servers" -> requests by status, retries, throttles, bytes, latency sum and
+         cumulative counts of latency buckets by upper bound
+        """
+        result = {}
+        with self._lock:
+            for (method, endpoint), entry in sorted(self._endpoints.items()):
+                cumulative, buckets = 0, {}
+                for bound, count in zip(self.buckets + (float("inf"),), entry["latency_buckets"]):
+                    cumulative += count
+                    buckets[bound] = cumulative
+                result[f"{method} {endpoint}"] = {
+                    "requests": dict(entry["requests"]),
+                    "retries": entry["retries"],
+                    "throttles": entry["throttles"],
+                    "bytes": entry["bytes"],
+                    "latency_sum": entry["latency_sum"],
+                    "latency_count": cumulative,
+                    "latency_buckets": buckets,
+                }
+        return result
+
+    def to_prometheus(self) -> str:
+        """
+        :return: metrics in Prometheus text exposition format
+        """
+        prefix = self.prefix
+        lines: List[str] = [
+            f"# HELP {prefix}_requests_total Requests to API by method, endpoint and status code",
+            f"# TYPE {prefix}_requests_total counter",
+        ]
+        snapshot = self.snapshot()
+        labels = {key: 'method="{}",endpoint="{}"'.format(*key.split(" ", 1)) for key in snapshot}
+        for key, entry in snapshot.items():
+            for status, count in sorted(entry["requests"].items()):
+                lines.append(f'{prefix}_requests_total{{{labels[key]},status="{status}"}} {count}')
+        for name, help_ in (
+                ("retries", "Repeated attempts after transient errors"),
+                ("throttles", "Requests repeated after 429 Too Many Requests"),
+                ("bytes", "Size of response bodies"),
+        ):
+            lines.append(f"# HELP {prefix}_{name}_total {help_}")
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            for key, entry in snapshot.items():
+                lines.append(f"{prefix}_{name}_total{{{labels[key]}}} {entry[name]}")
+
+        lines.append(f"# HELP {prefix}_request_duration_seconds Latency of requests, retries included")
+        lines.append(f"# TYPE {prefix}_request_duration_seconds histogram")
+        for key, entry in snapshot.items():
+            for bound, count in entry["latency_buckets"].items():
+                le = "+Inf" if bound == float("inf") else f"{bound}"
+                lines.append(f'{prefix}_request_duration_seconds_bucket{{{labels[key]},le="{le}"}} {count}')
+            lines.append(f"{prefix}_request_duration_seconds_sum{{{labels[key]}}} {entry['latency_sum']}")
+            lines.append(f"{prefix}_request_duration_seconds_count{{{labels[key]}}} {entry['latency_count']}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,558 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .. import __app_name__
+from .models import Server, ServerType
+from .price_index import PriceIndex
+
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS servers (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    status TEXT,
+    server_type TEXT,
+    cores INTEGER,
+    memory REAL,
+    disk INTEGER,
+    cpu_type TEXT,
+    datacenter TEXT,
+    location TEXT,
+    price_monthly_gross REAL,
+    labels TEXT,
+    created TEXT,
+    backup_window TEXT,
+    ingoing_traffic INTEGER,
+    outgoing_traffic INTEGER,
+    included_traffic INTEGER,
+    data TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    first_seen REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    deleted_at REAL
+);
+CREATE INDEX IF NOT EXISTS servers_name ON servers (name);
+CREATE INDEX IF NOT EXISTS servers_status ON servers (status);
+CREATE INDEX IF NOT EXISTS servers_type ON servers (server_type);
+CREATE INDEX IF NOT EXISTS servers_location ON servers (location);
+CREATE INDEX IF NOT EXISTS servers_deleted ON servers (deleted_at);
+
+CREATE TABLE IF NOT EXISTS server_labels (
+    server_id INTEGER NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (server_id, key)
+);
+CREATE INDEX IF NOT EXISTS server_labels_key ON server_labels (key, value);
+
+CREATE TABLE IF NOT EXISTS server_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    server_id INTEGER NOT NULL,
+    at REAL NOT NULL,
+    kind TEXT NOT NULL,
+    old TEXT,
+    new TEXT
+);
+CREATE INDEX IF NOT EXISTS server_events_server ON server_events (server_id, at);
+
+CREATE TABLE IF NOT EXISTS server_types (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    description TEXT,
+    cores INTEGER,
+    memory REAL,
+    disk INTEGER,
+    cpu_type TEXT,
+    storage_type TEXT,
+    deprecated INTEGER
+);
+CREATE INDEX IF NOT EXISTS server_types_name ON server_types (name);
+
+CREATE TABLE IF NOT EXISTS datacenters (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    description TEXT,
+    location TEXT,
+    country TEXT,
+    city TEXT,
+    network_zone TEXT
+);
+
+-- type and location are '' for resources priced the same everywhere
+CREATE TABLE IF NOT EXISTS prices (
+    resource TEXT NOT NULL,
+    type TEXT NOT NULL,
+    location TEXT NOT NULL,
+    hourly_net REAL,
+    hourly_gross REAL,
+    monthly_net REAL,
+    monthly_gross REAL,
+    PRIMARY KEY (resource, type, location)
+);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# columns of servers, available in query(), label values are available as 'label:KEY'
+COLUMNS = (
+    "id", "name", "status", "server_type", "cores", "memory", "disk", "cpu_type", "datacenter", "location",
+    "price_monthly_gross", "created", "backup_window", "ingoing_traffic", "outgoing_traffic", "included_traffic",
+    "first_seen", "updated_at", "deleted_at",
+)
+NUMERIC_COLUMNS = frozenset((
+    "id", "cores", "memory", "disk", "price_monthly_gross", "ingoing_traffic", "outgoing_traffic",
+    "included_traffic", "first_seen", "updated_at", "deleted_at",
+))
+# counters, which change on every listing of running server, they are stored but don't make server changed
+VOLATILE_FIELDS = ("ingoing_traffic", "outgoing_traffic")
+AGGREGATES = ("count", "sum", "avg", "min", "max")
+DEFAULT_COLUMNS = ("id", "name", "status", "server_type", "location", "price_monthly_gross")
+
+# "cores>=4", "label:env=prod", "name~web"
+_CONDITION = re.compile(r"^\s*((?:label:)?[\w./-]+)\s*(>=|<=|!=|==|=|>|<|~)\s*(.*?)\s*$")
+# "env=prod", "env!=dev", "env", "!env", "role in (web,db)", "role notin (db)"
+_SELECTOR = re.compile(
+    r"^\s*(?:(!)?([\w./-]+)|([\w./-]+)\s*(==|=|!=)\s*([\w./-]*)|([\w./-]+)\s+(in|notin)\s+\(([^)]*)\))\s*$"
+)
+# key of Hetzner label: optional DNS prefix with '/' and name up to 63 characters
+_LABEL_KEY = re.compile(
+    r"^(?:[a-z0-9](?:[-a-z0-9]*[a-z0-9])?(?:\.[a-z0-9](?:[-a-z0-9]*[a-z0-9])?)*/)?"
+    r"[A-Za-z0-9](?:[-_.A-Za-z0-9]{0,61}[A-Za-z0-9])?$"
+)
+_SERVER_SORT = {"id", "name", "status", "created", "server_type", "location", "price_monthly_gross"}
+
+
+class SyncResult:
+    """
+    Number of server rows changed by Inventory.sync()
+    """
+    __slots__ = ("added", "updated", "deleted", "unchanged")
+
+    def __init__(self):
+        self.added = 0
+        self.updated = 0
+        self.deleted = 0
+        self.unchanged = 0
+
+    def __repr__(self) -> str:
+        return (
+            f"SyncResult(added={self.added}, updated={self.updated}, "
+            f"deleted={self.deleted}, unchanged={self.unchanged})"
+        )
+
+
+class Inventory:
+    """
+    Local SQLite copy of servers, server types, datacenters and prices of one project.
+    Sync writes only changed servers, servers missing in API response are kept with 'deleted_at' (tombstone),
+    appearance, status changes and deletion are recorded in server_events.
+    Queries read indexed tables without any requests
+    """
+
+    def __init__(self, path: Optional[str] = None, token: Optional[str] = None):
+        """
+        :param path: database file, by default $HTZ_INVENTORY or file for token in $XDG_DATA_HOME/hetzner-control
+        :param token: API token, chooses default file, so projects don't share inventory
+        """
+        self.path = Path(path) if path else self.default_path(token)
+        self._connection: Optional[sqlite3.Connection] = None
+
+    @staticmethod
+    def default_path(token: Optional[str] = None) -> Path:
+        if os.getenv("HTZ_INVENTORY"):
+            return Path(os.environ["HTZ_INVENTORY"])
+        base = os.getenv("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+        suffix = hashlib.sha256((token or os.getenv("HETZNER_API_TOKEN", "")).encode()).hexdigest()[:12]
+        return Path(base) / __app_name__ / f"inventory-{suffix}.sqlite"
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """
+        Open database and create tables on first use
+        """
+        if self._connection is None:
+            self.path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+            connection = sqlite3.connect(str(self.path))
+            connection.execute("PRAGMA journal_mode=WAL")
+            if connection.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                connection.executescript(_SCHEMA)
+                connection.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+            self._connection = connection
+        return self._connection
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def __enter__(self) -> "Inventory":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def last_sync(self) -> Optional[float]:
+        """
+        :return: UNIX time of last successful sync, None if inventory has never been synced
+        """
+        row = self.connection.execute("SELECT value FROM sync_state WHERE key = 'last_sync'").fetchone()
+        return float(row[0]) if row else None
+
+    def sync(
+            self,
+            servers: Iterable[Dict[str, Any]],
+            server_types: Optional[List[Dict[str, Any]]] = None,
+            datacenters: Optional[List[Dict[str, Any]]] = None,
+            pricing: Optional[Dict[str, Any]] = None,
+            now: Optional[float] = None,
+    ) -> SyncResult:
+        """
+        Update inventory in one transaction, failed listing leaves inventory untouched
+
+        :param servers: server json objects of full listing
+        :param server_types: server type json objects, None to keep stored ones
+        :param datacenters: datacenter json objects, None to keep stored ones
+        :param pricing: 'pricing' part of /pricing json response, None to keep stored prices
+        :param now: UNIX time of sync, current time by default
+        :return: SyncResult object
+        """
+        now = time.time() if now is None else now
+        result = SyncResult()
+        connection = self.connection
+        with connection:
+            existing = {
+                row[0]: row[1:] for row in connection.execute(
+                    "SELECT id, fingerprint, status, deleted_at, ingoing_traffic, outgoing_traffic FROM servers"
+                )
+            }
+            shared_types: Dict[int, ServerType] = {}
+            seen = set()
+            counters = []
+            for data in servers:
+                seen.add(data["id"])
+                body = json.dumps(data, sort_keys=True, separators=(",", ":"))
+                fingerprint = self._fingerprint(data)
+                old = existing.get(data["id"])
+                if old is not None and old[0] == fingerprint and old[2] is None:
+                    result.unchanged += 1
+                    traffic = tuple(data.get(field) or 0 for field in VOLATILE_FIELDS)
+                    if traffic != old[3:]:
+                        counters.append((*traffic, data["id"]))
+                    continue
+                server = Server(data, shared_types)
+                self._upsert_server(server, body, fingerprint, now)
+
+                if old is None:
+                    result.added += 1
+                    self._event(server.id, now, "created", None, server.created)
+                elif old[2] is not None:
+                    result.added += 1
+                    self._event(server.id, now, "restored", None, server.status)
+                else:
+                    result.updated += 1
+                if old is not None and old[1] != server.status:
+                    self._event(server.id, now, "status", old[1], server.status)
+
+            # only counter columns of unchanged servers are updated, stored json keeps counters of the last change
+            connection.executemany(
+                "UPDATE servers SET ingoing_traffic = ?, outgoing_traffic = ? WHERE id = ?", counters,
+            )
+            gone = [id_ for id_, (_, status, deleted_at, *_) in existing.items() if deleted_at is None and id_ not in seen]
+            connection.executemany("UPDATE servers SET deleted_at = ? WHERE id = ?", [(now, id_) for id_ in gone])
+            for id_ in gone:
+                self._event(id_, now, "deleted", existing[id_][1], None)
+            result.deleted = len(gone)
+
+            if server_types is not None:
+                self._replace_server_types(server_types)
+            if datacenters is not None:
+                self._replace_datacenters(datacenters)
+            if pricing is not None:
+                self._replace_prices(PriceIndex(pricing))
+            connection.execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES ('last_sync', ?)", (f"{now}",))
+        return result
+
+    @staticmethod
+    def _fingerprint(data: Dict[str, Any]) -> str:
+        """
+        :param data: server json object
+        :return: hash of server json without VOLATILE_FIELDS
+        """
+        stable = {key: value for key, value in data.items() if key not in VOLATILE_FIELDS}
+        return hashlib.sha1(json.dumps(stable, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+    def _upsert_server(self, server: Server, body: str, fingerprint: str, now: float) -> None:
+        price = server.price
+        type_ = server.server_type
+        self.connection.execute(
+            """
+            INSERT INTO servers (
+                id, name, status, server_type, cores, memory, disk, cpu_type, datacenter, location,
+                price_monthly_gross, labels, created, backup_window, ingoing_traffic, outgoing_traffic,
+                included_traffic, data, fingerprint, first_seen, updated_at, deleted_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, NULL)
+            ON CONFLICT (id) DO UPDATE SET
+                name = excluded.name, status = excluded.status, server_type = excluded.server_type,
+                cores = excluded.cores, memory = excluded.memory, disk = excluded.disk,
+                cpu_type = excluded.cpu_type, datacenter = excluded.datacenter, location = excluded.location,
+                price_monthly_gross = excluded.price_monthly_gross, labels = excluded.labels,
+                created = excluded.created, backup_window = excluded.backup_window,
+                ingoing_traffic = excluded.ingoing_traffic, outgoing_traffic = excluded.outgoing_traffic,
+                included_traffic = excluded.included_traffic, data = excluded.data,
+                fingerprint = excluded.fingerprint, updated_at = excluded.updated_at, deleted_at = NULL
+            """,
+            (
+                server.id, server.name, server.status, type_.name, type_.cores, type_.memory, type_.disk,
+                type_.cpu_type, server.datacenter, server.location, (price.monthly_gross if price else None),
+                json.dumps(server.labels, sort_keys=True), server.created, server.backup_window,
+                server.ingoing_traffic, server.outgoing_traffic, server.included_traffic,
+                body, fingerprint, now, now,
+            ),
+        )
+        self.connection.execute("DELETE FROM server_labels WHERE server_id = ?", (server.id,))
+        self.connection.executemany(
+            "INSERT INTO server_labels (server_id, key, value) VALUES (?, ?, ?)",
+            [(server.id, key, value) for key, value in server.labels.items()],
+        )
+
+    def _event(self, server_id: int, at: float, kind: str, old: Optional[str], new: Optional[str]) -> None:
+        self.connection.execute(
+            "INSERT INTO server_events (server_id, at, kind, old, new) VALUES (?, ?, ?, ?, ?)",
+            (server_id, at, kind, old, new),
+        )
+
+    def _replace_server_types(self, server_types: List[Dict[str, Any]]) -> None:
+        self.connection.execute("DELETE FROM server_types")
+        self.connection.executemany(
+            "INSERT INTO server_types VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (type_.id, type_.name, type_.description, type_.cores, type_.memory, type_.disk,
+                 type_.cpu_type, type_.storage_type, type_.deprecated)
+                for type_ in map(ServerType, server_types)
+            ],
+        )
+
+    def _replace_datacenters(self, datacenters: List[Dict[str, Any]]) -> None:
+        self.connection.execute("DELETE FROM datacenters")
+        self.connection.executemany(
+            "INSERT INTO datacenters VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (data["id"], data["name"], data.get("description"), (data.get("location") or {}).get("name"),
+                 (data.get("location") or {}).get("country"), (data.get("location") or {}).get("city"),
+                 (data.get("location") or {}).get("network_zone"))
+                for data in datacenters
+            ],
+        )
+
+    def _replace_prices(self, index: PriceIndex) -> None:
+        rows = []
+        for resource, type_, location in index.keys():
+            price = index.get(resource, type_, location)
+            rows.append((resource, type_ or "", location or "", price.hourly_net, price.hourly_gross,
+                         price.monthly_net, price.monthly_gross))
+        self.connection.execute("DELETE FROM prices")
+        self.connection.executemany("INSERT INTO prices VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def list_servers(
+            self,
+            label_selector: Optional[str] = None,
+            name: Optional[str] = None,
+            status: Optional[Iterable[str]] = None,
+            sort: Optional[Iterable[str]] = None,
+            deleted: bool = False,
+    ) -> List[Server]:
+        """
+        Same filters as ServerHandler.iter_server_pages(), but servers are read from inventory
+
+        :param label_selector: return only servers with matching labels, i.e. "role=web,env!=prod"
+        :param name: return only server with this name
+        :param status: return only servers with one of these statuses, i.e. ["running", "off"]
+        :param sort: sort order, i.e. ["name", "created:desc"], by ID by default
+        :param deleted: include servers deleted since they were synced
+        :return: list of Server objects
+        :raise ValueError: malformed selector or unknown sort key
+        """
+        where, params = self._filters(label_selector, deleted)
+        if name:
+            where.append("s.name = ?")
+            params.append(name)
+        statuses = list(status or [])
+        if statuses:
+            where.append(f"s.status IN ({', '.join('?' * len(statuses))})")
+            params.extend(statuses)
+
+        order = []
+        for item in list(sort or []) or ["id"]:
+            column, _, direction = item.partition(":")
+            if column not in _SERVER_SORT or direction not in ("", "asc", "desc"):
+                raise ValueError(f"Unknown sort key: {item}, expected one of {', '.join(sorted(_SERVER_SORT))}")
+            order.append(f"s.{column} {direction.upper() or 'ASC'}")
+
+        sql = "SELECT s.data FROM servers s"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY " + ", ".join(order)
+        shared_types: Dict[int, ServerType] = {}
+        return [Server(json.loads(row[0]), shared_types) for row in self.connection.execute(sql, params)]
+
+    def events(self, server_id: Optional[int] = None, limit: Optional[int] = None) -> List[Tuple[Any, ...]]:
+        """
+        :param server_id: return events of this server only
+        :param limit: return only this number of the latest events
+        :return: (server_id, name, at, kind, old, new), the latest first
+        """
+        sql = (
+            "SELECT e.server_id, s.name, e.at, e.kind, e.old, e.new "
+            "FROM server_events e LEFT JOIN servers s ON s.id = e.server_id"
+        )
+        params: List[Any] = []
+        if server_id is not None:
+            sql += " WHERE e.server_id = ?"
+            params.append(server_id)
+        sql += " ORDER BY e.at DESC, e.id DESC"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return self.connection.execute(sql, params).fetchall()
+
+    def query(
+            self,
+            columns: Sequence[str] = (),
+            where: Sequence[str] = (),
+            label_selector: Optional[str] = None,
+            group_by: Sequence[str] = (),
+            aggregates: Sequence[str] = (),
+            sort: Sequence[str] = (),
+            limit: Optional[int] = None,
+            deleted: bool = False,
+    ) -> Tuple[List[str], List[Tuple[Any, ...]]]:
+        """
+        Ad-hoc filtering and aggregation of servers.
+        Column names are checked against COLUMNS and label keys against format of Hetzner labels,
+        output columns get positional aliases, values are passed as parameters
+
+        :param columns: output columns (COLUMNS or 'label:KEY'), DEFAULT_COLUMNS if nothing is grouped or aggregated
+        :param where: conditions "COLUMN OP VALUE", OP is one of =, !=, >, >=, <, <=, ~ (substring)
+        :param label_selector: label selector, i.e. "role=web,env!=prod"
+        :param group_by: columns for grouping, they are added to output columns
+        :param aggregates: "count" or "FUNC:COLUMN", FUNC is one of sum, avg, min, max
+        :param sort: output columns with optional ":desc", i.e. ["count:desc"]
+        :param limit: maximum number of rows
+        :param deleted: include servers deleted since they were synced
+        :return: names of output columns and rows
+        :raise ValueError: unknown column or malformed condition
+        """
+        if not columns and not group_by and not aggregates:
+            columns = DEFAULT_COLUMNS
+        select, params = [], []
+        names = []
+        for name in list(group_by) + [name for name in columns if name not in group_by]:
+            sql, expression_params = self._expression(name)
+            select.append(f"{sql} AS c{len(names)}")
+            params.extend(expression_params)
+            names.append(name)
+        for aggregate in aggregates:
+            sql, expression_params = self._aggregate(aggregate)
+            select.append(f"{sql} AS c{len(names)}")
+            params.extend(expression_params)
+            names.append(aggregate)
+
+        filters, filter_params = self._filters(label_selector, deleted)
+        for condition in where:
+            sql, condition_params = self._condition(condition)
+            filters.append(sql)
+            filter_params.extend(condition_params)
+
+        sql = f"SELECT {', '.join(select)} FROM servers s"
+        if filters:
+            sql += " WHERE " + " AND ".join(filters)
+        if group_by:
+            sql += " GROUP BY " + ", ".join(f"c{names.index(name)}" for name in group_by)
+        order = []
+        for item in sort:
+            name, _, direction = item.rpartition(":") if item.endswith((":asc", ":desc")) else (item, "", "")
+            if name not in names:
+                raise ValueError(f"Unknown sort column: {name}, expected one of {', '.join(names)}")
+            order.append(f"c{names.index(name)} {direction.upper() or 'ASC'}")
+        if order:
+            sql += " ORDER BY " + ", ".join(order)
+        if limit:
+            sql += " LIMIT ?"
+            filter_params.append(limit)
+        return names, self.connection.execute(sql, params + filter_params).fetchall()
+
+    @staticmethod
+    def _expression(name: str) -> Tuple[str, List[Any]]:
+        if name.startswith("label:"):
+            key = name[len("label:"):]
+            if not _LABEL_KEY.match(key):
+                raise ValueError(f"Invalid label key: {key!r}")
+            return "(SELECT l.value FROM server_labels l WHERE l.server_id = s.id AND l.key = ?)", [key]
+        if name not in COLUMNS:
+            raise ValueError(f"Unknown column: {name}, expected one of {', '.join(COLUMNS)} or label:KEY")
+        return f"s.{name}", []
+
+    def _aggregate(self, aggregate: str) -> Tuple[str, List[Any]]:
+        func, _, column = aggregate.partition(":")
+        if func not in AGGREGATES:
+            raise ValueError(f"Unknown aggregate: {aggregate}, expected count or one of sum, avg, min, max:COLUMN")
+        if not column:
+            if func != "count":
+                raise ValueError(f"Aggregate {func} requires column, i.e. {func}:price_monthly_gross")
+            return "COUNT(*)", []
+        sql, params = self._expression(column)
+        return f"{func.upper()}({sql})", params
+
+    def _condition(self, condition: str) -> Tuple[str, List[Any]]:
+        match = _CONDITION.match(condition)
+        if match is None:
+            raise ValueError(f"Malformed condition: {condition!r}, expected COLUMN OP VALUE, i.e. 'cores>=4'")
+        name, op, value = match.groups()
+        sql, params = self._expression(name)
+        if op == "~":
+            escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            return f"{sql} LIKE ? ESCAPE '\\'", params + [f"%{escaped}%"]
+        if name in NUMERIC_COLUMNS:
+            try:
+                value = float(value)
+            except ValueError:
+                raise ValueError(f"Column {name} is numeric, got {value!r}")
+        return f"{sql} {'=' if op == '==' else op} ?", params + [value]
+
+    @staticmethod
+    def _filters(label_selector: Optional[str], deleted: bool) -> Tuple[List[str], List[Any]]:
+        where: List[str] = [] if deleted else ["s.deleted_at IS NULL"]
+        params: List[Any] = []
+        for term in re.split(r",(?![^(]*\))", label_selector or ""):
+            if not term.strip():
+                continue
+            match = _SELECTOR.match(term)
+            if match is None:
+                raise ValueError(f"Malformed label selector: {term!r}")
+            negate, key, eq_key, eq_op, eq_value, in_key, in_op, in_values = match.groups()
+            exists = "EXISTS (SELECT 1 FROM server_labels l WHERE l.server_id = s.id AND l.key = ?"
+            if key is not None:
+                where.append(f"{'NOT ' if negate else ''}{exists})")
+                params.append(key)
+            elif eq_key is not None:
+                where.append(f"{'NOT ' if eq_op == '!=' else ''}{exists} AND l.value = ?)")
+                params.extend((eq_key, eq_value))
+            else:
+                values = [value.strip() for value in in_values.split(",") if value.strip()]
+                if not values:
+                    raise ValueError(f"Malformed label selector: {term!r}, empty set of values")
+                where.append(
+                    f"{'NOT ' if in_op == 'notin' else ''}{exists} AND l.value IN ({', '.join('?' * len(values))}))"
+                )
+                params.extend([in_key] + values)
+        return where, params
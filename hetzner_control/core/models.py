@@ -0,0 +1,196 @@
+from typing import Any, Dict, List, Optional
+
+
+class Price:
+    """
+    Price of resource in one location, amounts are parsed to float once
+    """
+    __slots__ = ("location", "hourly_net", "hourly_gross", "monthly_net", "monthly_gross")
+
+    def __init__(
+            self,
+            location: Optional[str],
+            hourly_net: float,
+            hourly_gross: float,
+            monthly_net: float,
+            monthly_gross: float,
+    ):
+        self.location = location
+        self.hourly_net = hourly_net
+        self.hourly_gross = hourly_gross
+        self.monthly_net = monthly_net
+        self.monthly_gross = monthly_gross
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "Price":
+        """
+        :param data: price json object with 'price_hourly' and 'price_monthly'
+        :return: Price object
+        """
+        hourly = data.get("price_hourly") or {}
+        monthly = data.get("price_monthly") or {}
+        return cls(
+            location=data.get("location"),
+            hourly_net=float(hourly.get("net", 0)),
+            hourly_gross=float(hourly.get("gross", 0)),
+            monthly_net=float(monthly.get("net", 0)),
+            monthly_gross=float(monthly.get("gross", 0)),
+        )
+
+    def __repr__(self) -> str:
+        return f"Price(location={self.location!r}, monthly_gross={self.monthly_gross})"
+
+
+class ServerType:
+    """
+    Server type specification, prices are decoded on first access
+    """
+    __slots__ = (
+        "id", "name", "description", "cores", "memory", "disk",
+        "cpu_type", "storage_type", "deprecated", "_prices_json", "_prices",
+    )
+
+    def __init__(self, data: Dict[str, Any]):
+        """
+        :param data: server type json object
+        """
+        self.id: int = data["id"]
+        self.name: str = data["name"]
+        self.description: str = data.get("description", "")
+        self.cores: int = data.get("cores", 0)
+        self.memory: float = data.get("memory", 0.0)
+        self.disk: int = data.get("disk", 0)
+        self.cpu_type: str = data.get("cpu_type", "")
+        self.storage_type: str = data.get("storage_type", "")
+        self.deprecated: bool = bool(data.get("deprecated"))
+        self._prices_json: Optional[List[Dict[str, Any]]] = data.get("prices") or []
+        self._prices: Optional[List[Price]] = None
+
+    @property
+    def prices(self) -> List[Price]:
+        if self._prices is None:
+            self._prices = [Price.from_json(price) for price in self._prices_json]
+            self._prices_json = None
+        return self._prices
+
+    def price_for(self, location: Optional[str]) -> Optional[Price]:
+        """
+        :param location: location name, i.e. "nbg1"
+        :return: price in this location, None if server type has no price there
+        """
+        for price in self.prices:
+            if price.location == location:
+                return price
+        return None
+
+    def __repr__(self) -> str:
+        return f"ServerType(id={self.id}, name={self.name!r})"
+
+
+class Datacenter:
+    """
+    Datacenter with flattened location
+    """
+    __slots__ = ("id", "name", "description", "location_name", "country", "city", "network_zone")
+
+    def __init__(self, data: Dict[str, Any]):
+        """
+        :param data: datacenter json object
+        """
+        location = data.get("location") or {}
+        self.id: int = data["id"]
+        self.name: str = data["name"]
+        self.description: str = data.get("description", "")
+        self.location_name: str = location.get("name", "")
+        self.country: str = location.get("country", "")
+        self.city: str = location.get("city", "")
+        self.network_zone: str = location.get("network_zone", "")
+
+    def __repr__(self) -> str:
+        return f"Datacenter(id={self.id}, name={self.name!r})"
+
+
+class Server:
+    """
+    Server with often used fields as attributes.
+    Rarely used nested objects (network, image, ISO, volumes, etc.) are kept as json
+    and available with get_extra()
+    """
+    __slots__ = (
+        "id", "name", "status", "created", "labels", "server_type", "datacenter",
+        "location", "ingoing_traffic", "outgoing_traffic", "included_traffic",
+        "backup_window", "_extra",
+    )
+    # nested objects, which are kept without decoding
+    extra_fields = ("public_net", "image", "iso", "volumes", "load_balancers", "protection", "private_net")
+
+    def __init__(self, data: Dict[str, Any], server_types: Optional[Dict[int, ServerType]] = None):
+        """
+        :param data: server json object
+        :param server_types: already parsed server types by ID, servers of the same type share one object
+        """
+        self.id: int = data["id"]
+        self.name: str = data["name"]
+        self.status: str = data.get("status", "")
+        self.created: str = data.get("created", "")
+        self.labels: Dict[str, str] = data.get("labels") or {}
+        self.server_type: ServerType = self._get_server_type(data["server_type"], server_types)
+
+        datacenter = data.get("datacenter") or {}
+        self.datacenter: str = datacenter.get("name", "")
+        self.location: str = (datacenter.get("location") or {}).get("name", "")
+
+        self.ingoing_traffic: int = data.get("ingoing_traffic") or 0
+        self.outgoing_traffic: int = data.get("outgoing_traffic") or 0
+        self.included_traffic: int = data.get("included_traffic") or 0
+        self.backup_window: Optional[str] = data.get("backup_window")
+        self._extra: Dict[str, Any] = {key: data[key] for key in self.extra_fields if data.get(key) is not None}
+
+    @staticmethod
+    def _get_server_type(data: Dict[str, Any], server_types: Optional[Dict[int, ServerType]]) -> ServerType:
+        if server_types is None:
+            return ServerType(data)
+        server_type = server_types.get(data["id"])
+        if server_type is None:
+            server_type = server_types[data["id"]] = ServerType(data)
+        return server_type
+
+    def get_extra(self, key: str) -> Any:
+        """
+        :param key: one of Server.extra_fields, i.e. "public_net"
+        :return: nested json object or None
+        """
+        return self._extra.get(key)
+
+    @property
+    def price(self) -> Optional[Price]:
+        """
+        :return: price of server type in server location
+        """
+        return self.server_type.price_for(self.location)
+
+    def __repr__(self) -> str:
+        return f"Server(id={self.id}, name={self.name!r}, status={self.status!r})"
+
+
+class Action:
+    """
+    Asynchronous action (power on, server creating, etc.)
+    """
+    __slots__ = ("id", "command", "status", "progress", "started", "finished", "error_message", "resources")
+
+    def __init__(self, data: Dict[str, Any]):
+        """
+        :param data: action json object
+        """
+        self.id: int = data["id"]
+        self.command: str = data.get("command", "")
+        self.status: str = data.get("status", "")
+        self.progress: int = data.get("progress") or 0
+        self.started: Optional[str] = data.get("started")
+        self.finished: Optional[str] = data.get("finished")
+        self.error_message: Optional[str] = (data.get("error") or {}).get("message")
+        self.resources: List[Dict[str, Any]] = data.get("resources") or []
+
+    def __repr__(self) -> str:
+        return f"Action(id={self.id}, command={self.command!r}, status={self.status!r})"
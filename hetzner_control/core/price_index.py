@@ -0,0 +1,183 @@
+import re
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .models import Price
+
+# monthly prices are capped at this number of hours, it's used to derive hourly price of resources billed monthly
+HOURS_PER_MONTH = 730
+
+SERVER = "server"
+SERVER_BACKUP = "server_backup"
+LOAD_BALANCER = "load_balancer"
+FLOATING_IP = "floating_ip"
+PRIMARY_IP = "primary_ip"
+IMAGE = "image"
+VOLUME = "volume"
+TRAFFIC = "traffic"
+
+# (resource, type, location), type and location are None for resources priced the same everywhere
+PriceKey = Tuple[str, Optional[str], Optional[str]]
+
+# "[COUNT x]TYPE[@LOCATION]", i.e. "3x cx21@fsn1", "cx21", "2*lb11@nbg1"
+_SPEC = re.compile(r"^\s*(?:(\d+)\s*[x*]\s*)?([\w-]+)(?:@([\w-]+))?\s*$", re.IGNORECASE)
+
+
+def _monthly(location: Optional[str], monthly: Dict[str, str]) -> Price:
+    net, gross = float(monthly["net"]), float(monthly["gross"])
+    return Price(location, net / HOURS_PER_MONTH, gross / HOURS_PER_MONTH, net, gross)
+
+
+class Estimate:
+    """
+    Total cost of resources, quantities of the same resource are merged
+    """
+    __slots__ = ("hourly_net", "hourly_gross", "monthly_net", "monthly_gross", "lines")
+
+    def __init__(self):
+        self.hourly_net = 0.0
+        self.hourly_gross = 0.0
+        self.monthly_net = 0.0
+        self.monthly_gross = 0.0
+        # (resource, type, location) -> (quantity, unit price)
+        self.lines: Dict[PriceKey, Tuple[float, Price]] = {}
+
+    @property
+    def monthly_vat(self) -> float:
+        return self.monthly_gross - self.monthly_net
+
+    @property
+    def hourly_vat(self) -> float:
+        return self.hourly_gross - self.hourly_net
+
+    def __repr__(self) -> str:
+        return f"Estimate(monthly_gross={self.monthly_gross:.4f}, lines={len(self.lines)})"
+
+
+class PriceIndex:
+    """
+    Prices of all resources from /pricing response, built once and keyed by (resource, type, location).
+    Amounts are parsed to float on build, so every lookup is a single dict access.
+    Server backup price is precomputed for every server type and location from backup percentage,
+    volume, image and traffic prices are per GB-month, GB-month and TB
+    """
+
+    def __init__(self, pricing: Dict[str, Any]):
+        """
+        :param pricing: 'pricing' part of /pricing json response
+        """
+        self.currency: str = pricing.get("currency", "")
+        self.vat_rate: float = float(pricing.get("vat_rate") or 0)
+        self.backup_percentage: float = float((pricing.get("server_backup") or {}).get("percentage") or 0)
+        self._prices: Dict[PriceKey, Price] = {}
+        # type name -> resource, so spec like "cx21" or "lb11" is resolved without knowing resource
+        self._types: Dict[str, str] = {}
+
+        for type_ in pricing.get("server_types") or []:
+            for price in type_.get("prices") or []:
+                server_price = Price.from_json(price)
+                self._prices[(SERVER, type_["name"], price["location"])] = server_price
+                self._prices[(SERVER_BACKUP, type_["name"], price["location"])] = self._percent(server_price)
+            self._types[type_["name"]] = SERVER
+        for type_ in pricing.get("load_balancer_types") or []:
+            for price in type_.get("prices") or []:
+                self._prices[(LOAD_BALANCER, type_["name"], price["location"])] = Price.from_json(price)
+            self._types.setdefault(type_["name"], LOAD_BALANCER)
+        for type_ in pricing.get("floating_ips") or []:
+            for price in type_.get("prices") or []:
+                self._prices[(FLOATING_IP, type_["type"], price["location"])] = \
+                    _monthly(price["location"], price["price_monthly"])
+        for type_ in pricing.get("primary_ips") or []:
+            for price in type_.get("prices") or []:
+                self._prices[(PRIMARY_IP, type_["type"], price["location"])] = Price.from_json(price)
+        if pricing.get("floating_ip"):
+            self._prices[(FLOATING_IP, None, None)] = _monthly(None, pricing["floating_ip"]["price_monthly"])
+        if pricing.get("image"):
+            self._prices[(IMAGE, None, None)] = _monthly(None, pricing["image"]["price_per_gb_month"])
+        if pricing.get("volume"):
+            self._prices[(VOLUME, None, None)] = _monthly(None, pricing["volume"]["price_per_gb_month"])
+        if pricing.get("traffic"):
+            # traffic is billed once per TB, it doesn't depend on hours
+            price = pricing["traffic"]["price_per_tb"]
+            self._prices[(TRAFFIC, None, None)] = Price(None, 0.0, 0.0, float(price["net"]), float(price["gross"]))
+
+    def _percent(self, price: Price) -> Price:
+        share = self.backup_percentage / 100
+        return Price(
+            price.location,
+            price.hourly_net * share,
+            price.hourly_gross * share,
+            price.monthly_net * share,
+            price.monthly_gross * share,
+        )
+
+    def find(self, resource: str, type_: Optional[str] = None, location: Optional[str] = None) -> Optional[Price]:
+        """
+        :param resource: one of SERVER, SERVER_BACKUP, LOAD_BALANCER, FLOATING_IP, PRIMARY_IP, IMAGE, VOLUME, TRAFFIC
+        :param type_: type name, i.e. "cx21", None for resources without types
+        :param location: location name, i.e. "fsn1", None for resources priced the same everywhere
+        :return: unit price or None if it's unknown
+        """
+        price = self._prices.get((resource, type_, location))
+        if price is None and location is not None:
+            price = self._prices.get((resource, type_, None))
+        return price
+
+    def get(self, resource: str, type_: Optional[str] = None, location: Optional[str] = None) -> Price:
+        """
+        Same as find(), but unknown price raises KeyError
+        """
+        price = self.find(resource, type_, location)
+        if price is None:
+            what = " ".join(filter(None, (resource, type_)))
+            raise KeyError(f"no price for {what}" + (f" in {location}" if location else ""))
+        return price
+
+    def parse_spec(self, spec: str, location: Optional[str] = None) -> Tuple[str, str, Optional[str], int]:
+        """
+        Parse one line of estimate spec
+
+        :param spec: "[COUNT x]TYPE[@LOCATION]", i.e. "3x cx21@fsn1", TYPE is server or load balancer type
+        :param location: location of spec without '@LOCATION'
+        :return: (resource, type, location, count)
+        :raise ValueError: spec is malformed or type is unknown
+        """
+        match = _SPEC.match(spec)
+        if match is None:
+            raise ValueError(f"expected [COUNT x]TYPE[@LOCATION], got {spec!r}")
+        count, type_, spec_location = match.groups()
+        type_ = type_.lower()
+        resource = self._types.get(type_)
+        if resource is None:
+            raise ValueError(f"unknown server or load balancer type {type_!r}")
+        return resource, type_, (spec_location.lower() if spec_location else location), int(count or 1)
+
+    def keys(self, resource: Optional[str] = None) -> List[PriceKey]:
+        """
+        :param resource: return keys of this resource only
+        :return: known (resource, type, location) keys
+        """
+        return [key for key in self._prices if resource is None or key[0] == resource]
+
+    def estimate(self, lines: Iterable[Tuple[str, Optional[str], Optional[str], float]]) -> Estimate:
+        """
+        Compute total cost of resources.
+        Lines are merged by key first, so every distinct price is looked up and multiplied once
+
+        :param lines: (resource, type, location, quantity), quantity is number of servers, GB of volumes, TB of traffic
+        :return: Estimate object
+        :raise KeyError: price of some resource is unknown
+        """
+        quantities: Dict[PriceKey, float] = defaultdict(float)
+        for resource, type_, location, quantity in lines:
+            quantities[(resource, type_, location)] += quantity
+
+        estimate = Estimate()
+        for key, quantity in quantities.items():
+            price = self.get(*key)
+            estimate.lines[key] = (quantity, price)
+            estimate.hourly_net += price.hourly_net * quantity
+            estimate.hourly_gross += price.hourly_gross * quantity
+            estimate.monthly_net += price.monthly_net * quantity
+            estimate.monthly_gross += price.monthly_gross * quantity
+        return estimate
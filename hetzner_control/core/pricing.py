@@ -1,8 +1,7 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
-import requests
-
-from . import HetznerHandler, ExMessageHandler
+from . import HetznerHandler
+from .price_index import PriceIndex
 
 
 class PricingHandler(HetznerHandler):
@@ -10,10 +9,13 @@ class PricingHandler(HetznerHandler):
     Hetzner Handler class that provides reference information
      about prices for all resources available on the platform
     """
+    # seconds to keep response in on-disk cache
+    cache_ttl = 6 * 60 * 60
 
     def __init__(self):
         self.api_link = f"{self.get_prefix()}/pricing"
         self.headers = self.get_headers()
+        self._index: Optional[PriceIndex] = None
 
     def get_all_prices(self) -> Dict[str, Any]:
         """
@@ -22,14 +24,16 @@ class PricingHandler(HetznerHandler):
 
         :return: json response as Dict[str, Any]
         """
-        resp = requests.get(
-            url=self.api_link,
-            headers=self.headers
-        )
-
-        if resp.status_code != 200:
-            raise ExMessageHandler(
-                self.create_exception_message(resp.json()),
-                terminate_after=True
-            )
-        return resp.json()
+        return self._cached_get(self.api_link, ttl=self.cache_ttl)
+
+    def get_price_index(self) -> PriceIndex:
+        """
+        Build index of all prices on first call, later calls return the same object
+
+        :return: PriceIndex object
+        """
+        if self._index is None:
+            data = self.get_all_prices()["pricing"]
+            with self.measure("parse"):
+                self._index = PriceIndex(data)
+        return self._index
@@ -0,0 +1,114 @@
+import threading
+import time
+from typing import Mapping, Optional
+
+# priorities of requests, interactive ones may use whole budget
+INTERACTIVE = 0
+BULK = 1
+
+
+class RateLimiter:
+    """
+    Token bucket, which paces requests to API and follows real budget from
+    'RateLimit-Limit', 'RateLimit-Remaining' and 'RateLimit-Reset' response headers.
+    Bulk requests can't use the last 'reserve' part of budget, so interactive reads stay responsive.
+    Thread safe, so it may be shared by parallel requests
+    """
+
+    def __init__(self, limit: int = 3600, period: float = 3600.0, reserve: float = 0.1):
+        """
+        :param limit: initial size of bucket, updated from 'RateLimit-Limit' header
+        :param period: seconds to refill the whole bucket
+        :param reserve: part of bucket available only for interactive requests
+        """
+        self.capacity = float(limit)
+        self.tokens = float(limit)
+        self.rate = limit / period
+        self.reserve = reserve
+        self.blocked_until = 0.0
+        self._updated = time.monotonic()
+        self._condition = threading.Condition()
+
+    def acquire(self, priority: int = INTERACTIVE) -> float:
+        """
+        Take one token from bucket, waiting if budget is exhausted or API asked to slow down
+
+        :param priority: INTERACTIVE or BULK
+        :return: seconds spent waiting
+        """
+        started = time.monotonic()
+        with self._condition:
+            while True:
+                wait = self._take(priority)
+                if not wait:
+                    return time.monotonic() - started
+                self._condition.wait(timeout=wait)
+
+    def try_acquire(self, priority: int = INTERACTIVE) -> float:
+        """
+        Take one token from bucket if it is available now, without blocking.
+        Asyncio code sleeps for returned time and tries again, so event loop isn't blocked
+
+        :param priority: INTERACTIVE or BULK
+        :return: 0.0 if token is taken, otherwise seconds until the next token may be available
+        """
+        with self._condition:
+            return self._take(priority)
+
+    def _take(self, priority: int) -> float:
+        floor = 0.0 if priority == INTERACTIVE else self.capacity * self.reserve
+        now = time.monotonic()
+        self._refill(now)
+        if now >= self.blocked_until and self.tokens - 1 >= floor:
+            self.tokens -= 1
+            return 0.0
+        return max(self.blocked_until - now, (floor + 1 - self.tokens) / self.rate)
+
+    def update(self, headers: Mapping[str, str]) -> None:
+        """
+        Synchronize bucket with budget reported by API
+
+        :param headers: response headers
+        """
+        limit = self._header(headers, "RateLimit-Limit")
+        remaining = self._header(headers, "RateLimit-Remaining")
+        reset = self._header(headers, "RateLimit-Reset")
+        if limit is None or remaining is None:
+            return
+
+        with self._condition:
+            self._refill(time.monotonic())
+            self.capacity = limit
+            self.tokens = min(self.tokens, remaining)
+            if reset is not None and limit > remaining and reset > time.time():
+                self.rate = (limit - remaining) / (reset - time.time())
+            self._condition.notify_all()
+
+    def throttled(self, headers: Mapping[str, str]) -> float:
+        """
+        Block all requests after '429 Too Many Requests' response until API grants new token
+
+        :param headers: response headers
+        :return: seconds requests are blocked for
+        """
+        retry_after = self._header(headers, "Retry-After")
+        self.update(headers)
+        with self._condition:
+            now = time.monotonic()
+            self._refill(now)
+            delay = retry_after if retry_after is not None else 1 / self.rate
+            # exactly one token is available, when block ends
+            self.tokens = min(self.tokens, 1 - delay * self.rate)
+            self.blocked_until = max(self.blocked_until, now + delay)
+            return delay
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    @staticmethod
+    def _header(headers: Mapping[str, str], name: str) -> Optional[float]:
+        try:
+            return float(headers[name])
+        except (KeyError, TypeError, ValueError):
+            return None
@@ -0,0 +1,85 @@
+import random
+import threading
+from typing import Mapping, Optional, Tuple
+
+
+class RetryPolicy:
+    """
+    Rules for repeating requests after transient errors (5xx responses, connection errors).
+    Only idempotent requests are repeated, POST (i.e. server creating) is never replayed blindly
+    """
+
+    def __init__(
+            self,
+            max_retries: int = 3,
+            backoff_factor: float = 0.5,
+            max_backoff: float = 30.0,
+            jitter: bool = True,
+            retry_statuses: Tuple[int, ...] = (502, 503, 504),
+            idempotent_methods: Tuple[str, ...] = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE"),
+    ):
+        """
+        :param max_retries: maximum number of repeats, 0 disables retries
+        :param backoff_factor: delay before first repeat, doubles for every next one
+        :param max_backoff: maximum delay before repeat
+        :param jitter: use random delay from 0 to computed backoff ("full jitter")
+        :param retry_statuses: response status codes, which are considered transient
+        :param idempotent_methods: methods, which are repeated by default
+        """
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.retry_statuses = retry_statuses
+        self.idempotent_methods = idempotent_methods
+
+    def is_idempotent(self, method: str, idempotent: Optional[bool] = None) -> bool:
+        """
+        :param method: HTTP method
+        :param idempotent: explicit flag from caller, overrides method-based rule
+        :return: True if request may be repeated
+        """
+        if idempotent is not None:
+            return idempotent
+        return method.upper() in self.idempotent_methods
+
+    def get_backoff(self, attempt: int, headers: Optional[Mapping[str, str]] = None) -> float:
+        """
+        Compute delay before repeat
+
+        :param attempt: number of repeat, starting from 0
+        :param headers: headers of failed response, 'Retry-After' is used as minimum delay
+        :return: seconds to wait
+        """
+        delay = min(self.max_backoff, self.backoff_factor * 2 ** attempt)
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        try:
+            delay = max(delay, min(self.max_backoff, float((headers or {})["Retry-After"])))
+        except (KeyError, TypeError, ValueError):
+            pass
+        return delay
+
+
+class RetryStats:
+    """
+    Thread safe counters of requests, retries and time spent in backoff
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.backoff_time = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, retries: int, backoff_time: float) -> None:
+        """
+        Account one finished request
+
+        :param retries: number of repeats of this request
+        :param backoff_time: seconds spent waiting before repeats
+        """
+        with self._lock:
+            self.requests += 1
+            self.retries += retries
+            self.backoff_time += backoff_time
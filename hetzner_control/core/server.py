@@ -1,16 +1,23 @@
+import copy
 import json
-from typing import Dict, Any, Union
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple, Union
 
 import requests
 
 from . import HetznerHandler
-from .exceptions import ExMessageHandler
+from .exceptions import APIError
+from .models import Server, ServerType
+from .ratelimit import BULK
 
 
 class ServerHandler(HetznerHandler):
     """
     Hetzner Handler class for actions with servers
     """
+    bulk_operations = ("server_up", "server_down", "delete_server")
+    metric_types = ("cpu", "disk", "network")
 
     def __init__(self):
         self.api_link = f"{self.get_prefix()}/servers"
@@ -18,19 +25,123 @@ class ServerHandler(HetznerHandler):
 
     def get_all_servers(self) -> Union[Dict[str, Any], None]:
         """
-        Making a request to Hetzner for lists of servers you own in your account
+        Making a request to Hetzner for lists of servers you own in your account.
+        Servers from all pages are collected into 'servers' of the first page response
+
+        :return: json response as Dict[str, Any]
         """
-        resp = requests.get(
-            url=self.api_link,
-            headers=self.headers
-        )
+        pages = self._iter_pages(self.api_link)
+        data = next(pages)
+        for page in pages:
+            data["servers"].extend(page["servers"])
+        return data
 
-        if resp.status_code != 200:
-            raise ExMessageHandler(
-                self.create_exception_message(resp.json()),
-                terminate_after=True
-            )
-        return resp.json()
+    @staticmethod
+    def get_filters(
+            label_selector: Optional[str] = None,
+            name: Optional[str] = None,
+            status: Optional[Iterable[str]] = None,
+            sort: Optional[Iterable[str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Create query parameters for server-side filtering and sorting of servers list
+
+        :param label_selector: return only servers with matching labels, i.e. "role=web,env!=prod"
+        :param name: return only server with this name
+        :param status: return only servers with one of these statuses, i.e. ["running", "off"]
+        :param sort: sort order, i.e. ["name", "created:desc"]
+        :return: query parameters as Dict[str, Any]
+        """
+        params: Dict[str, Any] = {}
+        if label_selector:
+            params["label_selector"] = label_selector
+        if name:
+            params["name"] = name
+        if status:
+            params["status"] = list(status)
+        if sort:
+            params["sort"] = list(sort)
+        return params
+
+    def iter_server_pages(
+            self,
+            per_page: int = 50,
+            concurrency: int = 1,
+            label_selector: Optional[str] = None,
+            name: Optional[str] = None,
+            status: Optional[Iterable[str]] = None,
+            sort: Optional[Iterable[str]] = None,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Making requests to Hetzner for servers page by page, filtering is done by API.
+        With concurrency == 1 next page is requested only when previous one has been consumed,
+        otherwise pages after the first one are prefetched in parallel
+
+        :param per_page: number of servers per page (API allows at most 50)
+        :param concurrency: maximum number of parallel page requests
+        :param label_selector: return only servers with matching labels, i.e. "role=web,env!=prod"
+        :param name: return only server with this name
+        :param status: return only servers with one of these statuses, i.e. ["running", "off"]
+        :param sort: sort order, i.e. ["name", "created:desc"]
+        :return: iterator over lists of servers
+        """
+        params = self.get_filters(label_selector=label_selector, name=name, status=status, sort=sort)
+        for page in self._iter_pages(self.api_link, params=params, per_page=per_page, concurrency=concurrency):
+            yield page.get("servers", [])
+
+    def iter_servers(
+            self,
+            per_page: int = 50,
+            concurrency: int = 1,
+            label_selector: Optional[str] = None,
+            name: Optional[str] = None,
+            status: Optional[Iterable[str]] = None,
+            sort: Optional[Iterable[str]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Making requests to Hetzner for servers, yielding them one by one
+
+        :param per_page: number of servers per page (API allows at most 50)
+        :param concurrency: maximum number of parallel page requests
+        :param label_selector: return only servers with matching labels, i.e. "role=web,env!=prod"
+        :param name: return only server with this name
+        :param status: return only servers with one of these statuses, i.e. ["running", "off"]
+        :param sort: sort order, i.e. ["name", "created:desc"]
+        :return: iterator over servers
+        """
+        for servers in self.iter_server_pages(
+                per_page=per_page,
+                concurrency=concurrency,
+                label_selector=label_selector,
+                name=name,
+                status=status,
+                sort=sort,
+        ):
+            yield from servers
+
+    def list_server_pages(self, **kwargs: Any) -> Iterator[List[Server]]:
+        """
+        Same as iter_server_pages(), but servers are parsed to Server models.
+        Servers of the same type share one ServerType object
+
+        :param kwargs: arguments of iter_server_pages()
+        :return: iterator over lists of Server objects
+        """
+        server_types: Dict[int, ServerType] = {}
+        for servers in self.iter_server_pages(**kwargs):
+            with self.measure("parse"):
+                page = [Server(server, server_types) for server in servers]
+            yield page
+
+    def list_servers(self, **kwargs: Any) -> Iterator[Server]:
+        """
+        Same as iter_servers(), but servers are parsed to Server models
+
+        :param kwargs: arguments of iter_server_pages()
+        :return: iterator over Server objects
+        """
+        for servers in self.list_server_pages(**kwargs):
+            yield from servers
 
     def get_server(self, id_server: int) -> Dict[str, Any]:
         """
@@ -39,16 +150,7 @@ class ServerHandler(HetznerHandler):
         :param id_server: server ID
         :return: json response as Dict[str, Any]
         """
-        resp = requests.get(
-            url=f"{self.api_link}/{id_server}",
-            headers=self.headers
-        )
-
-        if resp.status_code != 200:
-            raise ExMessageHandler(
-                self.create_exception_message(resp.json()),
-                terminate_after=True
-            )
+        resp = self._request("GET", f"{self.api_link}/{id_server}")
         return resp.json()
 
     def create_server(
@@ -59,6 +161,7 @@ class ServerHandler(HetznerHandler):
             server_type: str,
             automount: bool = False,
             start_after_create: bool = False,
+            labels: Optional[Dict[str, str]] = None,
     ) -> Union[Dict[str, Any], None]:
         """
         Making a request to Hetzner for create a server with specific parameters
@@ -69,8 +172,33 @@ class ServerHandler(HetznerHandler):
         :param server_type: id or name of the image the server is created from
         :param automount: auto-mount Volumes after attach
         :param start_after_create: start Server right after creation
+        :param labels: user-defined labels of server
         :return: json response as Dict[str, Any]
         """
+        post_data = self.create_payload(name, image, location, server_type, automount, start_after_create, labels)
+        resp = self._request(
+            "POST",
+            self.api_link,
+            expected_status=201,
+            data=json.dumps(post_data)
+        )
+        return resp.json()
+
+    @staticmethod
+    def create_payload(
+            name: str,
+            image: str,
+            location: str,
+            server_type: str,
+            automount: bool = False,
+            start_after_create: bool = False,
+            labels: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Body of server creating request, shared with AsyncServerHandler, arguments are the same as of create_server()
+
+        :return: request body as Dict[str, Any]
+        """
         post_data = {
             "name": name,
             "image": image,
@@ -79,36 +207,30 @@ class ServerHandler(HetznerHandler):
             "automount": automount,
             "start_after_create": start_after_create
         }
-        resp = requests.post(
-            url=self.api_link,
-            headers=self.headers,
-            data=json.dumps(post_data)
-        )
-
-        if resp.status_code != 201:
-            raise ExMessageHandler(
-                self.create_exception_message(resp.json()),
-                terminate_after=True
-            )
-        return resp.json()
+        if labels:
+            post_data["labels"] = labels
+        return post_data
 
-    def delete_server(self, id_server: int) -> None:
+    def delete_server(self, id_server: int) -> Dict[str, Any]:
         """
         Making request to delete server by ID.
 
         :param id_server: uniq server id
-        :return: True if server deleted else print error json message and return None
+        :return: json response with deleting action as Dict[str, Any]
         """
-        resp = requests.delete(
-            url=f"{self.api_link}/{id_server}",
-            headers=self.headers
-        )
+        resp = self._request("DELETE", f"{self.api_link}/{id_server}")
+        return resp.json()
 
-        if resp.status_code != 200:
-            raise ExMessageHandler(
-                self.create_exception_message(resp.json()),
-                terminate_after=True
-            )
+    def update_server(self, id_server: int, labels: Dict[str, str]) -> Dict[str, Any]:
+        """
+        Making request to replace labels of server by ID
+
+        :param id_server: server ID
+        :param labels: new labels, labels which are not passed are removed
+        :return: json response as Dict[str, Any]
+        """
+        resp = self._request("PUT", f"{self.api_link}/{id_server}", data=json.dumps({"labels": labels}))
+        return resp.json()
 
     def server_down(self, id_server: int) -> Dict[str, Any]:
         """
@@ -136,6 +258,121 @@ class ServerHandler(HetznerHandler):
         )
         return data
 
+    def bulk(
+            self,
+            operation: str,
+            ids: Iterable[int],
+            concurrency: int = 8,
+    ) -> Iterator[Tuple[int, Optional[Dict[str, Any]], Optional[Exception]]]:
+        """
+        Perform the same operation on many servers with bounded worker pool.
+        Failed request doesn't terminate program, its error is returned with result
+
+        :param operation: name of ServerHandler method, one of "server_up", "server_down", "delete_server"
+        :param ids: servers IDs
+        :param concurrency: maximum number of requests in flight
+        :return: iterator over (server ID, json response or None, exception or None) in order of completion
+        """
+        if operation not in self.bulk_operations:
+            raise ValueError(f"Unsupported bulk operation: {operation}")
+
+        handler = copy.copy(self)
+        handler.terminate_on_error = False
+        method = getattr(handler, operation)
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = {executor.submit(method, id_server=id_): id_ for id_ in ids}
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except (APIError, requests.RequestException) as error:
+                    yield futures[future], None, error
+
+    def get_server_metrics(
+            self,
+            id_server: int,
+            types: Iterable[str],
+            start: datetime,
+            end: datetime,
+            step: Optional[int] = None,
+            priority: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Making request for time series of server metrics
+
+        :param id_server: server ID
+        :param types: metric types, some of "cpu", "disk", "network"
+        :param start: start of period, timezone-aware
+        :param end: end of period, timezone-aware
+        :param step: resolution of time series in seconds, chosen by API if None
+        :param priority: ratelimit.INTERACTIVE or ratelimit.BULK, by default INTERACTIVE as for any GET
+        :return: json response as Dict[str, Any]
+        """
+        resp = self._request(
+            "GET", f"{self.api_link}/{id_server}/metrics", params=self.metrics_params(types, start, end, step),
+            priority=priority,
+        )
+        with self.measure("parse"):
+            return resp.json()
+
+    @staticmethod
+    def metrics_params(
+            types: Iterable[str],
+            start: datetime,
+            end: datetime,
+            step: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Query parameters of metrics request, shared with AsyncServerHandler,
+        arguments are the same as of get_server_metrics()
+
+        :return: query parameters as Dict[str, Any]
+        """
+        params: Dict[str, Any] = {
+            "type": ",".join(types),
+            "start": start.isoformat(timespec="seconds"),
+            "end": end.isoformat(timespec="seconds"),
+        }
+        if step:
+            params["step"] = step
+        return params
+
+    def bulk_metrics(
+            self,
+            ids: Iterable[int],
+            types: Iterable[str],
+            start: datetime,
+            end: datetime,
+            step: Optional[int] = None,
+            concurrency: int = 8,
+    ) -> Iterator[Tuple[int, Optional[Dict[str, Any]], Optional[Exception]]]:
+        """
+        Same as get_server_metrics() for many servers with bounded worker pool.
+        Requests have BULK priority, so they leave part of rate limit budget for interactive commands,
+        failed request doesn't terminate program, its error is returned with result
+
+        :param ids: servers IDs
+        :param types: metric types, some of "cpu", "disk", "network"
+        :param start: start of period, timezone-aware
+        :param end: end of period, timezone-aware
+        :param step: resolution of time series in seconds, chosen by API if None
+        :param concurrency: maximum number of requests in flight
+        :return: iterator over (server ID, json response or None, exception or None) in order of completion
+        """
+        handler = copy.copy(self)
+        handler.terminate_on_error = False
+        types = list(types)
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = {
+                executor.submit(handler.get_server_metrics, id_, types, start, end, step, BULK): id_ for id_ in ids
+            }
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except (APIError, requests.RequestException) as error:
+                    yield futures[future], None, error
+
     def __make_action(
             self,
             id_server: int,
@@ -151,15 +388,10 @@ class ServerHandler(HetznerHandler):
 
         :return: json response as Dict[str, Any]
         """
-        resp = requests.post(
-            url=f"{self.api_link}/{id_server}/actions/{action}",
-            headers=self.headers,
+        resp = self._request(
+            "POST",
+            f"{self.api_link}/{id_server}/actions/{action}",
+            expected_status=201,
             params=(params if params else {})
         )
-
-        if resp.status_code != 201:
-            raise ExMessageHandler(
-                self.create_exception_message(resp.json()),
-                terminate_after=True
-            )
         return resp.json()
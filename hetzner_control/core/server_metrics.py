@@ -0,0 +1,110 @@
+import math
+import re
+from datetime import timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+_DURATION = re.compile(r"^\s*(\d+)\s*([smhd])\s*$")
+_UNITS = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days"}
+
+
+def parse_duration(value: str) -> timedelta:
+    """
+    :param value: duration with unit, i.e. "90s", "30m", "6h", "7d"
+    :return: timedelta object
+    :raise ValueError: malformed duration
+    """
+    match = _DURATION.match(value)
+    if match is None or not int(match.group(1)):
+        raise ValueError(f"expected positive duration like 30m, 6h or 7d, got {value!r}")
+    return timedelta(**{_UNITS[match.group(2)]: int(match.group(1))})
+
+
+def time_series(response: Dict[str, Any]) -> Dict[str, List[float]]:
+    """
+    Values of every time series of /servers/{id}/metrics response, timestamps are dropped.
+    API sends values as strings, missing samples ("NaN") are skipped
+
+    :param response: json response
+    :return: series name (i.e. "cpu", "disk.0.iops.read") -> values in time order
+    """
+    result = {}
+    for name, series in ((response.get("metrics") or {}).get("time_series") or {}).items():
+        values = [float(value) for _, value in series.get("values") or []]
+        result[name] = [value for value in values if not math.isnan(value)]
+    return result
+
+
+def percentile(ordered: Sequence[float], q: float) -> float:
+    """
+    Percentile with linear interpolation between closest ranks
+
+    :param ordered: sorted non-empty values
+    :param q: percentile from 0 to 100
+    :return: value
+    """
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+class SeriesStats:
+    """
+    Summary of one time series or of pooled values of group of servers
+    """
+    __slots__ = ("samples", "p50", "p95", "max", "last")
+
+    def __init__(self, values: Sequence[float]):
+        """
+        :param values: values in time order, each percentile is an index into one sorted copy
+        """
+        ordered = sorted(values)
+        self.samples = len(values)
+        self.p50: Optional[float] = percentile(ordered, 50) if ordered else None
+        self.p95: Optional[float] = percentile(ordered, 95) if ordered else None
+        self.max: Optional[float] = ordered[-1] if ordered else None
+        self.last: Optional[float] = values[-1] if values else None
+
+    def __repr__(self) -> str:
+        return f"SeriesStats(samples={self.samples}, p50={self.p50}, p95={self.p95}, max={self.max})"
+
+
+def downsample(values: Sequence[float], width: int) -> List[float]:
+    """
+    Reduce series to at most width points, each point is maximum of its bucket, so short peaks stay visible
+
+    :param values: values in time order
+    :param width: number of points
+    :return: list of values
+    """
+    if len(values) <= width:
+        return list(values)
+    # more than one value per bucket, so no bucket is empty
+    step = len(values) / width
+    return [max(values[int(i * step):int((i + 1) * step)]) for i in range(width)]
+
+
+class GroupStats:
+    """
+    Values of the same series pooled by group of servers, i.e. by value of label
+    """
+
+    def __init__(self):
+        self._values: Dict[Tuple[str, str], List[float]] = {}
+        self._servers: Dict[Tuple[str, str], int] = {}
+
+    def add(self, group: str, series: Dict[str, List[float]]) -> None:
+        """
+        :param group: group of server
+        :param series: result of time_series() for server
+        """
+        for name, values in series.items():
+            self._values.setdefault((group, name), []).extend(values)
+            self._servers[(group, name)] = self._servers.get((group, name), 0) + 1
+
+    def summary(self) -> Iterable[Tuple[str, str, int, SeriesStats]]:
+        """
+        :return: (group, series name, number of servers, stats of pooled values) sorted by group and series
+        """
+        for key in sorted(self._values):
+            yield key[0], key[1], self._servers[key], SeriesStats(self._values[key])
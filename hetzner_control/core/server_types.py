@@ -1,14 +1,87 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 
-import requests
+from . import HetznerHandler
+from .models import Price, ServerType
+from .price_index import SERVER, PriceIndex
+from .pricing import PricingHandler
 
-from . import HetznerHandler, ExMessageHandler
+# keys of ServerTypeCatalog.find() sorting, ties are broken by price and name
+SORT_KEYS = ("price", "cores", "memory", "disk", "name")
+
+
+class ServerTypeCatalog:
+    """
+    Server types joined with their prices.
+    Matches of every location are sorted by monthly price once on build,
+    so find() is a single filtering pass without requests
+    """
+
+    def __init__(self, server_types: List[ServerType], index: PriceIndex):
+        """
+        :param server_types: specifications of server types
+        :param index: prices of all resources
+        """
+        # location -> (type, price) sorted by monthly price, None -> each type in its cheapest location
+        self._by_location: Dict[Optional[str], List[Tuple[ServerType, Price]]] = {}
+        cheapest: Dict[str, Tuple[ServerType, Price]] = {}
+        types = {type_.name: type_ for type_ in server_types}
+        for _, name, location in index.keys(SERVER):
+            type_ = types.get(name)
+            if type_ is None:
+                continue
+            price = index.get(SERVER, name, location)
+            self._by_location.setdefault(location, []).append((type_, price))
+            if name not in cheapest or price.monthly_gross < cheapest[name][1].monthly_gross:
+                cheapest[name] = (type_, price)
+        self._by_location[None] = list(cheapest.values())
+        for matches in self._by_location.values():
+            matches.sort(key=lambda match: (match[1].monthly_gross, match[0].name))
+
+    def locations(self) -> List[str]:
+        return sorted(location for location in self._by_location if location is not None)
+
+    def find(
+            self,
+            min_cores: int = 0,
+            min_memory: float = 0,
+            min_disk: int = 0,
+            cpu_type: Optional[str] = None,
+            location: Optional[str] = None,
+            sort: str = "price",
+            deprecated: bool = False,
+    ) -> List[Tuple[ServerType, Price]]:
+        """
+        :param min_cores: minimal number of CPU cores
+        :param min_memory: minimal memory, GB
+        :param min_disk: minimal disk size, GB
+        :param cpu_type: "shared" or "dedicated", None for any
+        :param location: location name, None to take each type in its cheapest location
+        :param sort: one of SORT_KEYS, numeric keys are ascending, so the smallest fit goes first
+        :param deprecated: include deprecated server types
+        :return: matching (ServerType, Price), ranked by sort key
+        """
+        if sort not in SORT_KEYS:
+            raise ValueError(f"Unknown sort key: {sort}, expected one of {', '.join(SORT_KEYS)}")
+        matches = [
+            (type_, price) for type_, price in self._by_location.get(location, ())
+            if type_.cores >= min_cores
+            and type_.memory >= min_memory
+            and type_.disk >= min_disk
+            and (cpu_type is None or type_.cpu_type == cpu_type)
+            and (deprecated or not type_.deprecated)
+        ]
+        if sort != "price":
+            # stable sort keeps price order for equal keys
+            matches.sort(key=lambda match: getattr(match[0], sort))
+        return matches
 
 
 class ServerTypesHandler(HetznerHandler):
     """
     Hetzner Handler class that provides reference information about server types
     """
+    # seconds to keep response in on-disk cache
+    cache_ttl = 24 * 60 * 60
 
     def __init__(self):
         self.api_link = f"{self.get_prefix()}/server_types"
@@ -20,17 +93,7 @@ class ServerTypesHandler(HetznerHandler):
 
         :return: json response as Dict[str, Any]
         """
-        resp = requests.get(
-            url=self.api_link,
-            headers=self.headers
-        )
-
-        if resp.status_code != 200:
-            raise ExMessageHandler(
-                self.create_exception_message(resp.json()),
-                terminate_after=True
-            )
-        return resp.json()
+        return self._cached_get(self.api_link, ttl=self.cache_ttl)
 
     def get_server_type(self, id_: int) -> Dict[str, Any]:
         """
@@ -38,14 +101,25 @@ class ServerTypesHandler(HetznerHandler):
 
         :return: json response as Dict[str, Any]
         """
-        resp = requests.get(
-            url=f"{self.api_link}/{id_}",
-            headers=self.headers
-        )
-
-        if resp.status_code != 200:
-            raise ExMessageHandler(
-                self.create_exception_message(resp.json()),
-                terminate_after=True
-            )
-        return resp.json()
+        return self._cached_get(f"{self.api_link}/{id_}", ttl=self.cache_ttl)
+
+    def list_server_types(self) -> List[ServerType]:
+        """
+        Same as get_all_server_types(), but server types are parsed to ServerType models
+
+        :return: list of ServerType objects
+        """
+        data = self.get_all_server_types()["server_types"]
+        with self.measure("parse"):
+            return [ServerType(type_) for type_ in data]
+
+    def get_catalog(self) -> ServerTypeCatalog:
+        """
+        Join server types with prices, both responses are taken from cache if it's enabled
+
+        :return: ServerTypeCatalog object
+        """
+        server_types = self.list_server_types()
+        index = PricingHandler().get_price_index()
+        with self.measure("parse"):
+            return ServerTypeCatalog(server_types, index)
@@ -0,0 +1,169 @@
+import json
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import urlparse
+
+
+def get_endpoint(url: str) -> str:
+    """
+    Path of url with numeric IDs replaced by '{id}', so requests to the same endpoint are grouped
+
+    :param url: full url, i.e. "https://api.hetzner.cloud/v1/servers/42/actions/poweron?x=1"
+    :return: endpoint, i.e. "/v1/servers/{id}/actions/poweron"
+    """
+    return re.sub(r"/\d+(?=/|$)", "/{id}", urlparse(url).path)
+
+
+class RequestTiming:
+    """
+    Measurements of one request made through HetznerHandler
+    """
+    __slots__ = ("method", "url", "status", "latency", "bytes", "retries", "backoff_time", "started")
+
+    def __init__(
+            self,
+            method: str,
+            url: str,
+            status: Optional[int],
+            latency: float,
+            bytes_: int,
+            retries: int = 0,
+            backoff_time: float = 0.0,
+            started: float = 0.0,
+    ):
+        """
+        :param method: HTTP method
+        :param url: full url with query parameters
+        :param status: status code, None if request failed without response
+        :param latency: seconds from sending request to receiving the whole response, retries included
+        :param bytes_: size of response body
+        :param retries: number of repeated attempts
+        :param backoff_time: seconds spent waiting between attempts
+        :param started: seconds since Timings object creation
+        """
+        self.method = method
+        self.url = url
+        self.status = status
+        self.latency = latency
+        self.bytes = bytes_
+        self.retries = retries
+        self.backoff_time = backoff_time
+        self.started = started
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class Timings:
+    """
+    Collector of request latencies and durations of phases (json/model parsing, rendering) of one run.
+    Safe to use from several threads
+    """
+
+    def __init__(self):
+        self.requests: List[RequestTiming] = []
+        # total seconds and number of measurements by phase name
+        self.phases: Dict[str, float] = {}
+        self.phase_counts: Dict[str, int] = {}
+        self._created = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def record_request(
+            self,
+            method: str,
+            url: str,
+            status: Optional[int],
+            latency: float,
+            bytes_: int,
+            retries: int = 0,
+            backoff_time: float = 0.0,
+    ) -> None:
+        timing = RequestTiming(
+            method, url, status, latency, bytes_, retries, backoff_time,
+            started=time.perf_counter() - self._created - latency,
+        )
+        with self._lock:
+            self.requests.append(timing)
+
+    def on_request_end(
+            self,
+            method: str,
+            url: str,
+            status: Optional[int],
+            latency: float,
+            bytes: int,
+            retries: int = 0,
+            backoff_time: float = 0.0,
+            **data: Any
+    ) -> None:
+        """
+        Callback for 'request_end' event of core.hooks.Hooks
+        """
+        self.record_request(method, url, status, latency, bytes, retries, backoff_time)
+
+    def record_phase(self, phase: str, duration: float) -> None:
+        with self._lock:
+            self.phases[phase] = self.phases.get(phase, 0.0) + duration
+            self.phase_counts[phase] = self.phase_counts.get(phase, 0) + 1
+
+    @contextmanager
+    def measure(self, phase: str) -> Iterator[None]:
+        """
+        Add duration of code block to phase, i.e. 'parse' or 'render'
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_phase(phase, time.perf_counter() - start)
+
+    def elapsed(self) -> float:
+        """
+        :return: seconds since Timings object creation
+        """
+        return time.perf_counter() - self._created
+
+    def by_endpoint(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Aggregate requests by method and endpoint
+
+        :return: "GET /v1/servers" -> count, errors, latency total/max, bytes, retries
+        """
+        result: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            requests = list(self.requests)
+        for timing in requests:
+            entry = result.setdefault(f"{timing.method} {get_endpoint(timing.url)}", {
+                "count": 0, "errors": 0, "latency_total": 0.0, "latency_max": 0.0, "bytes": 0, "retries": 0,
+            })
+            entry["count"] += 1
+            entry["errors"] += timing.status is None or timing.status >= 400
+            entry["latency_total"] += timing.latency
+            entry["latency_max"] = max(entry["latency_max"], timing.latency)
+            entry["bytes"] += timing.bytes
+            entry["retries"] += timing.retries
+        return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            requests = [timing.to_dict() for timing in self.requests]
+            phases = {
+                phase: {"total": duration, "count": self.phase_counts[phase]}
+                for phase, duration in self.phases.items()
+            }
+        return {
+            "elapsed": self.elapsed(),
+            "requests": requests,
+            "endpoints": self.by_endpoint(),
+            "phases": phases,
+        }
+
+    def dump(self, path: str) -> None:
+        """
+        Write all measurements as json file
+        """
+        with open(path, "w") as file:
+            json.dump(self.to_dict(), file, indent=2)
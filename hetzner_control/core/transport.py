@@ -0,0 +1,254 @@
+import time
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError, MaxRetryError
+
+from .. import __app_name__, __version__
+from .hooks import RETRY, THROTTLE, Hooks
+from .ratelimit import BULK, INTERACTIVE, RateLimiter
+from .retry import RetryPolicy, RetryStats
+
+
+class Transport:
+    """
+    HTTP transport shared by all Handlers.
+    Keeps one pooled requests.Session, so connections (and TLS sessions) are reused between requests,
+    paces requests by RateLimiter (set 'rate_limiter' to None to disable it)
+    and repeats idempotent requests after transient errors according to RetryPolicy
+    """
+    # methods, which are considered interactive by default, others are bulk mutations
+    interactive_methods = ("GET", "HEAD")
+
+    def __init__(
+            self,
+            pool_connections: int = 4,
+            pool_maxsize: int = 16,
+            connect_timeout: float = 5.0,
+            read_timeout: float = 30.0,
+            headers: Optional[Dict[str, str]] = None,
+            rate_limiter: Optional[RateLimiter] = None,
+            max_throttle_retries: int = 5,
+            retry_policy: Optional[RetryPolicy] = None,
+            hooks: Optional[Hooks] = None,
+    ):
+        """
+        :param pool_connections: number of hosts to keep connection pools for
+        :param pool_maxsize: maximum number of keep-alive connections per host
+        :param connect_timeout: seconds to wait for connection establishing
+        :param read_timeout: seconds to wait for the server response
+        :param headers: additional headers sent with every request
+        :param rate_limiter: RateLimiter object, by default new one with API default budget
+        :param max_throttle_retries: how many times request is repeated after '429 Too Many Requests'
+        :param retry_policy: RetryPolicy object, by default 3 retries with exponential backoff and jitter
+        :param hooks: Hooks object notified about retries and throttling
+        """
+        self.timeout: Tuple[float, float] = (connect_timeout, read_timeout)
+        self.rate_limiter: Optional[RateLimiter] = rate_limiter or RateLimiter()
+        self.max_throttle_retries = max_throttle_retries
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.hooks = hooks or Hooks()
+        # totals for all requests made through this transport
+        self.stats = RetryStats()
+        self.session = requests.Session()
+
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.session.headers.update({
+            "User-Agent": f"{__app_name__}/{__version__}",
+            "Accept": "application/json",
+        })
+        if headers:
+            self.session.headers.update(headers)
+
+    def request(
+            self,
+            method: str,
+            url: str,
+            priority: Optional[int] = None,
+            idempotent: Optional[bool] = None,
+            **kwargs: Any
+    ) -> requests.Response:
+        """
+        Making request through pooled session with default timeouts.
+        Request waits for rate limiter budget and is repeated after '429 Too Many Requests',
+        API doesn't process such requests, so it's safe for any method.
+        After 5xx responses and connection errors only idempotent requests are repeated,
+        except failed connection establishing (refused connection, DNS failure, connect timeout),
+        which is safe to repeat for any method, because request hasn't been sent.
+        Number of retries and backoff time are stored in 'retries' and 'backoff_time' of response,
+        or of raised exception if request has failed
+
+        :param method: HTTP method, i.e. "GET"
+        :param url: full url of endpoint
+        :param priority: ratelimit.INTERACTIVE or ratelimit.BULK, by default depends on method
+        :param idempotent: whether request may be repeated, by default depends on method
+        :param kwargs: other arguments for requests.Session.request()
+        :return: requests.Response object
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        attempts = self.attempts(method, url, priority, idempotent)
+        while True:
+            if attempts.limiter is not None:
+                attempts.limiter.acquire(attempts.priority)
+
+            try:
+                resp = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as error:
+                delay = attempts.after_error(error, not_connected=self._not_connected(error))
+                if delay is None:
+                    self.stats.record(attempts.retries, attempts.backoff_time)
+                    # attempts made before giving up are reported by caller, i.e. in 'request_end' hook
+                    error.retries = attempts.retries
+                    error.backoff_time = attempts.backoff_time
+                    raise
+                time.sleep(delay)
+                continue
+
+            delay = attempts.after_response(resp.status_code, resp.headers)
+            if delay is None:
+                break
+            if delay:
+                time.sleep(delay)
+
+        self.stats.record(attempts.retries, attempts.backoff_time)
+        resp.retries = attempts.retries
+        resp.backoff_time = attempts.backoff_time
+        return resp
+
+    def attempts(
+            self,
+            method: str,
+            url: str,
+            priority: Optional[int] = None,
+            idempotent: Optional[bool] = None,
+            retry_policy: Optional[RetryPolicy] = None,
+    ) -> "RequestAttempts":
+        """
+        Create retry state of one request with rate limiter and hooks of this transport
+
+        :param method: HTTP method, i.e. "GET"
+        :param url: full url of endpoint
+        :param priority: ratelimit.INTERACTIVE or ratelimit.BULK, by default depends on method
+        :param idempotent: whether request may be repeated, by default depends on method
+        :param retry_policy: RetryPolicy object, by default policy of this transport
+        :return: RequestAttempts object
+        """
+        if priority is None:
+            priority = INTERACTIVE if method.upper() in self.interactive_methods else BULK
+        return RequestAttempts(
+            method, url, priority, retry_policy or self.retry_policy, self.rate_limiter, self.hooks,
+            self.max_throttle_retries, idempotent,
+        )
+
+    @staticmethod
+    def _not_connected(error: Exception) -> bool:
+        """
+        Check that error happened before request was sent, as httpx.ConnectError does in async Handlers
+
+        :param error: exception raised by requests
+        :return: True if connection wasn't established
+        """
+        if isinstance(error, requests.ConnectTimeout):
+            return True
+        reason = error.args[0] if error.args else None
+        if isinstance(reason, MaxRetryError):
+            reason = reason.reason
+        # NewConnectionError (refused connection, DNS failure) is subclass of ConnectTimeoutError
+        return isinstance(reason, ConnectTimeoutError)
+
+    def close(self) -> None:
+        """
+        Close all pooled connections
+        """
+        self.session.close()
+
+
+class RequestAttempts:
+    """
+    Retry decisions of one request, shared by Transport.request() and async Handlers, so both follow the same rules.
+    It makes no I/O: caller sends request, reports error or response and sleeps for returned delay.
+    Hooks are notified about retries and throttling
+    """
+
+    def __init__(
+            self,
+            method: str,
+            url: str,
+            priority: int,
+            retry_policy: RetryPolicy,
+            rate_limiter: Optional[RateLimiter],
+            hooks: Hooks,
+            max_throttle_retries: int,
+            idempotent: Optional[bool] = None,
+    ):
+        """
+        :param method: HTTP method, i.e. "GET"
+        :param url: full url of endpoint
+        :param priority: ratelimit.INTERACTIVE or ratelimit.BULK
+        :param retry_policy: RetryPolicy object
+        :param rate_limiter: RateLimiter object, None if requests aren't paced
+        :param hooks: Hooks object
+        :param max_throttle_retries: how many times request is repeated after '429 Too Many Requests'
+        :param idempotent: whether request may be repeated, by default depends on method
+        """
+        self.method = method
+        self.url = url
+        self.priority = priority
+        self.policy = retry_policy
+        self.limiter = rate_limiter
+        self.hooks = hooks
+        self.max_throttle_retries = max_throttle_retries
+        self.can_retry = retry_policy.is_idempotent(method, idempotent)
+        self.retries = 0
+        self.throttles = 0
+        self.backoff_time = 0.0
+
+    def after_error(self, error: Exception, not_connected: bool = False) -> Optional[float]:
+        """
+        :param error: exception of failed request
+        :param not_connected: True if connection wasn't established, so request is safe to repeat for any method
+        :return: seconds to wait before repeat, None if error should be raised
+        """
+        if not (self.can_retry or not_connected) or self.retries >= self.policy.max_retries:
+            return None
+        return self._backoff(error=error)
+
+    def after_response(self, status: int, headers: Mapping[str, str]) -> Optional[float]:
+        """
+        :param status: response status code
+        :param headers: response headers
+        :return: seconds to wait before repeat, None if response is final
+        """
+        limiter = self.limiter
+        if limiter is not None and status == 429 and self.throttles < self.max_throttle_retries:
+            delay = limiter.throttled(headers)
+            if self.hooks.active:
+                self.hooks.emit(THROTTLE, method=self.method, url=self.url, delay=delay)
+            self.throttles += 1
+            # rate limiter itself holds the next attempt until API grants new token
+            return 0.0
+        if limiter is not None:
+            limiter.update(headers)
+
+        if status in self.policy.retry_statuses and self.can_retry and self.retries < self.policy.max_retries:
+            return self._backoff(headers, status=status)
+        return None
+
+    def _backoff(
+            self,
+            headers: Optional[Mapping[str, str]] = None,
+            status: Optional[int] = None,
+            error: Optional[Exception] = None,
+    ) -> float:
+        delay = self.policy.get_backoff(self.retries, headers)
+        if self.hooks.active:
+            self.hooks.emit(
+                RETRY, method=self.method, url=self.url, attempt=self.retries + 1, delay=delay, status=status, error=error,
+            )
+        self.retries += 1
+        self.backoff_time += delay
+        return delay
@@ -0,0 +1,104 @@
+from typing import Dict, Iterable, List, Set
+
+from .models import Server
+
+# fields compared between polls, other fields of server rarely change
+WATCHED_FIELDS = ("name", "status", "ingoing_traffic", "outgoing_traffic")
+# changes of these fields reset poll interval, traffic counters of live servers grow on every poll,
+# so their changes are highlighted, but don't keep polling at minimal interval
+PACING_FIELDS = frozenset(("name", "status"))
+# while some server is in one of these statuses, polling stays at minimal interval
+TRANSITIONAL_STATUSES = frozenset((
+    "initializing", "starting", "stopping", "migrating", "rebuilding", "deleting", "unknown",
+))
+
+
+class ServerDiff:
+    """
+    Changes of server list between two polls
+    """
+    __slots__ = ("added", "removed", "changed")
+
+    def __init__(self):
+        self.added: List[int] = []
+        self.removed: List[int] = []
+        # server ID -> names of changed WATCHED_FIELDS
+        self.changed: Dict[int, Set[str]] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+    def significant(self) -> bool:
+        """
+        :return: True if servers were added or removed or some of PACING_FIELDS changed
+        """
+        return bool(self.added or self.removed) or any(fields & PACING_FIELDS for fields in self.changed.values())
+
+    def __repr__(self) -> str:
+        return f"ServerDiff(added={self.added}, removed={self.removed}, changed={self.changed})"
+
+
+class ServerSnapshot:
+    """
+    The latest server list of watch mode, servers are kept in order of listing
+    """
+
+    def __init__(self):
+        self.servers: Dict[int, Server] = {}
+
+    def update(self, servers: Iterable[Server]) -> ServerDiff:
+        """
+        Replace snapshot with new listing
+
+        :param servers: full listing
+        :return: changes since previous listing
+        """
+        diff = ServerDiff()
+        current = {server.id: server for server in servers}
+        for id_, server in current.items():
+            old = self.servers.get(id_)
+            if old is None:
+                diff.added.append(id_)
+                continue
+            fields = {field for field in WATCHED_FIELDS if getattr(old, field) != getattr(server, field)}
+            if fields:
+                diff.changed[id_] = fields
+        diff.removed = [id_ for id_ in self.servers if id_ not in current]
+        self.servers = current
+        return diff
+
+    def busy(self) -> bool:
+        """
+        :return: True if some server is in transitional status
+        """
+        return any(server.status in TRANSITIONAL_STATUSES for server in self.servers.values())
+
+
+class AdaptiveInterval:
+    """
+    Poll interval of watch mode: minimal while something changes,
+    growing by factor up to maximum while server list stays the same
+    """
+
+    def __init__(self, minimum: float = 2.0, maximum: float = 30.0, factor: float = 1.5):
+        """
+        :param minimum: interval after change, seconds
+        :param maximum: upper limit of interval, seconds
+        :param factor: multiplier of interval after poll without changes
+        """
+        self.minimum = minimum
+        self.maximum = max(minimum, maximum)
+        self.factor = factor
+        self.current = minimum
+
+    def next(self, changed: bool, busy: bool = False) -> float:
+        """
+        :param changed: last poll found changes
+        :param busy: some server is in transitional status
+        :return: seconds to the next poll
+        """
+        if changed or busy:
+            self.current = self.minimum
+        else:
+            self.current = min(self.maximum, self.current * self.factor)
+        return self.current
@@ -0,0 +1,67 @@
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+import pytest
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+# measured time may exceed baseline this many times before benchmark fails,
+# set HTZ_BENCHMARK_TOLERANCE for slower machines
+TOLERANCE = float(os.getenv("HTZ_BENCHMARK_TOLERANCE", "2.0"))
+# with HTZ_BENCHMARK_UPDATE=1 measured times are stored as new baseline instead of comparing
+UPDATE = os.getenv("HTZ_BENCHMARK_UPDATE") == "1"
+
+
+class Benchmark:
+    """
+    Measure the best time of function over several rounds and compare it with stored baseline
+    """
+
+    def __init__(self, baseline: Dict[str, float], results: Dict[str, float]):
+        self.baseline = baseline
+        self.results = results
+
+    def __call__(self, name: str, func: Callable[[], Any], rounds: int = 5) -> float:
+        """
+        :param name: key of benchmark in baseline.json
+        :param func: measured function without arguments
+        :param rounds: number of runs, the fastest one is taken
+        :return: best time in seconds
+        """
+        best = float("inf")
+        for _ in range(rounds):
+            start = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - start)
+        self.results[name] = best
+
+        expected = self.baseline.get(name)
+        if not UPDATE and expected is not None:
+            assert best <= expected * TOLERANCE, (
+                f"{name}: {best * 1000:.2f} ms, baseline {expected * 1000:.2f} ms (tolerance x{TOLERANCE})"
+            )
+        return best
+
+
+@pytest.fixture(scope="session")
+def benchmark_results():
+    """
+    Times of all benchmarks in session, written to baseline.json with HTZ_BENCHMARK_UPDATE=1
+    """
+    results: Dict[str, float] = {}
+    yield results
+    if UPDATE and results:
+        baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+        baseline.update({name: round(value, 6) for name, value in results.items()})
+        BASELINE_PATH.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+
+
+@pytest.fixture
+def benchmark(benchmark_results):
+    """
+    Benchmark object comparing results with stored baseline
+    """
+    baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+    return Benchmark(baseline, benchmark_results)
@@ -0,0 +1,202 @@
+import io
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, Iterator, List
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import responses
+from rich.console import Console
+
+from hetzner_control.core import HetznerHandler
+from hetzner_control.core.models import Server, ServerType
+from hetzner_control.core.server import ServerHandler
+from tests.payloads import make_pricing, make_server_types, make_servers, make_servers_page
+
+pytestmark = pytest.mark.benchmark
+
+SIZES = [10, 1000, 50000]
+# rich renders table of 50k servers for more than a minute, so it is measured on smaller fixtures
+RENDER_SIZES = [10, 1000]
+
+
+@pytest.fixture(autouse=True)
+def mock_settings_env_vars():
+    """
+    Mock real environment variable, for example API token
+    """
+    with mock.patch.dict(os.environ, {"HETZNER_API_TOKEN": "1111"}):
+        yield
+
+
+@pytest.fixture(scope="module", params=SIZES, ids=lambda size: f"{size}")
+def server_pages(request) -> List[bytes]:
+    """
+    Encoded json responses of all /servers pages for given number of servers
+    """
+    servers = make_servers(request.param)
+    pages = range(1, max(1, -(-len(servers) // 50)) + 1)
+    return [json.dumps(make_servers_page(servers, page)).encode() for page in pages]
+
+
+class StubServerHandler:
+    """
+    Returns already parsed pages, so only rendering is measured
+    """
+
+    def __init__(self, pages: List[List[Server]]):
+        self.pages = pages
+
+    def list_server_pages(self, **kwargs) -> Iterator[List[Server]]:
+        yield from self.pages
+
+
+def count(pages: List[bytes]) -> int:
+    return json.loads(pages[0])["meta"]["pagination"]["total_entries"]
+
+
+def parse(pages: List[bytes]) -> List[List[Server]]:
+    server_types: Dict[int, ServerType] = {}
+    return [[Server(data, server_types) for data in json.loads(page)["servers"]] for page in pages]
+
+
+class TestColdStart:
+    """
+    For measure startup time of the CLI in a new interpreter
+    """
+
+    @staticmethod
+    def run(code: str) -> None:
+        subprocess.run([sys.executable, "-c", code], check=True, stdout=subprocess.DEVNULL)
+
+    def test_import_cli(self, benchmark):
+        benchmark("cold_start.import_cli", lambda: self.run("import hetzner_control.cli"))
+
+    def test_help(self, benchmark):
+        benchmark("cold_start.help", lambda: self.run(
+            "import sys; from hetzner_control.cli import main; sys.argv = ['htz', '--help']; main()"
+        ))
+
+
+class TestParsing:
+    """
+    For measure decoding of json pages and creating Server models
+    """
+
+    def test_servers(self, benchmark, server_pages):
+        size = count(server_pages)
+        benchmark(f"parse.servers.{size}", lambda: parse(server_pages), rounds=(1 if size > 1000 else 5))
+
+
+class TestRendering:
+    """
+    For measure rendering of tables by commands, output is written to memory.
+    Command modules are imported in tests, so collecting benchmarks doesn't defeat their lazy loading
+    """
+
+    @pytest.mark.parametrize("server_pages", RENDER_SIZES, indirect=True, ids=lambda size: f"{size}")
+    def test_server_list(self, benchmark, server_pages):
+        from hetzner_control.commands import server
+
+        pages = parse(server_pages)
+        size = count(server_pages)
+
+        def render():
+            with mock.patch.object(server, "_handler", StubServerHandler(pages)), \
+                    mock.patch.object(server, "_console", Console(file=io.StringIO(), width=120)):
+                server.get_servers(
+                    concurrency=1, selector=None, name=None, status=None, sort=None, from_cache=False, watch=False,
+                )
+
+        benchmark(f"render.server_list.{size}", render, rounds=(3 if size > 10 else 5))
+
+    def test_watch_view(self, benchmark):
+        from hetzner_control.commands import server
+        from hetzner_control.core.watch import ServerSnapshot
+
+        snapshot = ServerSnapshot()
+        snapshot.update(Server(data) for data in make_servers(2000))
+        changed = make_servers(2000)
+        for data in changed[::100]:
+            data["status"] = "off"
+        diff = snapshot.update(Server(data) for data in changed)
+        recent = {id_: (2, fields) for id_, fields in diff.changed.items()}
+        console = Console(file=io.StringIO(), width=120, height=50)
+
+        benchmark("render.watch_view.2000", lambda: console.print(server._watch_view(snapshot, diff, recent, 2, 2, 43)))
+
+    def test_price_all(self, benchmark):
+        from hetzner_control.commands import price
+
+        data = make_pricing()["pricing"]
+
+        def render():
+            with mock.patch.object(price, "_data", data), \
+                    mock.patch.object(price, "_console", Console(file=io.StringIO(), width=120)):
+                price.get_all_prices()
+
+        benchmark("render.price_all", render)
+
+
+class TestPriceIndex:
+    """
+    For measure building of price index and estimate of many lines
+    """
+
+    def test_estimate(self, benchmark):
+        from hetzner_control.core.price_index import PriceIndex
+
+        pricing = make_pricing()["pricing"]
+        index = PriceIndex(pricing)
+        lines = [
+            ("server", key[1], key[2], 1) for key in index.keys("server")
+        ] * 100 + [("volume", None, None, 10)] * 1000
+
+        benchmark("price.build_index", lambda: PriceIndex(pricing))
+        benchmark("price.estimate", lambda: index.estimate(lines))
+
+    def test_find_server_types(self, benchmark):
+        from hetzner_control.core.models import ServerType
+        from hetzner_control.core.price_index import PriceIndex
+        from hetzner_control.core.server_types import ServerTypeCatalog
+
+        catalog = ServerTypeCatalog(
+            [ServerType(type_) for type_ in make_server_types()], PriceIndex(make_pricing()["pricing"]),
+        )
+
+        def find() -> None:
+            for cores in range(1000):
+                catalog.find(min_cores=cores % 16, min_memory=4, location=("fsn1" if cores % 2 else None))
+
+        benchmark("price.find_server_types.1000", find)
+
+
+class TestPagination:
+    """
+    For measure overhead of following pages through HetznerHandler, HTTP layer is mocked
+    """
+
+    @pytest.fixture(autouse=True)
+    def fresh_transport(self):
+        """
+        Benchmark makes many requests, so it gets its own rate limiter instead of the shared one
+        """
+        HetznerHandler.configure_transport()
+        yield
+        HetznerHandler.configure_transport()
+
+    def test_get_all_servers(self, benchmark, server_pages):
+        def callback(request):
+            page = int(parse_qs(urlparse(request.url).query)["page"][0])
+            return 200, {"Content-Type": "application/json"}, server_pages[page - 1]
+
+        def collect():
+            with responses.RequestsMock() as mocked:
+                mocked.add_callback(responses.GET, "https://api.hetzner.cloud/v1/servers", callback=callback)
+                return ServerHandler().get_all_servers()
+
+        size = count(server_pages)
+        benchmark(f"pagination.servers.{size}", collect, rounds=(1 if size > 1000 else 5))
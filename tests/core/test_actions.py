@@ -0,0 +1,109 @@
+import json
+import os
+from unittest import mock
+
+import pytest
+import responses
+from responses import matchers
+
+from hetzner_control.core.actions import ActionsHandler
+
+
+@pytest.fixture(autouse=True)
+def mock_settings_env_vars():
+    """
+    Mock real environment variable
+    """
+    with mock.patch.dict(os.environ, {"HETZNER_API_TOKEN": "1111"}):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def mock_sleep():
+    """
+    Don't really sleep between polls
+    """
+    with mock.patch("hetzner_control.core.actions.time.sleep") as sleep:
+        yield sleep
+
+
+class TestGetActions:
+    """
+    For test ActionsHandler.get_actions() method
+    """
+    url = "https://api.hetzner.cloud/v1/actions"
+
+    @responses.activate
+    def test_batched_request(self):
+        responses.add(
+            method=responses.GET,
+            url=self.url,
+            json={"actions": [{"id": 1}, {"id": 2}]},
+            status=200,
+            match=[matchers.query_param_matcher({"id": ["1", "2"], "page": "1", "per_page": "50"})]
+        )
+
+        assert [action["id"] for action in ActionsHandler().get_actions([1, 2])] == [1, 2]
+        assert len(responses.calls) == 1
+
+    @responses.activate
+    def test_bad_status(self):
+        responses.add(
+            method=responses.GET,
+            url=self.url,
+            json={"error": {"message": "bad status"}},
+            status=500,
+        )
+
+        with pytest.raises(SystemExit):
+            ActionsHandler().get_actions([1])
+
+
+class TestWaitForActions:
+    """
+    For test ActionsHandler.wait_for_actions() polling
+    """
+    url = "https://api.hetzner.cloud/v1/actions"
+
+    def make_callback(self, finish_after):
+        """
+        Action with ID i finishes on poll number finish_after[i]
+        """
+        polls = {"count": 0}
+
+        def callback(request):
+            polls["count"] += 1
+            ids = request.params["id"]
+            actions = []
+            for id_ in (ids if isinstance(ids, list) else [ids]):
+                finished = polls["count"] >= finish_after[int(id_)]
+                actions.append({
+                    "id": int(id_),
+                    "status": ("success" if finished else "running"),
+                    "progress": (100 if finished else 0),
+                })
+            return 200, {}, json.dumps({"actions": actions})
+        return callback
+
+    @responses.activate
+    def test_one_request_per_poll(self, mock_sleep):
+        responses.add_callback(responses.GET, self.url, callback=self.make_callback({1: 1, 2: 3, 3: 3}))
+
+        actions = ActionsHandler().wait_for_actions([1, 2, 3])
+        assert {action["status"] for action in actions.values()} == {"success"}
+        assert len(responses.calls) == 3
+        assert mock_sleep.call_count == 2
+
+    @responses.activate
+    def test_backoff_without_changes(self, mock_sleep):
+        responses.add_callback(responses.GET, self.url, callback=self.make_callback({1: 5}))
+
+        ActionsHandler().wait_for_actions([1], min_interval=1.0, max_interval=2.0, backoff=1.5)
+        intervals = [call.args[0] for call in mock_sleep.call_args_list]
+        assert intervals == [1.0, 1.5, 2.0, 2.0]
+
+    @responses.activate
+    def test_unknown_action(self):
+        responses.add(method=responses.GET, url=self.url, json={"actions": []}, status=200)
+
+        assert ActionsHandler().wait_for_actions([1]) == {}
@@ -0,0 +1,259 @@
+import asyncio
+import json
+import os
+from unittest import mock
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+from hetzner_control.core.aio import (  # noqa: E402
+    AsyncActionsHandler,
+    AsyncHetznerHandler,
+    AsyncPricingHandler,
+    AsyncServerHandler,
+    AsyncServerTypesHandler,
+)
+from hetzner_control.core import HetznerHandler  # noqa: E402
+from hetzner_control.core.exceptions import APIError  # noqa: E402
+from hetzner_control.core.hooks import Metrics  # noqa: E402
+from hetzner_control.core.ratelimit import RateLimiter  # noqa: E402
+from tests.payloads import make_pricing, make_server, make_server_types  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def mock_settings_env_vars():
+    """
+    Mock real environment variable
+    """
+    with mock.patch.dict(os.environ, {"HETZNER_API_TOKEN": "1111"}):
+        yield
+
+
+def run_with_mock(handler, coroutine_factory):
+    """
+    Run coroutine with shared client, which sends requests to 'handler' instead of network
+    """
+    async def main():
+        AsyncHetznerHandler.configure_client(transport=httpx.MockTransport(handler))
+        try:
+            return await coroutine_factory()
+        finally:
+            await AsyncHetznerHandler.close_client()
+    return asyncio.run(main())
+
+
+class TestAsyncServerHandler:
+    """
+    For test AsyncServerHandler methods for good/bad response
+    """
+
+    def test_get_all_servers_pages(self):
+        def handler(request):
+            assert request.headers["Authorization"] == "Bearer 1111"
+            page = int(request.url.params["page"])
+            return httpx.Response(200, json={
+                "servers": [{"id": page}],
+                "meta": {"pagination": {"next_page": (page + 1 if page < 3 else None)}},
+            })
+
+        resp = run_with_mock(handler, lambda: AsyncServerHandler().get_all_servers())
+        assert [server["id"] for server in resp["servers"]] == [1, 2, 3]
+
+    def test_create_server(self):
+        def handler(request):
+            assert request.method == "POST"
+            assert json.loads(request.content)["name"] == "testing"
+            return httpx.Response(201, json={"server": {"id": 1}})
+
+        resp = run_with_mock(handler, lambda: AsyncServerHandler().create_server(
+            name="testing", image="ubuntu", location="nbg1", server_type="cx11",
+        ))
+        assert resp["server"]["id"] == 1
+
+    def test_concurrent_actions(self):
+        def handler(request):
+            assert request.url.path.endswith("/actions/poweron")
+            return httpx.Response(201, json={"action": {"status": "running"}})
+
+        async def power_on_all():
+            handler_ = AsyncServerHandler()
+            return await asyncio.gather(*(handler_.server_up(id_) for id_ in range(50)))
+
+        resp = run_with_mock(handler, power_on_all)
+        assert len(resp) == 50
+
+    def test_bad_status(self):
+        def handler(request):
+            return httpx.Response(500, json={"error": {"message": "bad status"}})
+
+        with pytest.raises(APIError) as error:
+            run_with_mock(handler, lambda: AsyncServerHandler().get_server(100))
+        assert error.value.status_code == 500
+        assert error.value.message == "bad status"
+
+    def test_delete_returns_action(self):
+        def handler(request):
+            assert request.method == "DELETE"
+            return httpx.Response(200, json={"action": {"id": 7, "status": "running"}})
+
+        resp = run_with_mock(handler, lambda: AsyncServerHandler().delete_server(1))
+        assert resp["action"]["id"] == 7
+
+    def test_update_and_list(self):
+        def handler(request):
+            if request.method == "PUT":
+                assert json.loads(request.content) == {"labels": {"role": "web"}}
+                return httpx.Response(200, json={"server": make_server(1)})
+            assert request.url.params["label_selector"] == "role=web"
+            return httpx.Response(200, json={"servers": [make_server(1), make_server(2)], "meta": {}})
+
+        async def update_and_list():
+            handler_ = AsyncServerHandler()
+            await handler_.update_server(1, {"role": "web"})
+            return [server async for server in handler_.list_servers(label_selector="role=web")]
+
+        servers = run_with_mock(handler, update_and_list)
+        assert [server.id for server in servers] == [1, 2]
+
+    def test_bulk(self):
+        def handler(request):
+            if request.url.path.endswith("/2/actions/shutdown"):
+                return httpx.Response(423, json={"error": {"message": "locked"}})
+            return httpx.Response(201, json={"action": {"id": 1, "status": "running"}})
+
+        async def power_off():
+            return [result async for result in AsyncServerHandler().bulk("server_down", [1, 2, 3], concurrency=2)]
+
+        results = {id_: error for id_, _, error in run_with_mock(handler, power_off)}
+        assert results[1] is None and results[3] is None
+        assert results[2].status_code == 423
+        with pytest.raises(ValueError):
+            AsyncServerHandler().bulk("rebuild", [1])
+
+
+class TestAsyncActionsHandler:
+    """
+    For test AsyncActionsHandler batching and polling
+    """
+
+    def test_batched(self):
+        def handler(request):
+            ids = [int(id_) for id_ in request.url.params.get_list("id")]
+            assert len(ids) <= 50
+            return httpx.Response(200, json={"actions": [{"id": id_, "status": "success"} for id_ in ids], "meta": {}})
+
+        actions = run_with_mock(handler, lambda: AsyncActionsHandler().get_actions(range(120)))
+        assert sorted(action["id"] for action in actions) == list(range(120))
+
+    def test_wait(self):
+        polls = []
+
+        def handler(request):
+            polls.append(1)
+            status = "success" if len(polls) > 2 else "running"
+            ids = [int(id_) for id_ in request.url.params.get_list("id")]
+            return httpx.Response(200, json={"actions": [{"id": id_, "status": status} for id_ in ids], "meta": {}})
+
+        actions = run_with_mock(handler, lambda: AsyncActionsHandler().wait_for_actions([1, 2], min_interval=0.01))
+        assert {action["status"] for action in actions.values()} == {"success"}
+        assert len(polls) == 3
+
+
+class TestAsyncRateLimit:
+    """
+    For test that async requests share RateLimiter of HetznerHandler transport
+    """
+
+    @pytest.fixture
+    def limiter(self):
+        """
+        Fresh transport with fast refilling rate limiter
+        """
+        limiter = RateLimiter(limit=100, period=1.0)
+        HetznerHandler.configure_transport(rate_limiter=limiter)
+        yield limiter
+        HetznerHandler.configure_transport()
+
+    def test_throttled_post_is_repeated(self, limiter):
+        calls = []
+
+        def handler(request):
+            calls.append(request.method)
+            if len(calls) == 1:
+                return httpx.Response(429, headers={"Retry-After": "0"}, json={"error": {"message": "slow down"}})
+            return httpx.Response(201, json={"action": {"id": 1, "status": "running"}})
+
+        resp = run_with_mock(handler, lambda: AsyncServerHandler().server_up(1))
+        assert resp["action"]["id"] == 1
+        assert calls == ["POST", "POST"]
+
+    def test_budget_from_headers(self, limiter):
+        def handler(request):
+            return httpx.Response(200, headers={
+                "RateLimit-Limit": "100", "RateLimit-Remaining": "3", "RateLimit-Reset": "9999999999",
+            }, json={"server": {"id": 1}})
+
+        run_with_mock(handler, lambda: AsyncServerHandler().get_server(1))
+        assert limiter.tokens <= 3
+
+    def test_waits_for_token(self, limiter):
+        limiter.tokens = 0.0
+
+        def handler(request):
+            return httpx.Response(200, json={"server": {"id": 1}})
+
+        async def get_both():
+            handler_ = AsyncServerHandler()
+            return await asyncio.gather(handler_.get_server(1), handler_.get_server(2))
+
+        assert len(run_with_mock(handler, get_both)) == 2
+        assert limiter.tokens < 1
+
+
+class TestAsyncPricingHandler:
+    """
+    For test AsyncPricingHandler.get_all_prices() method
+    """
+
+    def test_good_status(self):
+        def handler(request):
+            assert request.url.path == "/v1/pricing"
+            return httpx.Response(200, json={"pricing": {}})
+
+        resp = run_with_mock(handler, lambda: AsyncPricingHandler().get_all_prices())
+        assert resp == {"pricing": {}}
+
+    def test_catalog(self):
+        def handler(request):
+            if request.url.path == "/v1/pricing":
+                return httpx.Response(200, json=make_pricing())
+            return httpx.Response(200, json={"server_types": make_server_types(), "meta": {}})
+
+        async def both():
+            pricing = AsyncPricingHandler()
+            index = await pricing.get_price_index()
+            assert await pricing.get_price_index() is index
+            return await AsyncServerTypesHandler().get_catalog()
+
+        catalog = run_with_mock(handler, both)
+        assert catalog.locations() and catalog.find()
+
+
+class TestAsyncMetrics:
+    """
+    For test that async Handlers notify hooks shared with HetznerHandler
+    """
+
+    def test_metrics(self):
+        def handler(request):
+            return httpx.Response(200, json={"server": {"id": 1}})
+
+        metrics = Metrics()
+        HetznerHandler.configure_metrics(metrics)
+        try:
+            run_with_mock(handler, lambda: AsyncServerHandler().get_server(1))
+        finally:
+            HetznerHandler.configure_metrics(None)
+
+        assert metrics.snapshot()["GET /v1/servers/{id}"]["requests"] == {"200": 1}
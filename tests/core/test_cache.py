@@ -0,0 +1,98 @@
+import os
+import time
+from unittest import mock
+
+import pytest
+import responses
+from responses import matchers
+
+from hetzner_control.core import HetznerHandler
+from hetzner_control.core.cache import ResponseCache
+from hetzner_control.core.pricing import PricingHandler
+
+
+@pytest.fixture(autouse=True)
+def mock_settings_env_vars():
+    """
+    Mock real environment variable
+    """
+    with mock.patch.dict(os.environ, {"HETZNER_API_TOKEN": "1111"}):
+        yield
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """
+    Enable on-disk cache in temporary directory for test duration
+    """
+    cache = ResponseCache(directory=str(tmp_path))
+    HetznerHandler.configure_cache(cache)
+    yield cache
+    HetznerHandler.configure_cache(None)
+
+
+class TestCachedGet:
+    """
+    For test HetznerHandler._cached_get() through PricingHandler.get_all_prices()
+    """
+    url = "https://api.hetzner.cloud/v1/pricing"
+
+    @responses.activate
+    def test_fresh_entry_without_request(self, cache):
+        responses.add(method=responses.GET, url=self.url, json={"pricing": 1}, status=200)
+
+        assert PricingHandler().get_all_prices() == {"pricing": 1}
+        assert PricingHandler().get_all_prices() == {"pricing": 1}
+        assert len(responses.calls) == 1
+
+    @responses.activate
+    def test_revalidate_expired_entry(self, cache):
+        responses.add(
+            method=responses.GET, url=self.url, json={"pricing": 1}, status=200,
+            headers={"ETag": '"v1"'},
+        )
+        PricingHandler().get_all_prices()
+
+        responses.replace(
+            method_or_response=responses.GET, url=self.url, status=304,
+            match=[matchers.header_matcher({"If-None-Match": '"v1"'})]
+        )
+        with mock.patch.object(time, "time", return_value=time.time() + PricingHandler.cache_ttl + 1):
+            assert PricingHandler().get_all_prices() == {"pricing": 1}
+        assert len(responses.calls) == 2
+
+    @responses.activate
+    def test_refresh(self, cache):
+        responses.add(method=responses.GET, url=self.url, json={"pricing": 1}, status=200)
+        PricingHandler().get_all_prices()
+
+        cache.refresh = True
+        responses.replace(method_or_response=responses.GET, url=self.url, json={"pricing": 2}, status=200)
+        assert PricingHandler().get_all_prices() == {"pricing": 2}
+
+    @responses.activate
+    def test_key_depends_on_token(self, cache):
+        responses.add(method=responses.GET, url=self.url, json={"pricing": 1}, status=200)
+        PricingHandler().get_all_prices()
+
+        with mock.patch.dict(os.environ, {"HETZNER_API_TOKEN": "2222"}):
+            PricingHandler().get_all_prices()
+        assert len(responses.calls) == 2
+
+    @responses.activate
+    def test_broken_entry(self, cache):
+        responses.add(method=responses.GET, url=self.url, json={"pricing": 1}, status=200)
+        key = cache.make_key(self.url, "Bearer 1111")
+        cache.directory.mkdir(parents=True, exist_ok=True)
+        (cache.directory / f"{key}.json").write_text("{broken")
+
+        assert PricingHandler().get_all_prices() == {"pricing": 1}
+        assert cache.load(key)["body"] == {"pricing": 1}
+
+    @responses.activate
+    def test_without_cache(self):
+        responses.add(method=responses.GET, url=self.url, json={"pricing": 1}, status=200)
+
+        PricingHandler().get_all_prices()
+        PricingHandler().get_all_prices()
+        assert len(responses.calls) == 2
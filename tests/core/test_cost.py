@@ -0,0 +1,100 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from hetzner_control.core.cost import BYTES_PER_TB, FleetCost, month_progress
+from hetzner_control.core.models import Server
+from hetzner_control.core.price_index import PriceIndex
+from tests.payloads import VAT_RATE, make_pricing, make_server
+
+# the middle of 30-day month
+NOW = datetime(2022, 6, 16, 0, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def index() -> PriceIndex:
+    """
+    Index of synthetic /pricing response
+    """
+    return PriceIndex(make_pricing()["pricing"])
+
+
+def server(id_: int, **fields) -> Server:
+    data = make_server(id_)
+    data.update(fields)
+    return Server(data)
+
+
+class TestMonthProgress:
+    """
+    For test share of month used to project traffic
+    """
+
+    def test_middle(self):
+        assert month_progress(NOW) == pytest.approx(0.5)
+
+    def test_first_hour(self):
+        assert month_progress(datetime(2022, 2, 1, tzinfo=timezone.utc)) == pytest.approx(1 / (28 * 24))
+
+
+class TestFleetCost:
+    """
+    For test FleetCost totals and groups
+    """
+
+    def test_server_price_in_its_location(self, index):
+        # server 3 is cpx21 in ash without backups
+        cost = FleetCost(index, now=NOW)
+
+        line = cost.server_cost(server(3))
+
+        assert line.monthly_net == pytest.approx(7.05)
+        assert line.hourly_gross == pytest.approx(index.get("server", "cpx21", "ash").hourly_gross)
+        assert line.backup_gross == 0.0
+
+    def test_unpriced_location(self, index):
+        # cpx21 has prices in other locations only
+        cost = FleetCost(index, now=NOW)
+
+        line = cost.add(server(3, datacenter={"name": "mars1-dc1", "location": {"name": "mars1"}}))
+
+        assert line.unpriced == 1
+        assert line.monthly_gross == 0.0
+        assert cost.total.unpriced == 1
+        assert cost.by_location["mars1"].unpriced == 1
+
+    def test_backup_surcharge(self, index):
+        cost = FleetCost(index, now=NOW)
+
+        line = cost.server_cost(server(4))
+
+        assert line.backup_gross == pytest.approx(8.21 * 0.2 * (1 + VAT_RATE))
+        assert line.monthly_net == pytest.approx(8.21 * 1.2)
+
+    def test_traffic_overage(self, index):
+        cost = FleetCost(index, now=NOW)
+
+        # 11 TB in half of month is 22 TB projected, 2 TB over included 20 TB
+        line = cost.server_cost(server(
+            3, outgoing_traffic=11 * BYTES_PER_TB, ingoing_traffic=50 * BYTES_PER_TB, included_traffic=20 * BYTES_PER_TB,
+        ))
+
+        assert line.overage_tb == pytest.approx(2)
+        assert line.monthly_net == pytest.approx(7.05 + 2 * 1.0)
+
+    def test_groups(self, index):
+        cost = FleetCost(index, now=NOW)
+        cost.add_many(server(id_) for id_ in range(1, 13))
+
+        assert cost.total.servers == 12
+        assert sum(line.servers for line in cost.by_location.values()) == 12
+        assert sum(line.monthly_gross for line in cost.by_type.values()) == pytest.approx(cost.total.monthly_gross)
+        # every server has 'env' and 'role' labels
+        assert sum(line.servers for line in cost.by_label.values()) == 24
+        assert cost.by_label["env=dev"].servers == 4
+
+    def test_label_key(self, index):
+        cost = FleetCost(index, label_key="role", now=NOW)
+        cost.add_many([server(1), server(2, labels={})])
+
+        assert set(cost.by_label) == {"db", "-"}
@@ -0,0 +1,128 @@
+import os
+import time
+from unittest import mock
+
+import pytest
+
+from hetzner_control.core import HetznerHandler
+from hetzner_control.core.actions import ActionsHandler
+from hetzner_control.core.datacenters import DatacenterHandler
+from hetzner_control.core.pricing import PricingHandler
+from hetzner_control.core.retry import RetryPolicy
+from hetzner_control.core.server import ServerHandler
+from hetzner_control.core.server_types import ServerTypesHandler
+from tests.fake_api import FakeHetznerAPI
+
+
+@pytest.fixture
+def fake_api():
+    """
+    Running fake API with 120 servers, Handlers are pointed to it with HETZNER_API_URL
+    """
+    with FakeHetznerAPI(servers=120, token="1111") as api:
+        with mock.patch.dict(os.environ, {"HETZNER_API_TOKEN": "1111", "HETZNER_API_URL": api.url}):
+            yield api
+
+
+@pytest.fixture(autouse=True)
+def fresh_transport():
+    """
+    Every test gets its own rate limiter and fast retries instead of the shared transport
+    """
+    HetznerHandler.configure_transport(retry_policy=RetryPolicy(max_retries=3, backoff_factor=0))
+    yield
+    HetznerHandler.configure_transport()
+
+
+class TestReadEndpoints:
+    """
+    For test paginated and reference endpoints end-to-end
+    """
+
+    def test_all_servers(self, fake_api):
+        servers = ServerHandler().get_all_servers()["servers"]
+
+        assert [server["id"] for server in servers] == list(range(1, 121))
+        assert fake_api.stats["requests"] == 3
+
+    def test_prefetch_pages(self, fake_api):
+        fake_api.latency = 0.05
+        pages = list(ServerHandler().iter_server_pages(per_page=10, concurrency=4))
+
+        assert [server["id"] for page in pages for server in page] == list(range(1, 121))
+        assert fake_api.max_in_flight > 1
+
+    def test_filters(self, fake_api):
+        servers = list(ServerHandler().iter_servers(label_selector="role=db,env!=dev", sort=["name:desc"]))
+
+        assert servers
+        assert all(server["labels"] == {"role": "db", "env": "prod"} for server in servers)
+        assert [server["name"] for server in servers] == sorted((server["name"] for server in servers), reverse=True)
+
+    def test_reference_data(self, fake_api):
+        assert PricingHandler().get_all_prices()["pricing"]["currency"] == "EUR"
+        assert len(ServerTypesHandler().list_server_types()) == len(fake_api.server_types)
+        assert len(DatacenterHandler().list_datacenters()) == len(fake_api.datacenters)
+
+
+class TestFaults:
+    """
+    For test retries and throttling against injected errors and rate limit
+    """
+
+    def test_retry_errors(self, fake_api):
+        fake_api.error_rate = 0.3
+        servers = list(ServerHandler().iter_servers(per_page=10))
+
+        assert len(servers) == 120
+        assert fake_api.stats["errors"] > 0
+        assert HetznerHandler.get_transport().stats.retries == fake_api.stats["errors"]
+
+    def test_throttling(self, fake_api):
+        fake_api.rate_limit = 5
+        fake_api.rate_period = 0.5
+        fake_api._tokens = 5
+        servers = list(ServerHandler().iter_servers(per_page=10))
+
+        assert len(servers) == 120
+        assert fake_api.stats["status_200"] == 12
+
+    def test_bad_token(self, fake_api):
+        with mock.patch.dict(os.environ, {"HETZNER_API_TOKEN": "2222"}):
+            with pytest.raises(SystemExit):
+                ServerHandler().get_server(1)
+
+
+class TestActions:
+    """
+    For test bulk operations and waiting for their actions end-to-end
+    """
+
+    def test_bulk_and_wait(self, fake_api):
+        fake_api.action_duration = 0.2
+        fake_api.action_error_rate = 0.1
+        results = list(ServerHandler().bulk("server_down", range(1, 41), concurrency=8))
+        action_ids = [data["action"]["id"] for _, data, error in results]
+
+        actions = ActionsHandler().wait_for_actions(action_ids, min_interval=0.05)
+
+        assert len(actions) == 40
+        assert {action["status"] for action in actions.values()} <= {"success", "error"}
+        succeeded = [action["resources"][0]["id"] for action in actions.values() if action["status"] == "success"]
+        assert all(fake_api.servers[id_]["status"] == "off" for id_ in succeeded)
+
+    def test_status_changes_without_polling(self, fake_api):
+        fake_api.action_duration = 0.1
+        ServerHandler().server_down(1)
+        assert fake_api.servers[1]["status"] == "running"
+
+        time.sleep(0.15)
+
+        assert ServerHandler().get_server(1)["server"]["status"] == "off"
+
+    def test_create_and_delete(self, fake_api):
+        created = ServerHandler().create_server(name="new", image="ubuntu-20.04", location="fsn1", server_type="cx11")
+        ServerHandler().delete_server(created["server"]["id"])
+
+        assert created["server"]["id"] == 121
+        assert 121 not in fake_api.servers
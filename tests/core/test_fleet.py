@@ -0,0 +1,213 @@
+import os
+from unittest import mock
+
+import pytest
+
+from hetzner_control.core import HetznerHandler, fleet
+from hetzner_control.core.actions import ActionsHandler
+from hetzner_control.core.fleet import FleetSpec, action_ids, execute_plan, load_fleet, plan_fleet
+from hetzner_control.core.models import Server
+from hetzner_control.core.retry import RetryPolicy
+from hetzner_control.core.server import ServerHandler
+from tests.fake_api import FakeHetznerAPI
+from tests.payloads import make_server
+
+FLEET = """
+fleet: staging
+defaults:
+  image: ubuntu-20.04
+  location: fsn1
+  labels: {env: staging}
+groups:
+  web:
+    count: 3
+    server_type: cpx21
+    labels: {role: web}
+  worker:
+    count: 2
+    server_type: cx31
+    status: off
+"""
+
+
+def member(id_: int, group: str, **fields) -> Server:
+    """
+    Server of fleet 'staging' created as fleet file describes it, fields override json of server
+    """
+    data = make_server(id_)
+    data.update(
+        name=f"staging-{group}-{id_}",
+        status="running" if group == "web" else "off",
+        labels={"env": "staging", "fleet": "staging", "fleet-group": group, **({"role": "web"} if group == "web" else {})},
+    )
+    data["server_type"] = {**data["server_type"], "name": "cpx21" if group == "web" else "cx31"}
+    data["datacenter"] = {**data["datacenter"], "location": {"name": "fsn1"}}
+    data.update(fields)
+    return Server(data)
+
+
+@pytest.fixture
+def spec() -> FleetSpec:
+    return load_fleet(FLEET)
+
+
+class TestFleetSpec:
+    """
+    For test parsing and validation of fleet file
+    """
+
+    def test_defaults(self, spec):
+        web, worker = spec.groups["web"], spec.groups["worker"]
+
+        assert spec.selector == "fleet=staging"
+        assert (web.count, web.server_type, web.location, web.image) == (3, "cpx21", "fsn1", "ubuntu-20.04")
+        assert web.server_labels("staging") == {"env": "staging", "role": "web", "fleet": "staging", "fleet-group": "web"}
+        # unquoted off is boolean in YAML
+        assert worker.status == "off"
+        assert worker.labels == {"env": "staging"}
+
+    @pytest.mark.parametrize("text, message", [
+        ("- web", "mapping"),
+        ("fleet: 'bad name'", "'fleet'"),
+        ("fleet: a\nservers: {}", "unknown fields"),
+        ("fleet: a\ngroups: {web: {count: 1, location: fsn1, image: x}}", "groups.web.server_type"),
+        ("fleet: a\ngroups: {web: {count: -1, server_type: cx11, location: fsn1, image: x}}", "count"),
+        ("fleet: a\ngroups: {web: {status: rebooting, server_type: cx11, location: fsn1, image: x}}", "status"),
+        ("fleet: a\ngroups: {web: {labels: {fleet: b}, server_type: cx11, location: fsn1, image: x}}", "labels"),
+        ("fleet: a\ngroups: {web: {name: web, server_type: cx11, location: fsn1, image: x}}", "{index}"),
+        ("fleet: a\ngroups: {web: {name: '{host}-{index}', server_type: cx11, location: fsn1, image: x}}", "template"),
+        ("fleet: [", "invalid YAML"),
+    ])
+    def test_invalid(self, text, message):
+        with pytest.raises(ValueError, match=message.replace("{", r"\{").replace("}", r"\}")):
+            load_fleet(text)
+
+    def test_json_without_yaml(self, monkeypatch):
+        monkeypatch.setattr(fleet, "yaml", None)
+
+        spec = load_fleet('{"fleet": "a", "groups": {"web": {"server_type": "cx11", "location": "fsn1", "image": "x"}}}')
+        assert spec.groups["web"].count == 1
+        with pytest.raises(ImportError, match=r"hetzner-control\[apply\]"):
+            load_fleet(FLEET)
+
+
+class TestPlan:
+    """
+    For test diff of fleet file with live servers
+    """
+
+    def test_converged(self, spec):
+        servers = [member(1, "web"), member(2, "web"), member(3, "web"), member(4, "worker"), member(5, "worker")]
+        plan = plan_fleet(spec, servers)
+
+        assert not plan
+        assert plan.unchanged == 5
+
+    def test_create_from_scratch(self, spec):
+        plan = plan_fleet(spec, [Server(make_server(1))])
+
+        assert plan.counts() == {"delete": 0, "stop": 0, "start": 0, "label": 0, "create": 5}
+        assert [change.name for change in plan.changes] == [
+            "staging-web-1", "staging-web-2", "staging-web-3", "staging-worker-1", "staging-worker-2",
+        ]
+
+    def test_scale_and_power(self, spec):
+        spec.groups["web"].count = 1
+        servers = [
+            member(1, "web"), member(2, "web"), member(3, "web"),
+            member(4, "worker", status="running"),
+            member(5, "db"),
+        ]
+        plan = plan_fleet(spec, servers)
+
+        deleted = [(change.server_id, change.detail) for change in plan.changes if change.kind == "delete"]
+        assert deleted == [(5, "group removed"), (2, "scale down"), (3, "scale down")]
+        assert [(change.kind, change.server_id) for change in plan.changes if change.kind != "delete"] == [
+            ("stop", 4), ("create", None),
+        ]
+        # created server doesn't reuse names of existing servers
+        assert plan.changes[-1].name == "staging-worker-1"
+
+    def test_labels(self, spec):
+        servers = [member(1, "web", labels={"fleet": "staging", "fleet-group": "web"})]
+        plan = plan_fleet(spec, servers)
+
+        assert [(change.kind, change.server_id) for change in plan.changes][0] == ("label", 1)
+
+    def test_drift(self, spec):
+        servers = [member(1, "web"), member(2, "web"), member(3, "web", server_type=make_server(1)["server_type"])]
+        plan = plan_fleet(spec, servers)
+
+        assert [change.server_id for change in plan.drift] == [3]
+        assert plan.drift[0].detail == "type cpx11 -> cpx21"
+        assert not [change for change in plan.changes if change.group == "web"]
+
+        plan = plan_fleet(spec, servers, replace=True)
+        web = [(change.kind, change.server_id) for change in plan.changes if change.group == "web"]
+        assert web == [("delete", 3), ("create", None)]
+        assert not plan.drift
+
+    def test_without_group_label(self, spec):
+        servers = [member(1, "web", labels={"fleet": "staging"})]
+
+        for replace in (False, True):
+            plan = plan_fleet(spec, servers, replace=replace)
+            assert [(change.server_id, change.detail) for change in plan.drift] == [(1, "no 'fleet-group' label")]
+            assert not [change for change in plan.changes if change.kind != "create"]
+
+    def test_other_fleets_ignored(self, spec):
+        servers = [member(1, "web", labels={"fleet": "prod", "fleet-group": "web"})]
+        plan = plan_fleet(spec, servers)
+
+        assert not [change for change in plan.changes if change.kind != "create"]
+
+
+class TestExecute:
+    """
+    For test executing plans against fake API end-to-end
+    """
+
+    @pytest.fixture
+    def fake_api(self):
+        """
+        Running fake API with 10 servers outside of fleet, Handlers are pointed to it with HETZNER_API_URL
+        """
+        HetznerHandler.configure_transport(retry_policy=RetryPolicy(max_retries=3, backoff_factor=0))
+        with FakeHetznerAPI(servers=10, token="1111") as api:
+            with mock.patch.dict(os.environ, {"HETZNER_API_TOKEN": "1111", "HETZNER_API_URL": api.url}):
+                yield api
+        HetznerHandler.configure_transport()
+
+    def apply(self, spec: FleetSpec, **kwargs) -> list:
+        handler = ServerHandler()
+        plan = plan_fleet(spec, handler.list_servers(label_selector=spec.selector), **kwargs)
+        results = list(execute_plan(handler, plan, concurrency=4))
+        started = [id_ for _, data, _ in results for id_ in action_ids(data)]
+        ActionsHandler().wait_for_actions(started, min_interval=0.01)
+        return results
+
+    def test_apply_converges(self, fake_api, spec):
+        fake_api.latency = 0.01
+        results = self.apply(spec)
+
+        assert len(results) == 5
+        assert all(error is None for _, _, error in results)
+        assert fake_api.max_in_flight > 1
+        fleet_servers = [server for server in fake_api.servers.values() if server["labels"].get("fleet") == "staging"]
+        assert sorted(server["status"] for server in fleet_servers) == ["off", "off", "running", "running", "running"]
+        assert not plan_fleet(spec, ServerHandler().list_servers(label_selector=spec.selector))
+
+        spec.groups["web"].count = 1
+        spec.groups["worker"].labels = {"env": "test"}
+        results = self.apply(spec)
+
+        assert sorted(change.kind for change, _, _ in results) == ["delete", "delete", "label", "label"]
+        assert len(fake_api.servers) == 13
+        assert not plan_fleet(spec, ServerHandler().list_servers(label_selector=spec.selector))
+
+    def test_failed_change(self, fake_api, spec):
+        fake_api.servers[1]["name"] = "staging-web-1"
+        results = {change.name: error for change, _, error in self.apply(spec)}
+
+        assert results["staging-web-1"].status_code == 409
+        assert results["staging-web-2"] is None
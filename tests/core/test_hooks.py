@@ -0,0 +1,168 @@
+import os
+from unittest import mock
+
+import pytest
+import requests
+import responses
+
+from hetzner_control.core import HetznerHandler
+from hetzner_control.core.hooks import REQUEST_END, REQUEST_START, RETRY, THROTTLE, Hooks, Metrics
+from hetzner_control.core.retry import RetryPolicy
+from hetzner_control.core.server import ServerHandler
+
+
+@pytest.fixture(autouse=True)
+def mock_settings_env_vars():
+    """
+    Mock real environment variable
+    """
+    with mock.patch.dict(os.environ, {"HETZNER_API_TOKEN": "1111"}):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def fast_transport():
+    """
+    Shared transport with retries, but without real backoff delays
+    """
+    transport = HetznerHandler.configure_transport(retry_policy=RetryPolicy(max_retries=2, backoff_factor=0))
+    yield transport
+    HetznerHandler.configure_transport()
+
+
+@pytest.fixture
+def events():
+    """
+    Record every event of shared hooks as (event, data)
+    """
+    recorded = []
+    hooks = HetznerHandler.get_hooks()
+    callbacks = {event: (lambda event=event, **data: recorded.append((event, data))) for event in
+                 (REQUEST_START, REQUEST_END, RETRY, THROTTLE)}
+    for event, callback in callbacks.items():
+        hooks.register(event, callback)
+    yield recorded
+    for event, callback in callbacks.items():
+        hooks.unregister(event, callback)
+
+
+class TestHooks:
+    """
+    For test registering of callbacks
+    """
+
+    def test_active(self):
+        hooks = Hooks()
+        callback = hooks.register(REQUEST_END, lambda **data: None)
+        assert hooks.active
+
+        hooks.unregister(REQUEST_END, callback)
+        assert not hooks.active
+
+    def test_unknown_event(self):
+        with pytest.raises(ValueError):
+            Hooks().register("response", lambda **data: None)
+
+    def test_shared_hooks_inactive_by_default(self):
+        assert not HetznerHandler.get_hooks().active
+
+
+class TestRequestEvents:
+    """
+    For test events emitted by HetznerHandler and Transport
+    """
+    url = "https://api.hetzner.cloud/v1/servers"
+
+    @responses.activate
+    def test_start_and_end(self, events):
+        responses.add(responses.GET, f"{self.url}/1", json={"server": {}})
+
+        ServerHandler().get_server(1)
+
+        assert [event for event, _ in events] == [REQUEST_START, REQUEST_END]
+        end = events[1][1]
+        assert end["status"] == 200
+        assert end["bytes"] == len(b'{"server": {}}')
+        assert end["error"] is None
+
+    @responses.activate
+    def test_retry(self, events):
+        responses.add(responses.GET, f"{self.url}/1", json={}, status=503)
+        responses.add(responses.GET, f"{self.url}/1", json={"server": {}})
+
+        ServerHandler().get_server(1)
+
+        retry = [data for event, data in events if event == RETRY]
+        assert len(retry) == 1
+        assert retry[0]["status"] == 503
+        assert retry[0]["attempt"] == 1
+        assert events[-1][1]["retries"] == 1
+
+    @responses.activate
+    def test_retries_exhausted(self, events, fast_transport):
+        fast_transport.retry_policy = RetryPolicy(max_retries=2, backoff_factor=0.001, jitter=False)
+        responses.add(responses.GET, f"{self.url}/1", body=requests.ConnectionError("reset"))
+
+        with pytest.raises(SystemExit):
+            ServerHandler().get_server(1)
+
+        end = events[-1]
+        assert end[0] == REQUEST_END
+        assert end[1]["retries"] == 2
+        assert end[1]["backoff_time"] == pytest.approx(0.003)
+        assert isinstance(end[1]["error"], requests.ConnectionError)
+
+    @responses.activate
+    def test_throttle(self, events):
+        responses.add(responses.GET, f"{self.url}/1", json={}, status=429, headers={"Retry-After": "0"})
+        responses.add(responses.GET, f"{self.url}/1", json={"server": {}})
+
+        ServerHandler().get_server(1)
+
+        assert [data["delay"] for event, data in events if event == THROTTLE] == [0.0]
+
+
+class TestMetrics:
+    """
+    For test counters and histograms collected by Metrics
+    """
+
+    @pytest.fixture
+    def metrics(self):
+        metrics = Metrics()
+        HetznerHandler.configure_metrics(metrics)
+        yield metrics
+        HetznerHandler.configure_metrics(None)
+
+    @responses.activate
+    def test_snapshot(self, metrics):
+        url = "https://api.hetzner.cloud/v1/servers"
+        responses.add(responses.GET, f"{url}/1", json={}, status=503)
+        responses.add(responses.GET, f"{url}/1", json={"server": {}})
+        responses.add(responses.GET, f"{url}/2", json={"error": {"message": "not found"}}, status=404)
+
+        ServerHandler().get_server(1)
+        with pytest.raises(SystemExit):
+            ServerHandler().get_server(2)
+
+        entry = metrics.snapshot()["GET /v1/servers/{id}"]
+        assert entry["requests"] == {"200": 1, "404": 1}
+        assert entry["retries"] == 1
+        assert entry["latency_count"] == 2
+        assert entry["latency_buckets"][float("inf")] == 2
+
+    def test_prometheus(self):
+        metrics = Metrics()
+        metrics.on_request_end("GET", "https://x/v1/servers?page=1", status=200, latency=0.02, bytes=100)
+
+        text = metrics.to_prometheus()
+
+        assert 'hetzner_api_requests_total{method="GET",endpoint="/v1/servers",status="200"} 1' in text
+        assert 'hetzner_api_request_duration_seconds_bucket{method="GET",endpoint="/v1/servers",le="0.01"} 0' in text
+        assert 'hetzner_api_request_duration_seconds_bucket{method="GET",endpoint="/v1/servers",le="0.025"} 1' in text
+        assert 'hetzner_api_request_duration_seconds_count{method="GET",endpoint="/v1/servers"} 1' in text
+
+    def test_detached(self, metrics):
+        HetznerHandler.configure_metrics(None)
+
+        assert not HetznerHandler.get_hooks().active
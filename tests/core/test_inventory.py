@@ -0,0 +1,166 @@
+import pytest
+
+from hetzner_control.core.inventory import Inventory
+from tests.payloads import make_datacenters, make_pricing, make_server_types, make_servers
+
+
+@pytest.fixture
+def inventory(tmp_path):
+    """
+    Inventory in temporary directory, synced with 30 servers
+    """
+    with Inventory(path=str(tmp_path / "inventory.sqlite")) as inventory:
+        inventory.sync(
+            make_servers(30),
+            server_types=make_server_types(),
+            datacenters=make_datacenters(),
+            pricing=make_pricing()["pricing"],
+            now=1000.0,
+        )
+        yield inventory
+
+
+class TestSync:
+    """
+    For test incremental Inventory.sync()
+    """
+
+    def test_first_sync(self, inventory):
+        assert inventory.last_sync() == 1000.0
+        assert len(inventory.list_servers()) == 30
+        assert inventory.connection.execute("SELECT COUNT(*) FROM prices").fetchone()[0] > 0
+
+    def test_incremental(self, inventory):
+        servers = make_servers(28) + make_servers(1, start=31)
+        servers[0]["status"] = "off"
+
+        result = inventory.sync(servers, now=2000.0)
+
+        assert (result.added, result.updated, result.deleted, result.unchanged) == (1, 1, 2, 27)
+        assert [server.id for server in inventory.list_servers()][-3:] == [27, 28, 31]
+        assert len(inventory.list_servers(deleted=True)) == 31
+        events = inventory.events()
+        assert events[0][2] == 2000.0
+        assert {(row[0], row[3]) for row in events if row[2] == 2000.0} == {
+            (1, "status"), (29, "deleted"), (30, "deleted"), (31, "created"),
+        }
+
+    def test_price_of_other_location_not_stored(self, inventory):
+        server = make_servers(1, start=31)[0]
+        server["server_type"]["prices"] = [
+            price for price in server["server_type"]["prices"] if price["location"] != server["datacenter"]["location"]["name"]
+        ]
+
+        inventory.sync([server], now=2000.0)
+
+        row = inventory.connection.execute("SELECT price_monthly_gross FROM servers WHERE id = 31").fetchone()
+        assert row[0] is None
+
+    def test_traffic_isnt_change(self, inventory):
+        servers = make_servers(30)
+        for server in servers:
+            server["outgoing_traffic"] += 1024 ** 3
+
+        result = inventory.sync(servers, now=2000.0)
+
+        assert (result.updated, result.unchanged) == (0, 30)
+        row = inventory.connection.execute("SELECT outgoing_traffic, updated_at FROM servers WHERE id = 2").fetchone()
+        assert row == (servers[1]["outgoing_traffic"], 1000.0)
+
+    def test_restored(self, inventory):
+        inventory.sync(make_servers(29), now=2000.0)
+
+        result = inventory.sync(make_servers(30), now=3000.0)
+
+        assert result.added == 1
+        assert inventory.events(server_id=30, limit=1)[0][3] == "restored"
+
+    def test_failed_listing(self, inventory):
+        def listing():
+            yield from make_servers(5)
+            raise SystemExit(1)
+
+        with pytest.raises(SystemExit):
+            inventory.sync(listing(), now=2000.0)
+
+        assert len(inventory.list_servers()) == 30
+        assert inventory.last_sync() == 1000.0
+
+
+class TestListServers:
+    """
+    For test filters of Inventory.list_servers()
+    """
+
+    @pytest.mark.parametrize("selector, expected", [
+        ("env=dev", 10),
+        ("env!=dev", 20),
+        ("role in (web, db)", 20),
+        ("role notin (web)", 20),
+        ("env=prod,role=db", 10),
+        ("env=dev,role=db", 0),
+        ("owner", 0),
+        ("!owner", 30),
+    ])
+    def test_label_selector(self, inventory, selector, expected):
+        assert len(inventory.list_servers(label_selector=selector)) == expected
+
+    def test_status_and_sort(self, inventory):
+        servers = inventory.list_servers(status=["off"], sort=["name:desc"])
+
+        assert {server.status for server in servers} == {"off"}
+        assert [server.name for server in servers] == sorted((server.name for server in servers), reverse=True)
+
+    def test_bad_sort(self, inventory):
+        with pytest.raises(ValueError):
+            inventory.list_servers(sort=["data"])
+
+
+class TestQuery:
+    """
+    For test filtering and aggregation of Inventory.query()
+    """
+
+    def test_group_by(self, inventory):
+        names, rows = inventory.query(
+            group_by=["location"], aggregates=["count", "sum:price_monthly_gross"], sort=["location"],
+        )
+
+        assert names == ["location", "count", "sum:price_monthly_gross"]
+        assert [row[0] for row in rows] == ["ash", "fsn1", "hel1", "nbg1"]
+        assert sum(row[1] for row in rows) == 30
+
+    def test_where_and_label_column(self, inventory):
+        names, rows = inventory.query(
+            columns=["id", "label:role"], where=["cores>=8", "label:env=prod"], sort=["id:desc"], limit=2,
+        )
+
+        assert names == ["id", "label:role"]
+        assert len(rows) == 2
+        assert rows[0][0] > rows[1][0]
+
+    def test_prefixed_label_key(self, inventory):
+        names, rows = inventory.query(columns=["id", "label:example.com/team"], where=["label:example.com/team=x"])
+
+        assert names == ["id", "label:example.com/team"]
+        assert rows == []
+
+    def test_substring_is_literal(self, inventory):
+        assert len(inventory.query(columns=["id"], where=["name~server-1"])[1]) == 11
+        # LIKE wildcards in value match only themselves
+        assert inventory.query(columns=["id"], where=["name~%"])[1] == []
+        assert inventory.query(columns=["id"], where=["name~server_1"])[1] == []
+
+    @pytest.mark.parametrize("kwargs", [
+        {"columns": ["data"]},
+        {"where": ["cores>=many"]},
+        {"where": ["1=1; DROP TABLE servers"]},
+        {"aggregates": ["sum"]},
+        {"sort": ["price"]},
+        {"group_by": ['label:a" , sqlite_version() AS "v']},
+        {"columns": ['label:a"']},
+        {"aggregates": ["max:label:a) FROM servers --"]},
+    ])
+    def test_rejected(self, inventory, kwargs):
+        with pytest.raises(ValueError):
+            inventory.query(**kwargs)
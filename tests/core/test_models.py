@@ -0,0 +1,94 @@
+import pytest
+
+from hetzner_control.core.models import Action, Datacenter, Price, Server, ServerType
+
+SERVER_TYPE = {
+    "id": 1,
+    "name": "cx11",
+    "description": "CX11",
+    "cores": 1,
+    "memory": 2.0,
+    "disk": 20,
+    "cpu_type": "shared",
+    "storage_type": "local",
+    "prices": [
+        {
+            "location": "nbg1",
+            "price_hourly": {"net": "0.0050000000", "gross": "0.0059500000"},
+            "price_monthly": {"net": "3.2900000000", "gross": "3.9151000000"},
+        },
+        {
+            "location": "fsn1",
+            "price_hourly": {"net": "0.0048000000", "gross": "0.0057120000"},
+            "price_monthly": {"net": "3.1000000000", "gross": "3.6890000000"},
+        },
+    ],
+}
+
+
+def make_server(id_, location="fsn1"):
+    return {
+        "id": id_,
+        "name": f"server-{id_}",
+        "status": "running",
+        "created": "2022-01-01T00:00:00+00:00",
+        "labels": {"role": "web"},
+        "server_type": SERVER_TYPE,
+        "datacenter": {"name": f"{location}-dc14", "location": {"name": location}},
+        "public_net": {"ipv4": {"ip": "1.2.3.4"}},
+        "image": None,
+        "ingoing_traffic": 100,
+        "outgoing_traffic": None,
+        "included_traffic": 21990232555520,
+    }
+
+
+class TestModels:
+    """
+    For test parsing json objects to slotted models
+    """
+
+    def test_slots(self):
+        server = Server(make_server(1))
+        with pytest.raises(AttributeError):
+            server.unknown = 1
+
+    def test_server(self):
+        server = Server(make_server(1))
+        assert server.location == "fsn1"
+        assert server.labels == {"role": "web"}
+        assert server.outgoing_traffic == 0
+        assert server.get_extra("public_net")["ipv4"]["ip"] == "1.2.3.4"
+        assert server.get_extra("image") is None
+
+    def test_price_for_server_location(self):
+        assert Server(make_server(1, "fsn1")).price.monthly_gross == pytest.approx(3.689)
+        assert Server(make_server(1, "nbg1")).price.monthly_gross == pytest.approx(3.9151)
+        # price of other location isn't substituted
+        assert Server(make_server(1, "hel1")).price is None
+
+    def test_shared_server_type(self):
+        server_types = {}
+        first = Server(make_server(1), server_types)
+        second = Server(make_server(2), server_types)
+        assert first.server_type is second.server_type
+
+    def test_lazy_prices(self):
+        server_type = ServerType(SERVER_TYPE)
+        assert server_type._prices is None
+        assert [price.location for price in server_type.prices] == ["nbg1", "fsn1"]
+        assert isinstance(server_type.prices[0], Price)
+
+    def test_datacenter(self):
+        datacenter = Datacenter({
+            "id": 2,
+            "name": "nbg1-dc3",
+            "description": "Nuremberg 1 DC 3",
+            "location": {"name": "nbg1", "country": "DE", "city": "Nuremberg", "network_zone": "eu-central"},
+        })
+        assert (datacenter.location_name, datacenter.city) == ("nbg1", "Nuremberg")
+
+    def test_action(self):
+        action = Action({"id": 1, "command": "start_server", "status": "error", "error": {"message": "locked"}})
+        assert action.error_message == "locked"
+        assert action.progress == 0
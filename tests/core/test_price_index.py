@@ -0,0 +1,76 @@
+import pytest
+
+from hetzner_control.core.price_index import PriceIndex
+from tests.payloads import VAT_RATE, make_pricing
+
+
+@pytest.fixture(scope="module")
+def index() -> PriceIndex:
+    """
+    Index of synthetic /pricing response
+    """
+    return PriceIndex(make_pricing()["pricing"])
+
+
+class TestLookup:
+    """
+    For test building of PriceIndex and lookups by (resource, type, location)
+    """
+
+    def test_server(self, index):
+        price = index.get("server", "cx21", "nbg1")
+        assert price.location == "nbg1"
+        assert price.monthly_net == pytest.approx(4.85)
+        assert price.monthly_gross == pytest.approx(4.85 * (1 + VAT_RATE))
+
+    def test_backup_share_of_server(self, index):
+        assert index.backup_percentage == 20.0
+        assert index.get("server_backup", "cx21", "fsn1").monthly_net == pytest.approx(4.85 * 0.2)
+
+    def test_location_independent(self, index):
+        assert index.get("volume", location="fsn1").monthly_net == pytest.approx(0.044)
+        assert index.get("traffic").hourly_net == 0.0
+
+    def test_unknown(self, index):
+        assert index.find("server", "cx99", "fsn1") is None
+        with pytest.raises(KeyError):
+            index.get("load_balancer", "lb11", "mars1")
+
+
+class TestParseSpec:
+    """
+    For test parsing of '[COUNT x]TYPE[@LOCATION]' specs
+    """
+
+    @pytest.mark.parametrize("spec, expected", [
+        ("cx21", ("server", "cx21", "fsn1", 1)),
+        ("3x cx21@nbg1", ("server", "cx21", "nbg1", 3)),
+        ("12*CPX11@HEL1", ("server", "cpx11", "hel1", 12)),
+        ("2xlb11", ("load_balancer", "lb11", "fsn1", 2)),
+    ])
+    def test_good(self, index, spec, expected):
+        assert index.parse_spec(spec, "fsn1") == expected
+
+    @pytest.mark.parametrize("spec", ["", "3x", "cx21@", "cx99@fsn1"])
+    def test_bad(self, index, spec):
+        with pytest.raises(ValueError):
+            index.parse_spec(spec, "fsn1")
+
+
+class TestEstimate:
+    """
+    For test totals of PriceIndex.estimate()
+    """
+
+    def test_merges_lines(self, index):
+        result = index.estimate([("server", "cx11", "fsn1", 1)] * 1000 + [("volume", None, None, 50)])
+
+        assert len(result.lines) == 2
+        assert result.lines[("server", "cx11", "fsn1")][0] == 1000
+        assert result.monthly_net == pytest.approx(3290 + 50 * 0.044)
+        assert result.monthly_vat == pytest.approx(result.monthly_net * VAT_RATE)
+        assert result.hourly_gross == pytest.approx(result.hourly_net * (1 + VAT_RATE), rel=1e-3)
+
+    def test_unknown_price(self, index):
+        with pytest.raises(KeyError):
+            index.estimate([("server", "cx21", "mars1", 1)])
@@ -0,0 +1,83 @@
+import os
+import time
+from unittest import mock
+
+import pytest
+import responses
+
+from hetzner_control.core import HetznerHandler
+from hetzner_control.core.pricing import PricingHandler
+from hetzner_control.core.ratelimit import BULK, INTERACTIVE, RateLimiter
+
+
+@pytest.fixture(autouse=True)
+def mock_settings_env_vars():
+    """
+    Mock real environment variable
+    """
+    with mock.patch.dict(os.environ, {"HETZNER_API_TOKEN": "1111"}):
+        yield
+
+
+@pytest.fixture
+def fresh_transport():
+    """
+    Use new shared transport, so exhausted budget doesn't slow down other tests
+    """
+    HetznerHandler.configure_transport()
+    yield
+    HetznerHandler.configure_transport()
+
+
+class TestRateLimiter:
+    """
+    For test RateLimiter token bucket
+    """
+
+    def test_update_from_headers(self):
+        limiter = RateLimiter(limit=3600)
+        limiter.update({
+            "RateLimit-Limit": "3600",
+            "RateLimit-Remaining": "100",
+            "RateLimit-Reset": f"{time.time() + 3500}",
+        })
+
+        assert limiter.tokens <= 100
+        assert limiter.rate == pytest.approx(1.0, rel=0.01)
+
+    def test_bulk_keeps_reserve(self):
+        limiter = RateLimiter(limit=10, period=1000.0, reserve=0.5)
+        for _ in range(5):
+            assert limiter.acquire(BULK) < 0.01
+
+        started = time.monotonic()
+        limiter.rate = 100.0
+        limiter.acquire(BULK)
+        assert time.monotonic() - started > 0.005
+        assert limiter.acquire(INTERACTIVE) < 0.01
+
+    def test_throttled(self):
+        limiter = RateLimiter()
+        assert limiter.throttled({"Retry-After": "0.05"}) == pytest.approx(0.05)
+        assert limiter.acquire() >= 0.04
+
+
+class TestTransportThrottling:
+    """
+    For test that Transport repeats request after 429 response
+    """
+    url = "https://api.hetzner.cloud/v1/pricing"
+
+    @responses.activate
+    def test_retry_after_429(self, fresh_transport):
+        responses.add(
+            method=responses.GET,
+            url=self.url,
+            json={"error": {"message": "limit exceeded"}},
+            status=429,
+            headers={"Retry-After": "0.01"},
+        )
+        responses.add(method=responses.GET, url=self.url, json={"pricing": {}}, status=200)
+
+        assert PricingHandler().get_all_prices() == {"pricing": {}}
+        assert len(responses.calls) == 2
@@ -0,0 +1,150 @@
+import os
+from unittest import mock
+
+import pytest
+import requests
+import responses
+
+from hetzner_control.core import HetznerHandler
+from hetzner_control.core.hooks import Hooks
+from hetzner_control.core.ratelimit import INTERACTIVE, RateLimiter
+from hetzner_control.core.retry import RetryPolicy
+from hetzner_control.core.server import ServerHandler
+from hetzner_control.core.transport import RequestAttempts
+
+
+@pytest.fixture(autouse=True)
+def mock_settings_env_vars():
+    """
+    Mock real environment variable
+    """
+    with mock.patch.dict(os.environ, {"HETZNER_API_TOKEN": "1111"}):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def fast_transport():
+    """
+    Shared transport with retries, but without real backoff delays
+    """
+    transport = HetznerHandler.configure_transport(retry_policy=RetryPolicy(max_retries=2, backoff_factor=0))
+    yield transport
+    HetznerHandler.configure_transport()
+
+
+class TestRetryPolicy:
+    """
+    For test RetryPolicy rules
+    """
+
+    def test_idempotent_methods(self):
+        policy = RetryPolicy()
+        assert policy.is_idempotent("get")
+        assert policy.is_idempotent("DELETE")
+        assert not policy.is_idempotent("POST")
+        assert policy.is_idempotent("POST", idempotent=True)
+
+    def test_exponential_backoff(self):
+        policy = RetryPolicy(backoff_factor=0.5, max_backoff=3.0, jitter=False)
+        assert [policy.get_backoff(attempt) for attempt in range(4)] == [0.5, 1.0, 2.0, 3.0]
+
+    def test_jitter(self):
+        policy = RetryPolicy(backoff_factor=1.0, jitter=True)
+        assert all(0 <= policy.get_backoff(2) <= 4.0 for _ in range(20))
+
+    def test_retry_after(self):
+        policy = RetryPolicy(backoff_factor=0.1, jitter=False)
+        assert policy.get_backoff(0, {"Retry-After": "2"}) == 2.0
+
+
+class TestTransportRetry:
+    """
+    For test Transport repeating requests after transient errors
+    """
+    url = "https://api.hetzner.cloud/v1/servers"
+
+    @responses.activate
+    def test_retry_get(self, fast_transport):
+        responses.add(method=responses.GET, url=f"{self.url}/1", json={}, status=503)
+        responses.add(method=responses.GET, url=f"{self.url}/1", json={"server": {"id": 1}}, status=200)
+
+        assert ServerHandler().get_server(1) == {"server": {"id": 1}}
+        assert len(responses.calls) == 2
+        assert fast_transport.stats.retries == 1
+
+    @responses.activate
+    def test_retry_connection_error(self, fast_transport):
+        responses.add(method=responses.GET, url=f"{self.url}/1", body=requests.ConnectionError("reset"))
+        responses.add(method=responses.GET, url=f"{self.url}/1", json={"server": {"id": 1}}, status=200)
+
+        resp = fast_transport.request("GET", f"{self.url}/1")
+        assert resp.status_code == 200
+        assert resp.retries == 1
+
+    @responses.activate
+    def test_retry_post_not_connected(self, fast_transport):
+        from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+        refused = MaxRetryError(None, self.url, NewConnectionError(None, "Connection refused"))
+        responses.add(method=responses.POST, url=self.url, body=requests.ConnectionError(refused))
+        responses.add(method=responses.POST, url=self.url, json={"server": {"id": 1}}, status=201)
+
+        resp = fast_transport.request("POST", self.url)
+        assert resp.status_code == 201
+        assert resp.retries == 1
+
+    @responses.activate
+    def test_no_retry_post_after_sending(self, fast_transport):
+        responses.add(method=responses.POST, url=self.url, body=requests.ConnectionError("Connection aborted"))
+
+        with pytest.raises(requests.ConnectionError):
+            fast_transport.request("POST", self.url)
+        assert len(responses.calls) == 1
+
+    @responses.activate
+    def test_give_up(self):
+        responses.add(method=responses.GET, url=f"{self.url}/1", body="bad gateway", status=502)
+
+        with pytest.raises(SystemExit):
+            ServerHandler().get_server(1)
+        assert len(responses.calls) == 3
+
+    @responses.activate
+    def test_no_retry_for_post(self, fast_transport):
+        responses.add(method=responses.POST, url=self.url, json={"error": {"message": "unavailable"}}, status=503)
+
+        with pytest.raises(SystemExit):
+            ServerHandler().create_server(name="testing", image="ubuntu", location="nbg1", server_type="cx11")
+        assert len(responses.calls) == 1
+        assert fast_transport.stats.retries == 0
+
+
+class TestRequestAttempts:
+    """
+    For test retry decisions shared by sync and async Handlers
+    """
+
+    def attempts(self, method: str) -> RequestAttempts:
+        policy = RetryPolicy(max_retries=2, backoff_factor=1.0, jitter=False)
+        return RequestAttempts(method, "https://api", INTERACTIVE, policy, None, Hooks(), max_throttle_retries=1)
+
+    def test_post(self):
+        attempts = self.attempts("POST")
+
+        assert attempts.after_response(503, {}) is None
+        assert attempts.after_error(requests.ConnectionError("reset")) is None
+        assert attempts.after_error(requests.ConnectionError("refused"), not_connected=True) == 1.0
+
+    def test_retries_exhausted(self):
+        attempts = self.attempts("GET")
+
+        assert [attempts.after_response(503, {}) for _ in range(3)] == [1.0, 2.0, None]
+        assert (attempts.retries, attempts.backoff_time) == (2, 3.0)
+
+    def test_throttled(self):
+        attempts = self.attempts("POST")
+        attempts.limiter = RateLimiter()
+
+        assert attempts.after_response(429, {"Retry-After": "0"}) == 0.0
+        assert attempts.after_response(429, {"Retry-After": "0"}) is None
+        assert attempts.throttles == 1
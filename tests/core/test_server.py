@@ -1,4 +1,7 @@
+import json
 import os
+import time
+from datetime import datetime, timezone
 from unittest import mock
 
 import pytest
@@ -6,6 +9,7 @@ import responses
 from responses import matchers
 
 from hetzner_control.core.server import ServerHandler
+from tests.payloads import make_metrics
 
 
 @pytest.fixture(autouse=True)
@@ -263,3 +267,220 @@ class TestMakeAction:
                 action="restart",
                 params=None
             )
+
+
+class TestIterServers:
+    """
+    For test ServerHandler.iter_servers()/get_all_servers() pagination
+    """
+    url = "https://api.hetzner.cloud/v1/servers"
+
+    def add_pages(self):
+        responses.add(
+            method=responses.GET,
+            url=self.url,
+            json={"servers": [{"id": 1}, {"id": 2}], "meta": {"pagination": {"next_page": 2}}},
+            status=200,
+            match=[matchers.query_param_matcher({"page": "1", "per_page": "2"})]
+        )
+        responses.add(
+            method=responses.GET,
+            url=self.url,
+            json={"servers": [{"id": 3}], "meta": {"pagination": {"next_page": None}}},
+            status=200,
+            match=[matchers.query_param_matcher({"page": "2", "per_page": "2"})]
+        )
+
+    @responses.activate
+    def test_follow_next_page(self):
+        self.add_pages()
+
+        servers = [server["id"] for server in ServerHandler().iter_servers(per_page=2)]
+        assert servers == [1, 2, 3]
+        assert len(responses.calls) == 2
+
+    @responses.activate
+    def test_lazy_pages(self):
+        self.add_pages()
+
+        pages = ServerHandler().iter_server_pages(per_page=2)
+        assert [server["id"] for server in next(pages)] == [1, 2]
+        assert len(responses.calls) == 1
+
+    @responses.activate
+    def test_get_all_servers_collects_pages(self):
+        responses.add(
+            method=responses.GET,
+            url=self.url,
+            json={"servers": [{"id": 1}], "meta": {"pagination": {"next_page": 2}}},
+            status=200,
+            match=[matchers.query_param_matcher({"page": "1", "per_page": "50"})]
+        )
+        responses.add(
+            method=responses.GET,
+            url=self.url,
+            json={"servers": [{"id": 2}], "meta": {"pagination": {"next_page": None}}},
+            status=200,
+            match=[matchers.query_param_matcher({"page": "2", "per_page": "50"})]
+        )
+
+        resp = ServerHandler().get_all_servers()
+        assert [server["id"] for server in resp["servers"]] == [1, 2]
+
+
+class TestPrefetchServers:
+    """
+    For test ServerHandler.iter_servers() parallel prefetch of pages
+    """
+    url = "https://api.hetzner.cloud/v1/servers"
+    last_page = 5
+
+    def page_callback(self, request):
+        page = int(request.params["page"])
+        # later pages respond faster, so they complete out of order
+        time.sleep((self.last_page - page) * 0.01)
+        body = {
+            "servers": [{"id": page * 10 + i} for i in range(2)],
+            "meta": {"pagination": {"page": page, "last_page": self.last_page,
+                                    "next_page": (page + 1 if page < self.last_page else None)}},
+        }
+        return 200, {}, json.dumps(body)
+
+    @responses.activate
+    def test_ordered_output(self):
+        responses.add_callback(responses.GET, self.url, callback=self.page_callback)
+
+        servers = [server["id"] for server in ServerHandler().iter_servers(per_page=2, concurrency=3)]
+        assert servers == [page * 10 + i for page in range(1, self.last_page + 1) for i in range(2)]
+        assert len(responses.calls) == self.last_page
+
+    @responses.activate
+    def test_bounded_in_flight(self):
+        responses.add_callback(responses.GET, self.url, callback=self.page_callback)
+
+        pages = ServerHandler().iter_server_pages(per_page=2, concurrency=2)
+        next(pages)
+        next(pages)
+        time.sleep(0.1)
+        # first page, two pages in flight and one requested after consuming page 2
+        assert len(responses.calls) <= 4
+        pages.close()
+
+
+class TestBulk:
+    """
+    For test ServerHandler.bulk() method for mixed good/bad responses
+    """
+
+    @responses.activate
+    def test_mixed_results(self):
+        for id_ in (1, 2):
+            responses.add(
+                method=responses.POST,
+                url=f"https://api.hetzner.cloud/v1/servers/{id_}/actions/poweron",
+                json={"action": {"status": "running"}},
+                status=201,
+            )
+        responses.add(
+            method=responses.POST,
+            url="https://api.hetzner.cloud/v1/servers/3/actions/poweron",
+            json={"error": {"message": "locked"}},
+            status=423,
+        )
+
+        results = {id_: (data, error) for id_, data, error in ServerHandler().bulk("server_up", [1, 2, 3])}
+        assert results[1][0]["action"]["status"] == "running"
+        assert results[2][1] is None
+        assert results[3][0] is None
+        assert results[3][1].status_code == 423
+        assert results[3][1].message == "locked"
+
+    def test_unsupported_operation(self):
+        with pytest.raises(ValueError):
+            list(ServerHandler().bulk("create_server", [1]))
+
+
+class TestServerFilters:
+    """
+    For test server-side filtering parameters of ServerHandler.iter_servers()
+    """
+    url = "https://api.hetzner.cloud/v1/servers"
+
+    @responses.activate
+    def test_filters_in_query(self):
+        responses.add(
+            method=responses.GET,
+            url=self.url,
+            json={"servers": [{"id": 1}], "meta": {"pagination": {"next_page": None}}},
+            status=200,
+            match=[matchers.query_param_matcher({
+                "label_selector": "role=ingress",
+                "name": "web-1",
+                "status": ["running", "off"],
+                "sort": "created:desc",
+                "page": "1",
+                "per_page": "50",
+            })]
+        )
+
+        servers = list(ServerHandler().iter_servers(
+            label_selector="role=ingress",
+            name="web-1",
+            status=["running", "off"],
+            sort=["created:desc"],
+        ))
+        assert [server["id"] for server in servers] == [1]
+
+    def test_empty_filters(self):
+        assert ServerHandler.get_filters() == {}
+
+
+class TestServerMetrics:
+    """
+    For test ServerHandler.get_server_metrics() and bulk_metrics() methods
+    """
+    start = datetime(2022, 6, 16, 11, 0, tzinfo=timezone.utc)
+    end = datetime(2022, 6, 16, 12, 0, tzinfo=timezone.utc)
+
+    @responses.activate
+    def test_query(self):
+        responses.add(
+            method=responses.GET,
+            url="https://api.hetzner.cloud/v1/servers/7/metrics",
+            json=make_metrics(7),
+            status=200,
+            match=[matchers.query_param_matcher({
+                "type": "cpu,disk",
+                "start": "2022-06-16T11:00:00+00:00",
+                "end": "2022-06-16T12:00:00+00:00",
+                "step": "60",
+            })]
+        )
+
+        data = ServerHandler().get_server_metrics(7, ["cpu", "disk"], self.start, self.end, step=60)
+        assert "cpu" in data["metrics"]["time_series"]
+
+    @responses.activate
+    def test_bulk_mixed_results(self):
+        for id_ in (1, 2):
+            responses.add(
+                method=responses.GET,
+                url=f"https://api.hetzner.cloud/v1/servers/{id_}/metrics",
+                json=make_metrics(id_),
+                status=200,
+            )
+        responses.add(
+            method=responses.GET,
+            url="https://api.hetzner.cloud/v1/servers/3/metrics",
+            json={"error": {"message": "server not found"}},
+            status=423,
+        )
+
+        results = {
+            id_: (data, error)
+            for id_, data, error in ServerHandler().bulk_metrics([1, 2, 3], ["cpu"], self.start, self.end)
+        }
+        assert sorted(results) == [1, 2, 3]
+        assert results[2][0]["metrics"]["step"] == 60
+        assert results[3][0] is None
+        assert results[3][1].message == "server not found"
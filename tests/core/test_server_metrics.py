@@ -0,0 +1,86 @@
+from datetime import timedelta
+
+import pytest
+
+from hetzner_control.core.server_metrics import (
+    GroupStats, SeriesStats, downsample, parse_duration, percentile, time_series,
+)
+from tests.payloads import make_metrics
+
+
+class TestParseDuration:
+    """
+    For test parsing of --range values
+    """
+
+    @pytest.mark.parametrize("value, expected", [
+        ("90s", timedelta(seconds=90)),
+        ("30m", timedelta(minutes=30)),
+        (" 6h ", timedelta(hours=6)),
+        ("7d", timedelta(days=7)),
+    ])
+    def test_valid(self, value, expected):
+        assert parse_duration(value) == expected
+
+    @pytest.mark.parametrize("value", ["", "6", "h", "0h", "1w", "-1h", "1.5h"])
+    def test_invalid(self, value):
+        with pytest.raises(ValueError):
+            parse_duration(value)
+
+
+class TestSeriesStats:
+    """
+    For test percentiles and summary of time series
+    """
+
+    def test_time_series(self):
+        series = time_series(make_metrics(10, samples=5))
+
+        assert sorted(series) == ["cpu", "disk.0.iops.read"]
+        # the second cpu value is "NaN"
+        assert series["cpu"] == [0.0, 5.0, 7.5, 10.0]
+        assert time_series({"metrics": {"time_series": {}}}) == {}
+
+    def test_percentile(self):
+        ordered = [1.0, 2.0, 3.0, 4.0, 5.0]
+
+        assert percentile(ordered, 0) == 1.0
+        assert percentile(ordered, 50) == 3.0
+        assert percentile(ordered, 95) == pytest.approx(4.8)
+        assert percentile(ordered, 100) == 5.0
+        assert percentile([7.0], 95) == 7.0
+
+    def test_stats(self):
+        stats = SeriesStats([5.0, 1.0, 3.0, 2.0, 4.0])
+
+        assert stats.samples == 5
+        assert stats.p50 == 3.0
+        assert stats.p95 == pytest.approx(4.8)
+        assert stats.max == 5.0
+        assert stats.last == 4.0
+
+    def test_empty(self):
+        stats = SeriesStats([])
+
+        assert stats.samples == 0
+        assert stats.p50 is stats.p95 is stats.max is stats.last is None
+
+    def test_downsample(self):
+        assert downsample([1.0, 2.0], 5) == [1.0, 2.0]
+        assert downsample([1.0, 9.0, 2.0, 3.0, 4.0, 1.0], 3) == [9.0, 3.0, 4.0]
+        assert len(downsample([float(i) for i in range(1000)], 30)) == 30
+
+
+class TestGroupStats:
+    """
+    For test pooling of series by group of servers
+    """
+
+    def test_summary(self):
+        groups = GroupStats()
+        groups.add("web", {"cpu": [1.0, 2.0]})
+        groups.add("web", {"cpu": [3.0, 4.0], "disk": [1.0]})
+        groups.add("db", {"cpu": [10.0]})
+
+        summary = [(group, name, servers, stats.max) for group, name, servers, stats in groups.summary()]
+        assert summary == [("db", "cpu", 1, 10.0), ("web", "cpu", 2, 4.0), ("web", "disk", 1, 1.0)]
@@ -5,7 +5,10 @@ import pytest
 import responses
 from responses import matchers
 
-from hetzner_control.core.server_types import ServerTypesHandler
+from hetzner_control.core.models import ServerType
+from hetzner_control.core.price_index import PriceIndex
+from hetzner_control.core.server_types import ServerTypeCatalog, ServerTypesHandler
+from tests.payloads import make_pricing, make_server_types
 
 
 @pytest.fixture(autouse=True)
@@ -100,3 +103,50 @@ class TestGetServerType:
 
         with pytest.raises(SystemExit):
             _ = ServerTypesHandler().get_server_type(self.id)
+
+
+class TestServerTypeCatalog:
+    """
+    For test ServerTypeCatalog.find() filtering and ranking
+    """
+
+    @pytest.fixture
+    def catalog(self):
+        pricing = make_pricing()["pricing"]
+        # make hel1 the cheapest location of cx11
+        pricing["server_types"][0]["prices"][2]["price_monthly"] = {"net": "3.0", "gross": "3.57"}
+        return ServerTypeCatalog([ServerType(type_) for type_ in make_server_types()], PriceIndex(pricing))
+
+    def test_cheapest_first(self, catalog):
+        names = [type_.name for type_, _ in catalog.find(min_cores=4, location="fsn1")]
+        assert names == ["cpx31", "cx41", "cpx41", "cx51", "ccx22", "cpx51"]
+
+    def test_filters(self, catalog):
+        matches = catalog.find(min_memory=16, min_disk=200, cpu_type="shared", location="nbg1")
+        assert [type_.name for type_, _ in matches] == ["cpx41", "cx51", "cpx51"]
+        assert {price.location for _, price in matches} == {"nbg1"}
+
+    def test_cheapest_location(self, catalog):
+        type_, price = catalog.find()[0]
+        assert type_.name == "cx11"
+        assert price.location == "hel1"
+
+    def test_sort_by_cores(self, catalog):
+        cores = [type_.cores for type_, _ in catalog.find(min_memory=8, sort="cores")]
+        assert cores == sorted(cores)
+
+    def test_unknown_location(self, catalog):
+        assert catalog.find(location="mars1") == []
+
+    @responses.activate
+    def test_get_catalog(self):
+        responses.add(responses.GET, "https://api.hetzner.cloud/v1/server_types", json={
+            "server_types": make_server_types(), "meta": {"pagination": {"next_page": None}},
+        })
+        responses.add(responses.GET, "https://api.hetzner.cloud/v1/pricing", json=make_pricing())
+
+        catalog = ServerTypesHandler().get_catalog()
+        for _ in range(100):
+            catalog.find(min_cores=2, location="ash")
+
+        assert len(responses.calls) == 2
@@ -0,0 +1,80 @@
+import os
+from unittest import mock
+
+import pytest
+import responses
+
+from hetzner_control.core import HetznerHandler
+from hetzner_control.core.server import ServerHandler
+from hetzner_control.core.timings import Timings, get_endpoint
+
+
+@pytest.fixture(autouse=True)
+def mock_settings_env_vars():
+    """
+    Mock real environment variable
+    """
+    with mock.patch.dict(os.environ, {"HETZNER_API_TOKEN": "1111"}):
+        yield
+
+
+@pytest.fixture
+def timings():
+    """
+    Timings enabled for all Handlers during test
+    """
+    collected = Timings()
+    HetznerHandler.configure_timings(collected)
+    yield collected
+    HetznerHandler.configure_timings(None)
+
+
+class TestTimings:
+    """
+    For test aggregation of measurements
+    """
+
+    def test_endpoint(self):
+        assert get_endpoint("https://api.hetzner.cloud/v1/servers/42/actions/poweron?x=1") == \
+            "/v1/servers/{id}/actions/poweron"
+
+    def test_by_endpoint(self):
+        timings = Timings()
+        timings.record_request("GET", "https://x/v1/servers/1", 200, 0.1, 100)
+        timings.record_request("GET", "https://x/v1/servers/2", 404, 0.3, 50, retries=1)
+
+        entry = timings.by_endpoint()["GET /v1/servers/{id}"]
+        assert entry["count"] == 2
+        assert entry["errors"] == 1
+        assert entry["retries"] == 1
+        assert entry["latency_max"] == 0.3
+        assert entry["bytes"] == 150
+
+    def test_disabled(self):
+        with HetznerHandler.measure("parse"):
+            pass
+
+        assert HetznerHandler.get_timings() is None
+
+
+class TestHandlerTimings:
+    """
+    For test that Handlers record requests and parse durations
+    """
+
+    @responses.activate
+    def test_requests_and_parse(self, timings):
+        responses.add(
+            responses.GET,
+            "https://api.hetzner.cloud/v1/servers",
+            json={"servers": [], "meta": {"pagination": {"next_page": None}}},
+        )
+        responses.add(responses.GET, "https://api.hetzner.cloud/v1/servers/1", json={"error": {"message": "x"}}, status=404)
+
+        list(ServerHandler().list_servers())
+        with pytest.raises(SystemExit):
+            ServerHandler().get_server(1)
+
+        assert [(timing.method, timing.status) for timing in timings.requests] == [("GET", 200), ("GET", 404)]
+        assert timings.requests[0].bytes > 0
+        assert timings.phase_counts["parse"] == 2
@@ -0,0 +1,68 @@
+import os
+from unittest import mock
+
+import pytest
+import responses
+
+from hetzner_control.core import HetznerHandler
+from hetzner_control.core.datacenters import DatacenterHandler
+from hetzner_control.core.pricing import PricingHandler
+from hetzner_control.core.transport import Transport
+
+
+@pytest.fixture(autouse=True)
+def mock_settings_env_vars():
+    """
+    Mock real environment variable
+    """
+    with mock.patch.dict(os.environ, {"HETZNER_API_TOKEN": "1111"}):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def fresh_transport():
+    """
+    Every test starts with new shared transport
+    """
+    HetznerHandler.configure_transport()
+    yield
+    HetznerHandler.configure_transport()
+
+
+class TestSharedTransport:
+    """
+    For test that all Handlers route requests through one pooled transport
+    """
+
+    def test_same_transport_for_all_handlers(self):
+        assert PricingHandler().get_transport() is DatacenterHandler().get_transport()
+
+    def test_configure_transport(self):
+        old = HetznerHandler.get_transport()
+        new = HetznerHandler.configure_transport(read_timeout=1.5, headers={"X-Test": "1"})
+
+        assert new is not old
+        assert new is PricingHandler().get_transport()
+        assert new.timeout == (5.0, 1.5)
+        assert new.session.headers["X-Test"] == "1"
+
+    def test_default_timeout(self):
+        transport = Transport(connect_timeout=1.0, read_timeout=2.0)
+        with mock.patch.object(transport.session, "request") as request:
+            transport.request("GET", "https://api.hetzner.cloud/v1/pricing")
+
+        assert request.call_args.kwargs["timeout"] == (1.0, 2.0)
+
+    @responses.activate
+    def test_default_headers(self):
+        responses.add(
+            method=responses.GET,
+            url="https://api.hetzner.cloud/v1/pricing",
+            json={},
+            status=200,
+        )
+
+        PricingHandler().get_all_prices()
+        headers = responses.calls[0].request.headers
+        assert headers["User-Agent"].startswith("hetzner-control/")
+        assert headers["Authorization"] == "Bearer 1111"
@@ -0,0 +1,77 @@
+import pytest
+
+from hetzner_control.core.models import Server
+from hetzner_control.core.watch import AdaptiveInterval, ServerSnapshot
+from tests.payloads import make_server
+
+
+def servers(*ids: int, **fields) -> list:
+    result = []
+    for id_ in ids:
+        data = make_server(id_)
+        data.update(fields.get(f"s{id_}", {}))
+        result.append(Server(data))
+    return result
+
+
+class TestServerSnapshot:
+    """
+    For test diff of server lists between polls
+    """
+
+    def test_first_poll(self):
+        diff = ServerSnapshot().update(servers(1, 2))
+
+        assert diff.added == [1, 2]
+        assert not diff.changed and not diff.removed
+
+    def test_changes(self):
+        snapshot = ServerSnapshot()
+        snapshot.update(servers(1, 2, 3))
+
+        diff = snapshot.update(servers(1, 2, 4, s1={"status": "off", "outgoing_traffic": 1}))
+
+        assert diff.added == [4]
+        assert diff.removed == [3]
+        assert diff.changed == {1: {"status", "outgoing_traffic"}}
+        assert list(snapshot.servers) == [1, 2, 4]
+
+    def test_significant(self):
+        snapshot = ServerSnapshot()
+        snapshot.update(servers(1, 2))
+
+        traffic = snapshot.update(servers(1, 2, s1={"ingoing_traffic": 1, "outgoing_traffic": 1}))
+        assert traffic and not traffic.significant()
+        assert snapshot.update(servers(1, 2, s2={"name": "renamed"})).significant()
+        assert snapshot.update(servers(1)).significant()
+
+    def test_unchanged(self):
+        snapshot = ServerSnapshot()
+        snapshot.update(servers(1, 2))
+
+        assert not snapshot.update(servers(1, 2))
+
+    def test_busy(self):
+        snapshot = ServerSnapshot()
+        snapshot.update(servers(1, s1={"status": "running"}))
+        assert not snapshot.busy()
+
+        snapshot.update(servers(1, s1={"status": "starting"}))
+        assert snapshot.busy()
+
+
+class TestAdaptiveInterval:
+    """
+    For test growth and reset of poll interval
+    """
+
+    def test_backoff_and_reset(self):
+        pacing = AdaptiveInterval(minimum=2, maximum=5, factor=2)
+
+        assert [pacing.next(changed=False) for _ in range(3)] == [4, 5, 5]
+        assert pacing.next(changed=True) == 2
+        assert pacing.next(changed=False, busy=True) == 2
+
+    @pytest.mark.parametrize("maximum", [1, 2])
+    def test_maximum_not_below_minimum(self, maximum):
+        assert AdaptiveInterval(minimum=2, maximum=maximum).next(changed=False) == 2
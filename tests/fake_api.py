@@ -0,0 +1,483 @@
+"""
+Local stand-in of Hetzner Cloud API for end-to-end tests and benchmarks of the real Handlers.
+Implements /servers, /servers/{id}, /servers/{id}/actions/*, /actions, /pricing, /server_types and /datacenters
+with pagination, label selectors and sorting. Latency, jitter, error rate and rate limit
+(RateLimit-* headers and 429 responses) are configurable.
+
+Point the CLI to it with HETZNER_API_URL environment variable:
+
+    $ python -m tests.fake_api --servers 1000 --latency 0.05 --jitter 0.02 --port 8080
+    $ HETZNER_API_URL=http://127.0.0.1:8080/v1 HETZNER_API_TOKEN=1111 htz server list
+"""
+import argparse
+import copy
+import heapq
+import json
+import math
+import random
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from tests.payloads import make_datacenters, make_pricing, make_server_types, make_servers
+
+Response = Tuple[int, Dict[str, Any]]
+
+# server status after finished action
+ACTION_STATUSES = {
+    "poweron": "running",
+    "start_server": "running",
+    "shutdown": "off",
+    "poweroff": "off",
+    "reboot": "running",
+    "reset": "running",
+}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def _error(status: int, code: str, message: str) -> Response:
+    return status, {"error": {"code": code, "message": message, "details": {}}}
+
+
+class FakeHetznerAPI:
+    """
+    HTTP server imitating Hetzner Cloud API in a background thread.
+    State (servers, actions) lives in memory and is shared by all requests
+    """
+
+    def __init__(
+            self,
+            servers: int = 100,
+            latency: float = 0.0,
+            jitter: float = 0.0,
+            error_rate: float = 0.0,
+            error_status: int = 503,
+            rate_limit: Optional[int] = None,
+            rate_period: float = 3600.0,
+            action_duration: float = 0.0,
+            action_error_rate: float = 0.0,
+            token: Optional[str] = None,
+            seed: int = 0,
+            host: str = "127.0.0.1",
+            port: int = 0,
+    ):
+        """
+        :param servers: number of servers in account at start
+        :param latency: seconds every response is delayed by
+        :param jitter: maximum random seconds added to latency
+        :param error_rate: share of requests failed with 'error_status'
+        :param error_status: status code of injected errors
+        :param rate_limit: requests allowed per 'rate_period', None for no limit
+        :param rate_period: seconds the whole budget is refilled in
+        :param action_duration: seconds before started action finishes
+        :param action_error_rate: share of actions finished with status 'error'
+        :param token: required API token, None to accept any
+        :param seed: seed of random generator, the same seed gives the same errors and jitter
+        :param host: address to listen on
+        :param port: port to listen on, 0 for any free port
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.rate_limit = rate_limit
+        self.rate_period = rate_period
+        self.action_duration = action_duration
+        self.action_error_rate = action_error_rate
+        self.token = token
+
+        self.servers: Dict[int, Dict[str, Any]] = {server["id"]: server for server in make_servers(servers)}
+        self.actions: Dict[int, Dict[str, Any]] = {}
+        # (finish time, action ID) of running actions, the earliest first
+        self._timeline: List[Tuple[float, int]] = []
+        self.server_types = make_server_types()
+        self.datacenters = make_datacenters()
+        self.pricing = make_pricing()
+
+        self.stats: Counter = Counter()
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._next_server_id = max(self.servers, default=0) + 1
+        self._next_action_id = 1
+        self._tokens = float(rate_limit or 0)
+        self._updated = time.monotonic()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+        self._httpd = ThreadingHTTPServer((host, port), self._make_request_handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """
+        Base url of fake API, value for HETZNER_API_URL
+        """
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeHetznerAPI":
+        # short poll interval makes stop() fast
+        self._thread = threading.Thread(target=self._httpd.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def serve_forever(self) -> None:
+        """
+        Serve requests in current thread until interrupted
+        """
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._httpd.server_close()
+
+    def __enter__(self) -> "FakeHetznerAPI":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def handle(self, method: str, path: str, query: Dict[str, List[str]], body: Dict[str, Any]) -> Response:
+        """
+        Route request to endpoint
+
+        :return: status code and json response
+        """
+        routes = [
+            ("GET", r"/v1/servers", self.list_servers),
+            ("POST", r"/v1/servers", self.create_server),
+            ("GET", r"/v1/servers/(\d+)", self.get_server),
+            ("PUT", r"/v1/servers/(\d+)", self.update_server),
+            ("DELETE", r"/v1/servers/(\d+)", self.delete_server),
+            ("POST", r"/v1/servers/(\d+)/actions/(\w+)", self.server_action),
+            ("GET", r"/v1/actions", self.list_actions),
+            ("GET", r"/v1/actions/(\d+)", self.get_action),
+            ("GET", r"/v1/pricing", lambda query, body: (200, self.pricing)),
+            ("GET", r"/v1/server_types", lambda query, body: self.paginate("server_types", self.server_types, query)),
+            ("GET", r"/v1/server_types/(\d+)", lambda id_, query, body: self.get_by_id("server_type", self.server_types, id_)),
+            ("GET", r"/v1/datacenters", lambda query, body: self.paginate("datacenters", self.datacenters, query)),
+            ("GET", r"/v1/datacenters/(\d+)", lambda id_, query, body: self.get_by_id("datacenter", self.datacenters, id_)),
+        ]
+        for route_method, pattern, endpoint in routes:
+            match = re.fullmatch(pattern, path.rstrip("/"))
+            if match and route_method == method:
+                return endpoint(*match.groups(), query, body)
+        return _error(404, "not_found", f"{method} {path} not found")
+
+    # endpoints
+
+    def list_servers(self, query: Dict[str, List[str]], body: Dict[str, Any]) -> Response:
+        servers = list(self.servers.values())
+        if "name" in query:
+            servers = [server for server in servers if server["name"] == query["name"][0]]
+        if "status" in query:
+            servers = [server for server in servers if server["status"] in query["status"]]
+        if "label_selector" in query:
+            servers = [server for server in servers if self.match_labels(server["labels"], query["label_selector"][0])]
+        for sort in reversed(query.get("sort", [])):
+            field, _, order = sort.partition(":")
+            if field not in ("id", "name", "created"):
+                return _error(400, "invalid_input", f"invalid sort field: {field}")
+            servers.sort(key=lambda server: server[field], reverse=(order == "desc"))
+        return self.paginate("servers", servers, query)
+
+    def get_server(self, id_: str, query: Dict[str, List[str]], body: Dict[str, Any]) -> Response:
+        return self.get_by_id("server", list(self.servers.values()), id_)
+
+    def create_server(self, query: Dict[str, List[str]], body: Dict[str, Any]) -> Response:
+        server_type = next((type_ for type_ in self.server_types if type_["name"] == body.get("server_type")), None)
+        if server_type is None or not body.get("name") or not body.get("image"):
+            return _error(400, "invalid_input", "invalid input in fields 'name', 'image' or 'server_type'")
+        if any(server["name"] == body["name"] for server in self.servers.values()):
+            return _error(409, "uniqueness_error", "server name is already used")
+
+        datacenter = next(
+            (dc for dc in self.datacenters if dc["location"]["name"] == body.get("location", "fsn1")), None,
+        )
+        if datacenter is None:
+            return _error(400, "invalid_input", "invalid input in field 'location'")
+
+        server = copy.deepcopy(next(iter(self.servers.values()), None) or make_servers(1)[0])
+        server["image"]["name"] = body["image"]
+        server.update({
+            "datacenter": copy.deepcopy(datacenter),
+            "id": self._next_server_id,
+            "name": body["name"],
+            "status": "initializing",
+            "created": _now(),
+            "labels": body.get("labels") or {},
+            "server_type": copy.deepcopy(server_type),
+        })
+        self._next_server_id += 1
+        self.servers[server["id"]] = server
+
+        start = body.get("start_after_create", True)
+        return 201, {
+            "server": server,
+            "action": self.start_action("create_server", server["id"], "running" if start else "off"),
+            "next_actions": ([self.start_action("start_server", server["id"], "running")] if start else []),
+            "root_password": "YItygq1v3GYjjMomLaKc",
+        }
+
+    def update_server(self, id_: str, query: Dict[str, List[str]], body: Dict[str, Any]) -> Response:
+        server = self.servers.get(int(id_))
+        if server is None:
+            return _error(404, "not_found", f"server with ID '{id_}' not found")
+        if "name" in body:
+            server["name"] = body["name"]
+        if "labels" in body:
+            server["labels"] = body["labels"] or {}
+        return 200, {"server": server}
+
+    def delete_server(self, id_: str, query: Dict[str, List[str]], body: Dict[str, Any]) -> Response:
+        if self.servers.pop(int(id_), None) is None:
+            return _error(404, "not_found", f"server with ID '{id_}' not found")
+        return 200, {"action": self.start_action("delete_server", int(id_), None)}
+
+    def server_action(self, id_: str, action: str, query: Dict[str, List[str]], body: Dict[str, Any]) -> Response:
+        if int(id_) not in self.servers:
+            return _error(404, "not_found", f"server with ID '{id_}' not found")
+        if action not in ACTION_STATUSES:
+            return _error(404, "not_found", f"action '{action}' not found")
+        return 201, {"action": self.start_action(action, int(id_), ACTION_STATUSES[action])}
+
+    def list_actions(self, query: Dict[str, List[str]], body: Dict[str, Any]) -> Response:
+        actions = list(self.actions.values())
+        if "id" in query:
+            ids = {int(id_) for id_ in query["id"]}
+            actions = [action for action in actions if action["id"] in ids]
+        return self.paginate("actions", [self.action_state(action) for action in actions], query)
+
+    def get_action(self, id_: str, query: Dict[str, List[str]], body: Dict[str, Any]) -> Response:
+        if int(id_) not in self.actions:
+            return _error(404, "not_found", f"action with ID '{id_}' not found")
+        return 200, {"action": self.action_state(self.actions[int(id_)])}
+
+    # helpers
+
+    @staticmethod
+    def paginate(key: str, entries: List[Dict[str, Any]], query: Dict[str, List[str]]) -> Response:
+        page = int(query.get("page", ["1"])[0])
+        per_page = min(int(query.get("per_page", ["25"])[0]), 50)
+        last_page = max(1, math.ceil(len(entries) / per_page))
+        return 200, {
+            key: entries[(page - 1) * per_page:page * per_page],
+            "meta": {
+                "pagination": {
+                    "page": page,
+                    "per_page": per_page,
+                    "previous_page": (page - 1 if page > 1 else None),
+                    "next_page": (page + 1 if page < last_page else None),
+                    "last_page": last_page,
+                    "total_entries": len(entries),
+                }
+            },
+        }
+
+    @staticmethod
+    def get_by_id(key: str, entries: List[Dict[str, Any]], id_: str) -> Response:
+        for entry in entries:
+            if entry["id"] == int(id_):
+                return 200, {key: entry}
+        return _error(404, "not_found", f"{key} with ID '{id_}' not found")
+
+    @staticmethod
+    def match_labels(labels: Dict[str, str], selector: str) -> bool:
+        """
+        Check labels with selector of expressions 'k=v', 'k==v', 'k!=v', 'k' and '!k', separated by comma
+        """
+        for expression in filter(None, (part.strip() for part in selector.split(","))):
+            key, operator, value = re.match(r"(!?[\w.\-/]+)\s*(!=|==|=)?\s*(.*)", expression).groups()
+            if operator is None:
+                matched = (key[1:] not in labels) if key.startswith("!") else (key in labels)
+            elif operator == "!=":
+                matched = labels.get(key) != value
+            else:
+                matched = labels.get(key) == value
+            if not matched:
+                return False
+        return True
+
+    def start_action(self, command: str, server_id: int, server_status: Optional[str]) -> Dict[str, Any]:
+        action = {
+            "id": self._next_action_id,
+            "command": command,
+            "status": "running",
+            "progress": 0,
+            "started": _now(),
+            "finished": None,
+            "resources": [{"id": server_id, "type": "server"}],
+            "error": None,
+            "_started_at": time.monotonic(),
+            "_duration": self.action_duration,
+            "_failed": self._random.random() < self.action_error_rate,
+            "_server_status": server_status,
+        }
+        self._next_action_id += 1
+        self.actions[action["id"]] = action
+        heapq.heappush(self._timeline, (action["_started_at"] + action["_duration"], action["id"]))
+        self.advance()
+        return self.action_state(action)
+
+    def advance(self) -> None:
+        """
+        Finish actions, whose duration has passed, and apply their result to servers, whether actions are polled
+        or not, as real API does. Called on every request, call it directly to inspect 'servers' without requests
+        """
+        now = time.monotonic()
+        while self._timeline and self._timeline[0][0] <= now:
+            _, id_ = heapq.heappop(self._timeline)
+            action = self.actions[id_]
+            action.update(progress=100, finished=_now())
+            if action["_failed"]:
+                action.update(status="error", error={"code": "action_failed", "message": "Action failed"})
+                continue
+            action["status"] = "success"
+            server = self.servers.get(action["resources"][0]["id"])
+            if server is not None and action["_server_status"]:
+                server["status"] = action["_server_status"]
+
+    def action_state(self, action: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Return action without private fields, progress of running action is computed from time passed since start
+        """
+        if action["status"] == "running":
+            elapsed = time.monotonic() - action["_started_at"]
+            action["progress"] = min(99, int(100 * elapsed / action["_duration"]))
+        return {key: value for key, value in action.items() if not key.startswith("_")}
+
+    def take_token(self) -> Tuple[bool, Dict[str, str]]:
+        """
+        Take one request from rate limit budget
+
+        :return: whether request is allowed, RateLimit-* headers
+        """
+        if self.rate_limit is None:
+            return True, {}
+        rate = self.rate_limit / self.rate_period
+        now = time.monotonic()
+        self._tokens = min(self.rate_limit, self._tokens + (now - self._updated) * rate)
+        self._updated = now
+        allowed = self._tokens >= 1
+        if allowed:
+            self._tokens -= 1
+        headers = {
+            "RateLimit-Limit": f"{self.rate_limit}",
+            "RateLimit-Remaining": f"{int(self._tokens)}",
+            "RateLimit-Reset": f"{int(time.time() + (self.rate_limit - self._tokens) / rate)}",
+        }
+        return allowed, headers
+
+    def process(self, method: str, url: str, headers: Dict[str, str], raw_body: bytes) -> Tuple[int, Dict[str, str], bytes]:
+        """
+        Process one request with injected latency, errors and rate limit
+
+        :return: status code, headers and body of response
+        """
+        with self._lock:
+            self.stats["requests"] += 1
+            self._in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self._in_flight)
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            failed = self._random.random() < self.error_rate
+        try:
+            time.sleep(delay)
+            with self._lock:
+                self.advance()
+                allowed, response_headers = self.take_token()
+                if self.token is not None and headers.get("Authorization") != f"Bearer {self.token}":
+                    status, data = _error(401, "unauthorized", "unable to authenticate")
+                elif not allowed:
+                    self.stats["throttled"] += 1
+                    status, data = _error(429, "rate_limit_exceeded", "limit of requests per hour reached")
+                elif failed:
+                    self.stats["errors"] += 1
+                    status, data = _error(self.error_status, "unavailable", "service temporarily unavailable")
+                else:
+                    parsed = urlparse(url)
+                    try:
+                        body = json.loads(raw_body) if raw_body else {}
+                    except ValueError:
+                        body = None
+                    if not isinstance(body, dict):
+                        status, data = _error(400, "json_error", "invalid json in request body")
+                    else:
+                        status, data = self.handle(method, parsed.path, parse_qs(parsed.query), body)
+                self.stats[f"status_{status}"] += 1
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+        return status, {**response_headers, "Content-Type": "application/json"}, json.dumps(data).encode()
+
+    def _make_request_handler(self) -> type:
+        api = self
+
+        class RequestHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_request(self) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                raw_body = self.rfile.read(length) if length else b""
+                status, headers, body = api.process(self.command, self.path, dict(self.headers), raw_body)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", f"{len(body)}")
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = do_POST = do_PUT = do_DELETE = do_request
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        return RequestHandler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local fake Hetzner Cloud API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--servers", type=int, default=100, help="number of servers at start")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds every response is delayed by")
+    parser.add_argument("--jitter", type=float, default=0.0, help="maximum random seconds added to latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests failed with 503")
+    parser.add_argument("--rate-limit", type=int, default=None, help="requests allowed per hour")
+    parser.add_argument("--action-duration", type=float, default=1.0, help="seconds before action finishes")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    api = FakeHetznerAPI(
+        servers=args.servers,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        action_duration=args.action_duration,
+        seed=args.seed,
+        host=args.host,
+        port=args.port,
+    )
+    print(f"Fake Hetzner API listens on {api.url}, press Ctrl+C to stop")
+    try:
+        api.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
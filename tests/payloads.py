@@ -0,0 +1,206 @@
+"""
+Synthetic json payloads shaped like Hetzner Cloud API responses,
+deterministic for given arguments, so benchmarks and tests run offline
+"""
+from typing import Any, Dict, List
+
+LOCATIONS = [
+    {"id": 1, "name": "fsn1", "country": "DE", "city": "Falkenstein", "network_zone": "eu-central"},
+    {"id": 2, "name": "nbg1", "country": "DE", "city": "Nuremberg", "network_zone": "eu-central"},
+    {"id": 3, "name": "hel1", "country": "FI", "city": "Helsinki", "network_zone": "eu-central"},
+    {"id": 4, "name": "ash", "country": "US", "city": "Ashburn, VA", "network_zone": "us-east"},
+]
+
+# name, cores, memory, disk, cpu type, monthly net price in EUR
+SERVER_TYPES = [
+    ("cx11", 1, 2.0, 20, "shared", 3.29),
+    ("cpx11", 2, 2.0, 40, "shared", 3.85),
+    ("cx21", 2, 4.0, 40, "shared", 4.85),
+    ("cpx21", 3, 4.0, 80, "shared", 7.05),
+    ("cx31", 2, 8.0, 80, "shared", 8.21),
+    ("cpx31", 4, 8.0, 160, "shared", 13.10),
+    ("cx41", 4, 16.0, 160, "shared", 15.29),
+    ("cpx41", 8, 16.0, 240, "shared", 24.30),
+    ("cx51", 8, 32.0, 240, "shared", 29.51),
+    ("cpx51", 16, 32.0, 360, "shared", 54.90),
+    ("ccx12", 2, 8.0, 80, "dedicated", 23.99),
+    ("ccx22", 4, 16.0, 160, "dedicated", 47.99),
+]
+
+VAT_RATE = 0.19
+STATUSES = ["running", "running", "running", "off", "starting", "stopping"]
+
+
+def _price(net: float) -> Dict[str, str]:
+    return {"net": f"{net:.10f}", "gross": f"{net * (1 + VAT_RATE):.10f}"}
+
+
+def make_location(index: int) -> Dict[str, Any]:
+    return dict(LOCATIONS[index % len(LOCATIONS)])
+
+
+def make_datacenters() -> List[Dict[str, Any]]:
+    return [
+        {
+            "id": location["id"],
+            "name": f"{location['name']}-dc{location['id'] + 10}",
+            "description": f"{location['city']} DC Park {location['id']}",
+            "location": dict(location),
+        }
+        for location in LOCATIONS
+    ]
+
+
+def _type_prices(monthly_net: float) -> List[Dict[str, Any]]:
+    return [
+        {
+            "location": location["name"],
+            "price_hourly": _price(round(monthly_net / 730, 4)),
+            "price_monthly": _price(monthly_net),
+        }
+        for location in LOCATIONS
+    ]
+
+
+def make_server_type(index: int) -> Dict[str, Any]:
+    name, cores, memory, disk, cpu_type, monthly_net = SERVER_TYPES[index % len(SERVER_TYPES)]
+    return {
+        "id": index + 1,
+        "name": name,
+        "description": name.upper(),
+        "cores": cores,
+        "memory": memory,
+        "disk": disk,
+        "cpu_type": cpu_type,
+        "storage_type": "local",
+        "deprecated": None,
+        "prices": _type_prices(monthly_net),
+    }
+
+
+def make_server_types() -> List[Dict[str, Any]]:
+    return [make_server_type(i) for i in range(len(SERVER_TYPES))]
+
+
+def make_server(id_: int) -> Dict[str, Any]:
+    """
+    :param id_: server ID, other fields are derived from it
+    :return: server json object with all fields of API response
+    """
+    location = make_location(id_)
+    return {
+        "id": id_,
+        "name": f"server-{id_}",
+        "status": STATUSES[id_ % len(STATUSES)],
+        "created": f"2022-{id_ % 12 + 1:02}-{id_ % 28 + 1:02}T10:00:00+00:00",
+        "labels": {"env": ("prod" if id_ % 3 else "dev"), "role": ("web", "db", "worker")[id_ % 3]},
+        "server_type": make_server_type(id_ % len(SERVER_TYPES)),
+        "datacenter": {
+            "id": location["id"],
+            "name": f"{location['name']}-dc{location['id'] + 10}",
+            "description": f"{location['city']} DC Park {location['id']}",
+            "location": location,
+        },
+        "public_net": {
+            "ipv4": {"ip": f"10.{id_ // 65536 % 256}.{id_ // 256 % 256}.{id_ % 256}", "blocked": False},
+            "ipv6": {"ip": f"2a01:4f8:{id_:x}::/64", "blocked": False},
+            "floating_ips": [],
+        },
+        "private_net": [],
+        "image": {"id": 15512617, "name": "ubuntu-20.04", "description": "Ubuntu 20.04", "os_flavor": "ubuntu"},
+        "iso": None,
+        "volumes": [],
+        "load_balancers": [],
+        "protection": {"delete": False, "rebuild": False},
+        "backup_window": ("22-02" if id_ % 4 == 0 else None),
+        "rescue_enabled": False,
+        "locked": False,
+        "ingoing_traffic": id_ * 1024 ** 2,
+        "outgoing_traffic": id_ * 4 * 1024 ** 2,
+        "included_traffic": 21990232555520,
+        "primary_disk_size": 20,
+    }
+
+
+def make_servers(count: int, start: int = 1) -> List[Dict[str, Any]]:
+    return [make_server(id_) for id_ in range(start, start + count)]
+
+
+def make_servers_page(servers: List[Dict[str, Any]], page: int, per_page: int = 50) -> Dict[str, Any]:
+    """
+    :param servers: all servers
+    :param page: number of page, starting from 1
+    :param per_page: number of servers per page
+    :return: json response of one page of /servers with 'meta.pagination'
+    """
+    last_page = max(1, -(-len(servers) // per_page))
+    return {
+        "servers": servers[(page - 1) * per_page:page * per_page],
+        "meta": {
+            "pagination": {
+                "page": page,
+                "per_page": per_page,
+                "previous_page": (page - 1 if page > 1 else None),
+                "next_page": (page + 1 if page < last_page else None),
+                "last_page": last_page,
+                "total_entries": len(servers),
+            }
+        },
+    }
+
+
+def make_pricing() -> Dict[str, Any]:
+    """
+    :return: json response of /pricing with every resource
+    """
+    return {
+        "pricing": {
+            "currency": "EUR",
+            "vat_rate": f"{VAT_RATE * 100:.2f}",
+            "image": {"price_per_gb_month": _price(0.0119)},
+            "floating_ip": {"price_monthly": _price(1.19)},
+            "floating_ips": [
+                {
+                    "type": type_,
+                    "prices": [
+                        {"location": location["name"], "price_monthly": _price(monthly_net)}
+                        for location in LOCATIONS
+                    ],
+                }
+                for type_, monthly_net in (("ipv4", 1.19), ("ipv6", 1.0))
+            ],
+            "traffic": {"price_per_tb": _price(1.0)},
+            "server_backup": {"percentage": "20.0000000000"},
+            "volume": {"price_per_gb_month": _price(0.0440)},
+            "server_types": [
+                {"id": type_["id"], "name": type_["name"], "prices": type_["prices"]}
+                for type_ in make_server_types()
+            ],
+            "load_balancer_types": [
+                {"id": i + 1, "name": name, "prices": _type_prices(monthly_net)}
+                for i, (name, monthly_net) in enumerate((("lb11", 5.39), ("lb21", 16.40), ("lb31", 32.90)))
+            ],
+        }
+    }
+
+
+def make_metrics(id_: int, samples: int = 60, step: int = 60) -> Dict[str, Any]:
+    """
+    :param id_: server ID, cpu load of server grows from 0 to id_ percent
+    :param samples: number of values in every series, the second one is missing ("NaN")
+    :param step: seconds between values
+    :return: json response of /servers/{id}/metrics with "cpu" and "disk.0.iops.read" series
+    """
+    start = 1654000000
+    cpu = [[start + i * step, f"{id_ * i / max(1, samples - 1):.4f}"] for i in range(samples)]
+    iops = [[start + i * step, f"{(i % 10) * 10}"] for i in range(samples)]
+    if samples > 1:
+        cpu[1][1] = "NaN"
+    return {
+        "metrics": {
+            "start": "2022-05-31T12:26:40+00:00",
+            "end": "2022-05-31T13:26:40+00:00",
+            "step": step,
+            "time_series": {"cpu": {"values": cpu}, "disk.0.iops.read": {"values": iops}},
+        }
+    }
@@ -0,0 +1,571 @@
+import json
+import os
+import subprocess
+import sys
+from unittest import mock
+
+import pytest
+import responses
+from typer.testing import CliRunner
+
+from hetzner_control.cli import app
+from hetzner_control.core import HetznerHandler
+
+runner = CliRunner()
+
+
+@pytest.fixture(autouse=True)
+def mock_settings_env_vars():
+    """
+    Mock real environment variable, without API token
+    """
+    with mock.patch.dict(os.environ, clear=True):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def reset_cache():
+    """
+    'info' callback enables on-disk cache and --timings enables timings for all Handlers,
+    so disable them after test
+    """
+    yield
+    HetznerHandler.configure_cache(None)
+    HetznerHandler.configure_timings(None)
+
+
+class TestLazyCommands:
+    """
+    For test that subcommand modules, handlers and API data are loaded only on demand
+    """
+
+    @responses.activate
+    def test_version_without_api(self):
+        result = runner.invoke(app, ["version"])
+
+        assert result.exit_code == 0
+        assert len(responses.calls) == 0
+        assert "hetzner_control.commands.price" not in sys.modules
+
+    @responses.activate
+    def test_help_without_api(self):
+        result = runner.invoke(app, ["info", "price", "--help"])
+
+        assert result.exit_code == 0
+        assert "float_ip" in result.stdout
+        assert len(responses.calls) == 0
+
+
+class TestTimings:
+    """
+    For test global --timings options
+    """
+
+    @responses.activate
+    def test_dump_json(self, tmp_path):
+        responses.add(
+            responses.GET,
+            "https://api.hetzner.cloud/v1/server_types",
+            json={"server_types": [], "meta": {"pagination": {"next_page": None}}},
+        )
+        path = tmp_path / "timings.json"
+
+        with mock.patch.dict(os.environ, {"HETZNER_API_TOKEN": "1111"}):
+            result = runner.invoke(app, ["--timings-json", f"{path}", "info", "--no-cache", "server", "all"])
+
+        assert result.exit_code == 0
+        data = json.loads(path.read_text())
+        assert data["endpoints"]["GET /v1/server_types"]["count"] == 1
+        assert set(data["phases"]) == {"parse", "render"}
+
+
+class TestPriceEstimate:
+    """
+    For test 'info price estimate' command
+    """
+
+    @pytest.fixture(autouse=True)
+    def pricing(self, monkeypatch):
+        from hetzner_control.commands import price
+        from tests.payloads import make_pricing
+
+        from hetzner_control.core.pricing import PricingHandler
+
+        monkeypatch.setenv("HETZNER_API_TOKEN", "1111")
+        monkeypatch.setattr(PricingHandler, "get_all_prices", lambda self: make_pricing())
+        monkeypatch.setattr(price, "_handler", None)
+
+    def test_totals(self, tmp_path):
+        path = tmp_path / "fleet.txt"
+        path.write_text("# web\n2x cx21@nbg1\n\ncx21@nbg1\n")
+
+        result = runner.invoke(app, [
+            "-o", "ndjson", "info", "--no-cache", "price", "estimate", "lb11", "-f", f"{path}", "--backups",
+            "--volume", "10",
+        ])
+
+        assert result.exit_code == 0
+        rows = {(row["resource"], row["name"]): row for row in map(json.loads, result.output.splitlines())}
+        assert rows[("server", "cx21")]["quantity"] == 3
+        assert rows[("server", "cx21")]["location"] == "nbg1"
+        assert rows[("load_balancer", "lb11")]["location"] == "fsn1"
+        total = rows[("total", None)]["monthly_net"]
+        assert total == pytest.approx(3 * 4.85 * 1.2 + 5.39 + 10 * 0.044)
+
+    def test_unknown_type(self):
+        result = runner.invoke(app, ["info", "--no-cache", "price", "estimate", "3x cx99"])
+
+        assert result.exit_code == 2
+        assert "cx99" in result.output
+
+
+class TestServerTypesFind:
+    """
+    For test 'info server find' command
+    """
+
+    @pytest.fixture(autouse=True)
+    def catalog(self, monkeypatch):
+        from hetzner_control.commands import server_types
+        from hetzner_control.core.models import ServerType
+        from hetzner_control.core.price_index import PriceIndex
+        from hetzner_control.core.server_types import ServerTypeCatalog
+        from tests.payloads import make_pricing, make_server_types
+
+        monkeypatch.setattr(server_types, "_catalog", ServerTypeCatalog(
+            [ServerType(type_) for type_ in make_server_types()], PriceIndex(make_pricing()["pricing"]),
+        ))
+
+    def test_find(self):
+        result = runner.invoke(app, [
+            "-o", "csv", "info", "--no-cache", "server", "find", "--min-cores", "8", "--cpu-type", "shared",
+            "--location", "ash", "--limit", "2",
+        ])
+
+        assert result.exit_code == 0
+        lines = result.output.splitlines()
+        assert lines[0].startswith("name,cpu_type,cores")
+        assert [line.split(",")[0] for line in lines[1:]] == ["cpx41", "cx51"]
+
+    def test_unknown_location(self):
+        result = runner.invoke(app, ["info", "--no-cache", "server", "find", "--location", "mars1"])
+
+        assert result.exit_code == 2
+        assert "mars1" in result.output
+
+
+class TestServerCost:
+    """
+    For test 'server cost' command
+    """
+
+    @responses.activate
+    def test_one_listing(self):
+        from tests.payloads import make_pricing, make_servers, make_servers_page
+
+        servers = make_servers(60)
+        responses.add(responses.GET, "https://api.hetzner.cloud/v1/pricing", json=make_pricing())
+        for page in (1, 2):
+            responses.add(
+                responses.GET,
+                "https://api.hetzner.cloud/v1/servers",
+                json=make_servers_page(servers, page),
+                match=[responses.matchers.query_param_matcher({"page": f"{page}", "per_page": "50"})],
+            )
+
+        with mock.patch.dict(os.environ, {"HETZNER_API_TOKEN": "1111"}):
+            result = runner.invoke(app, ["-o", "ndjson", "server", "cost"])
+
+        assert result.exit_code == 0
+        assert len(responses.calls) == 3
+        rows = [json.loads(line) for line in result.output.splitlines()]
+        total = rows[-1]
+        assert total["dimension"] == "total"
+        assert total["servers"] == 60
+        assert total["unpriced"] == 0
+        locations = [row for row in rows if row["dimension"] == "location"]
+        assert sum(row["monthly_gross"] for row in locations) == pytest.approx(total["monthly_gross"])
+
+
+class TestInventory:
+    """
+    For test 'sync', 'query' and 'server list --from-cache' commands
+    """
+
+    @pytest.fixture(autouse=True)
+    def environment(self, tmp_path):
+        env = {
+            "HETZNER_API_TOKEN": "1111",
+            "HTZ_INVENTORY": f"{tmp_path / 'inventory.sqlite'}",
+            "XDG_CACHE_HOME": f"{tmp_path / 'cache'}",
+        }
+        with mock.patch.dict(os.environ, env):
+            yield
+
+    @pytest.fixture
+    def synced(self):
+        from tests.payloads import make_datacenters, make_pricing, make_server_types, make_servers
+
+        url = "https://api.hetzner.cloud/v1"
+        pagination = {"meta": {"pagination": {"next_page": None}}}
+        with responses.RequestsMock() as mocked:
+            mocked.add(responses.GET, f"{url}/pricing", json=make_pricing())
+            mocked.add(responses.GET, f"{url}/server_types", json={"server_types": make_server_types(), **pagination})
+            mocked.add(responses.GET, f"{url}/datacenters", json={"datacenters": make_datacenters(), **pagination})
+            mocked.add(responses.GET, f"{url}/servers", json={"servers": make_servers(12), **pagination})
+            result = runner.invoke(app, ["-o", "ndjson", "sync"])
+
+        assert result.exit_code == 0
+        assert json.loads(result.output)["added"] == 12
+
+    @responses.activate
+    def test_query_offline(self, synced):
+        result = runner.invoke(app, ["-o", "csv", "query", "-g", "label:role", "--sort", "label:role"])
+
+        assert result.exit_code == 0
+        assert result.output.splitlines() == ["label:role,count", "db,4", "web,4", "worker,4"]
+        assert len(responses.calls) == 0
+
+    @responses.activate
+    def test_server_list_from_cache(self, synced):
+        result = runner.invoke(app, ["-o", "ndjson", "server", "list", "--from-cache", "--selector", "role=web"])
+
+        assert result.exit_code == 0
+        assert [json.loads(line)["id"] for line in result.output.splitlines()] == [3, 6, 9, 12]
+        assert len(responses.calls) == 0
+
+    @responses.activate
+    def test_query_invalid_label_key(self, synced):
+        result = runner.invoke(app, ["-o", "csv", "query", "-g", 'label:a" , sqlite_version() AS "v'])
+
+        assert result.exit_code == 2
+        assert "Invalid label key" in result.output
+
+    @responses.activate
+    def test_query_database_error(self, synced, monkeypatch):
+        import sqlite3
+
+        from hetzner_control.core.inventory import Inventory
+
+        def query(*args, **kwargs):
+            raise sqlite3.OperationalError("database disk image is malformed")
+
+        monkeypatch.setattr(Inventory, "query", query)
+        result = runner.invoke(app, ["query"])
+
+        assert result.exit_code == 1
+        assert "Query failed: database disk image is malformed" in result.output
+
+    def test_empty_inventory(self):
+        result = runner.invoke(app, ["query"])
+
+        assert result.exit_code == 1
+        assert "htz sync" in result.output
+
+
+class TestServerListWatch:
+    """
+    For test 'server list --watch' mode
+    """
+
+    @responses.activate
+    def test_highlight_changes(self, monkeypatch):
+        from hetzner_control.commands import server
+        from tests.payloads import make_servers
+
+        pagination = {"meta": {"pagination": {"next_page": None}}}
+        changed = make_servers(3)
+        changed[1]["status"] = "stopping"
+        for servers in (make_servers(3), changed):
+            responses.add(responses.GET, "https://api.hetzner.cloud/v1/servers", json={"servers": servers, **pagination})
+
+        delays = []
+
+        def sleep(delay):
+            delays.append(delay)
+            if len(delays) == 2:
+                raise KeyboardInterrupt
+
+        views = []
+        original_view = server._watch_view
+        monkeypatch.setattr(server.time, "sleep", sleep)
+        monkeypatch.setattr(server, "_watch_view", lambda *args: views.append(args) or original_view(*args))
+
+        with mock.patch.dict(os.environ, {"HETZNER_API_TOKEN": "1111"}):
+            result = runner.invoke(app, ["server", "list", "--watch", "--interval", "1", "--selector", "env=prod"])
+
+        assert result.exit_code == 0
+        assert len(responses.calls) == 2
+        assert "label_selector=env%3Dprod" in responses.calls[0].request.url
+        snapshot, diff, recent, poll, delay, _ = views[-1]
+        assert diff.changed == {2: {"status"}}
+        assert recent == {2: (2, {"status"})}
+        # server 2 is stopping, so interval stays minimal
+        assert delay == 1
+        assert "stopping" in result.output
+
+    @responses.activate
+    def test_traffic_doesnt_reset_interval(self, monkeypatch):
+        from hetzner_control.commands import server
+        from tests.payloads import make_servers
+
+        pagination = {"meta": {"pagination": {"next_page": None}}}
+        for poll in range(3):
+            servers = make_servers(3)
+            for data in servers:
+                data["outgoing_traffic"] += poll * 1024
+            responses.add(responses.GET, "https://api.hetzner.cloud/v1/servers", json={"servers": servers, **pagination})
+
+        delays = []
+
+        def sleep(delay):
+            delays.append(delay)
+            if len(delays) == 3:
+                raise KeyboardInterrupt
+
+        monkeypatch.setattr(server.time, "sleep", sleep)
+        with mock.patch.dict(os.environ, {"HETZNER_API_TOKEN": "1111"}):
+            result = runner.invoke(app, ["server", "list", "--watch", "--interval", "1"])
+
+        assert result.exit_code == 0
+        # polls take some time, so sleeps are a bit shorter than intervals 1.5, 2.25 and 3.375
+        assert delays[0] < delays[1] < delays[2]
+        assert delays[2] > 3
+
+    def test_machine_output(self):
+        result = runner.invoke(app, ["-o", "json", "server", "list", "--watch"])
+
+        assert result.exit_code == 2
+
+
+class TestServerMetrics:
+    """
+    For test 'server metrics' for servers selected by label and grouped by other label
+    """
+
+    @pytest.fixture
+    def api(self):
+        """
+        Three servers with roles db, worker and web, metrics of server 3 are not available
+        """
+        from tests.payloads import make_metrics, make_servers
+
+        with responses.RequestsMock() as mocked:
+            mocked.add(
+                responses.GET, "https://api.hetzner.cloud/v1/servers",
+                json={"servers": make_servers(3), "meta": {"pagination": {"next_page": None}}},
+            )
+            for id_ in (1, 2):
+                mocked.add(responses.GET, f"https://api.hetzner.cloud/v1/servers/{id_}/metrics", json=make_metrics(id_))
+            mocked.add(
+                responses.GET, "https://api.hetzner.cloud/v1/servers/3/metrics",
+                json={"error": {"message": "server not found"}}, status=423,
+            )
+            with mock.patch.dict(os.environ, {"HETZNER_API_TOKEN": "1111"}):
+                yield mocked
+
+    def test_table(self, api):
+        result = runner.invoke(app, [
+            "server", "metrics", "-l", "env=prod", "--group-by", "role", "-t", "cpu", "-t", "disk", "--sparklines",
+        ])
+
+        assert result.exit_code == 1
+        assert "label_selector=env%3Dprod" in api.calls[0].request.url
+        assert "type=cpu%2Cdisk" in api.calls[1].request.url
+        assert "Groups" in result.output
+        assert "worker" in result.output
+        assert "Metrics of server 3 weren't received" in result.output
+
+    def test_ndjson(self, api):
+        result = runner.invoke(app, ["-o", "ndjson", "server", "metrics", "-l", "env=prod", "--group-by", "role"])
+
+        rows = [json.loads(line) for line in result.stdout.splitlines() if line.startswith("{")]
+        servers = {(row["id"], row["series"]): row for row in rows if row["id"] is not None}
+        groups = {(row["group"], row["series"]): row for row in rows if row["id"] is None}
+        assert result.exit_code == 1
+        assert sorted(servers) == [(1, "cpu"), (1, "disk.0.iops.read"), (2, "cpu"), (2, "disk.0.iops.read")]
+        assert servers[(2, "cpu")]["max"] == 2.0
+        assert servers[(2, "cpu")]["samples"] == 59
+        assert servers[(1, "cpu")]["group"] == "db"
+        assert sorted(groups) == [
+            ("db", "cpu"), ("db", "disk.0.iops.read"), ("worker", "cpu"), ("worker", "disk.0.iops.read"),
+        ]
+
+    def test_ids_and_selector(self):
+        from tests.payloads import make_metrics, make_server, make_servers
+
+        url = "https://api.hetzner.cloud/v1/servers"
+        with responses.RequestsMock() as mocked, mock.patch.dict(os.environ, {"HETZNER_API_TOKEN": "1111"}):
+            mocked.add(responses.GET, url, json={"servers": make_servers(1, start=2), "meta": {}})
+            mocked.add(responses.GET, f"{url}/1", json={"server": make_server(1)})
+            for id_ in (1, 2):
+                mocked.add(responses.GET, f"{url}/{id_}/metrics", json=make_metrics(id_))
+            result = runner.invoke(app, ["-o", "ndjson", "server", "metrics", "1", "-l", "role=worker", "-g", "role"])
+
+        rows = [json.loads(line) for line in result.stdout.splitlines() if line.startswith("{")]
+        assert result.exit_code == 0
+        assert {(row["id"], row["group"]) for row in rows if row["id"] is not None} == {(1, "db"), (2, "worker")}
+
+    def test_ids_dont_list_servers(self):
+        from tests.payloads import make_metrics, make_server
+
+        url = "https://api.hetzner.cloud/v1/servers"
+        with responses.RequestsMock() as mocked, mock.patch.dict(os.environ, {"HETZNER_API_TOKEN": "1111"}):
+            mocked.add(responses.GET, f"{url}/1", json={"server": make_server(1)})
+            mocked.add(responses.GET, f"{url}/1/metrics", json=make_metrics(1))
+            result = runner.invoke(app, ["server", "metrics", "1", "-g", "role"])
+
+            assert result.exit_code == 0
+            assert len(mocked.calls) == 2
+
+    @pytest.mark.parametrize("args", [["1", "--range", "1w"], []])
+    def test_bad_parameters(self, args):
+        with mock.patch.dict(os.environ, {"HETZNER_API_TOKEN": "1111"}):
+            result = runner.invoke(app, ["server", "metrics", *args])
+
+        assert result.exit_code == 2
+
+
+class TestApply:
+    """
+    For test 'apply' of fleet file against fake API
+    """
+
+    @pytest.fixture
+    def fake_api(self):
+        """
+        Running fake API with 5 servers outside of fleet
+        """
+        from hetzner_control.core.retry import RetryPolicy
+        from tests.fake_api import FakeHetznerAPI
+
+        HetznerHandler.configure_transport(retry_policy=RetryPolicy(max_retries=3, backoff_factor=0))
+        with FakeHetznerAPI(servers=5, token="1111") as api:
+            with mock.patch.dict(os.environ, {"HETZNER_API_TOKEN": "1111", "HETZNER_API_URL": api.url}):
+                yield api
+        HetznerHandler.configure_transport()
+
+    @pytest.fixture
+    def fleet_file(self, tmp_path):
+        """
+        Fleet of two running web servers and one stopped worker
+        """
+        path = tmp_path / "fleet.yaml"
+        path.write_text(
+            "fleet: ci\n"
+            "defaults: {image: ubuntu-20.04, location: nbg1}\n"
+            "groups:\n"
+            "  web: {count: 2, server_type: cx11}\n"
+            "  worker: {count: 1, server_type: cx21, status: 'off'}\n"
+        )
+        return path
+
+    def test_dry_run(self, fake_api, fleet_file):
+        result = runner.invoke(app, ["apply", f"{fleet_file}", "--dry-run"])
+
+        assert result.exit_code == 0
+        assert "Plan: 3 to create, 0 to delete" in result.output
+        assert "ci-web-2" in result.output
+        assert len(fake_api.servers) == 5
+
+    def test_apply(self, fake_api, fleet_file):
+        result = runner.invoke(app, ["-o", "ndjson", "apply", f"{fleet_file}", "-y"])
+
+        # progress goes to stderr, which runner mixes into output
+        rows = [json.loads(line) for line in result.stdout.splitlines() if line.startswith("{")]
+        assert result.exit_code == 0
+        assert [(row["action"], row["name"], row["result"], row["status"]) for row in rows] == [
+            ("create", "ci-web-1", "ok", "success"),
+            ("create", "ci-web-2", "ok", "success"),
+            ("create", "ci-worker-1", "ok", "success"),
+        ]
+        assert {row["id"] for row in rows} == {6, 7, 8}
+        worker = next(server for server in fake_api.servers.values() if server["name"] == "ci-worker-1")
+        assert worker["status"] == "off"
+        assert worker["datacenter"]["location"]["name"] == "nbg1"
+
+        result = runner.invoke(app, ["apply", f"{fleet_file}"])
+        assert result.exit_code == 0
+        assert "3 unchanged" in result.output
+
+    def test_confirmation(self, fake_api, fleet_file):
+        result = runner.invoke(app, ["apply", f"{fleet_file}"], input="n\n")
+
+        assert result.exit_code == 1
+        assert len(fake_api.servers) == 5
+
+    def test_plan_before_confirmation(self, fake_api, fleet_file):
+        result = runner.invoke(app, ["-o", "json", "apply", f"{fleet_file}"], input="n\n")
+
+        # plan is printed to stderr, which runner mixes into output
+        assert result.exit_code == 1
+        assert result.output.index("ci-web-2") < result.output.index("Apply 3 changes?")
+        assert len(fake_api.servers) == 5
+
+    def test_unassigned_server_kept(self, fake_api, fleet_file):
+        fake_api.servers[1]["labels"] = {"fleet": "ci"}
+        result = runner.invoke(app, ["apply", f"{fleet_file}", "-y"])
+
+        assert result.exit_code == 0
+        assert "no 'fleet-group' label" in result.output
+        assert 1 in fake_api.servers
+
+    def test_invalid_file(self, tmp_path):
+        path = tmp_path / "fleet.yaml"
+        path.write_text("fleet: ci\ngroups: {web: {count: 1}}\n")
+        result = runner.invoke(app, ["apply", f"{path}"])
+
+        assert result.exit_code == 2
+        assert "server_type" in result.output
+
+
+class TestColdStart:
+    """
+    For test that interactive commands and shell completion don't import heavy modules
+    and CLI is imported within time budget in a new interpreter
+    """
+    heavy_modules = ("rich", "requests", "hetzner_control.core")
+    # budget of 'import hetzner_control.cli' in microseconds, measured by 'python -X importtime'
+    import_budget = 100_000
+
+    @staticmethod
+    def run(code, env=None):
+        return subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            capture_output=True,
+            text=True,
+            env={**os.environ, "PYTHONPATH": os.getcwd(), **(env or {})},
+        )
+
+    def imported(self, argv, env=None):
+        result = self.run(
+            "import atexit, sys\n"
+            "atexit.register(lambda: print('modules:', *sys.modules, file=sys.stderr))\n"
+            f"sys.argv = {['htz'] + argv!r}\n"
+            "from hetzner_control.cli import app\n"
+            "app(prog_name='htz')\n",
+            env=env,
+        )
+        return set(result.stderr.split("modules:")[-1].split())
+
+    @pytest.mark.parametrize("argv", [["version"], ["--help"], ["server", "--help"]])
+    def test_commands_without_heavy_modules(self, argv):
+        assert not self.imported(argv) & set(self.heavy_modules)
+
+    def test_completion_without_heavy_modules(self):
+        modules = self.imported([], env={
+            "_HTZ_COMPLETE": "complete_bash",
+            "COMP_WORDS": "htz server li",
+            "COMP_CWORD": "2",
+        })
+        assert "hetzner_control.commands.server" in modules
+        assert not modules & set(self.heavy_modules)
+
+    def test_import_budget(self):
+        result = self.run("import hetzner_control.cli")
+        cumulative = {
+            line.split("|")[-1].strip(): int(line.split("|")[1])
+            for line in result.stderr.splitlines()
+            if line.startswith("import time:") and "cumulative" not in line
+        }
+        assert cumulative["hetzner_control.cli"] < self.import_budget
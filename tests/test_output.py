@@ -0,0 +1,186 @@
+import io
+import json
+import os
+from unittest import mock
+
+import pytest
+import responses
+from typer.testing import CliRunner
+
+from hetzner_control.cli import app
+from hetzner_control.commands import output
+from hetzner_control.commands.output import OutputFormat, RowWriter
+
+runner = CliRunner()
+
+
+@pytest.fixture(autouse=True)
+def mock_settings_env_vars():
+    """
+    Mock real environment variable, for example API token
+    """
+    with mock.patch.dict(os.environ, {"HETZNER_API_TOKEN": "1111"}):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def reset_format():
+    """
+    --output option is stored globally, so return default format after test
+    """
+    yield
+    output.set_format(OutputFormat.table)
+
+
+def write(format_, rows):
+    stream = io.StringIO()
+    with RowWriter(["id", "name", "labels"], format_=format_, stream=stream) as writer:
+        writer.write_many(rows)
+    return stream.getvalue()
+
+
+class TestRowWriter:
+    """
+    For test rows serialization in every machine-readable format
+    """
+    rows = [[1, "web", {"role": "web"}], [2, "db, main", None]]
+
+    def test_json(self):
+        assert json.loads(write(OutputFormat.json, self.rows)) == [
+            {"id": 1, "name": "web", "labels": {"role": "web"}},
+            {"id": 2, "name": "db, main", "labels": None},
+        ]
+
+    def test_json_empty(self):
+        assert json.loads(write(OutputFormat.json, [])) == []
+
+    def test_ndjson(self):
+        lines = write(OutputFormat.ndjson, self.rows).splitlines()
+
+        assert [json.loads(line)["id"] for line in lines] == [1, 2]
+
+    def test_csv(self):
+        assert write(OutputFormat.csv, self.rows) == (
+            'id,name,labels\n'
+            '1,web,"{""role"": ""web""}"\n'
+            '2,"db, main",\n'
+        )
+
+    def test_tsv(self):
+        assert write(OutputFormat.tsv, self.rows).splitlines()[0] == "id\tname\tlabels"
+
+    def test_plain(self):
+        assert write(OutputFormat.plain, self.rows).splitlines() == [
+            '1\tweb\t{"role": "web"}',
+            '2\tdb, main\t',
+        ]
+
+
+class TestOutputOption:
+    """
+    For test global --output option of commands
+    """
+
+    @responses.activate
+    def test_server_list_ndjson(self):
+        server = {
+            "id": 42,
+            "name": "web-1",
+            "status": "running",
+            "labels": {"role": "web"},
+            "server_type": {"id": 1, "name": "cx11", "cores": 1, "memory": 2.0, "disk": 20, "prices": []},
+            "datacenter": {"name": "fsn1-dc14", "location": {"name": "fsn1"}},
+        }
+        responses.add(
+            responses.GET,
+            "https://api.hetzner.cloud/v1/servers",
+            json={"servers": [server], "meta": {"pagination": {"next_page": None}}},
+        )
+
+        result = runner.invoke(app, ["-o", "ndjson", "server", "list"])
+
+        assert result.exit_code == 0
+        row = json.loads(result.stdout)
+        assert row["id"] == 42
+        assert row["server_type"] == "cx11"
+        assert row["labels"] == {"role": "web"}
+        assert row["price_monthly_gross"] is None
+
+    @responses.activate
+    def test_option_after_command(self):
+        from tests.payloads import make_server
+
+        responses.add(
+            responses.GET,
+            "https://api.hetzner.cloud/v1/servers",
+            json={"servers": [make_server(1)], "meta": {"pagination": {"next_page": None}}},
+        )
+
+        result = runner.invoke(app, ["server", "list", "-o", "ndjson"])
+
+        assert result.exit_code == 0
+        assert json.loads(result.stdout)["id"] == 1
+
+    @responses.activate
+    def test_server_list_unpriced_location(self):
+        from tests.payloads import make_server
+
+        # server 2 is outside the first location, its type is priced only in the first one
+        server = make_server(2)
+        server["server_type"]["prices"] = server["server_type"]["prices"][:1]
+        responses.add(
+            responses.GET,
+            "https://api.hetzner.cloud/v1/servers",
+            json={"servers": [server], "meta": {"pagination": {"next_page": None}}},
+        )
+
+        result = runner.invoke(app, ["-o", "ndjson", "server", "list"])
+        assert json.loads(result.stdout)["price_monthly_gross"] is None
+
+        result = runner.invoke(app, ["server", "list"])
+        assert result.exit_code == 0
+        assert f"{float(server['server_type']['prices'][0]['price_monthly']['gross']):.4f}" not in result.stdout
+
+    @responses.activate
+    def test_server_create_json(self):
+        responses.add(
+            responses.POST,
+            "https://api.hetzner.cloud/v1/servers",
+            json={
+                "server": {"id": 7, "name": "web-1"},
+                "root_password": "secret",
+                "action": {"id": 1, "command": "create_server", "status": "running"},
+                "next_actions": [{"id": 2, "command": "start_server", "status": "running"}],
+            },
+            status=201,
+        )
+
+        result = runner.invoke(app, ["-o", "json", "server", "create", "web-1"])
+
+        assert result.exit_code == 0
+        assert json.loads(result.stdout) == [
+            {"id": 7, "name": "web-1", "root_password": "secret", "command": "create_server", "status": "running"},
+            {"id": 7, "name": "web-1", "root_password": "secret", "command": "start_server", "status": "running"},
+        ]
+
+    @responses.activate
+    def test_single_server_action_ndjson(self):
+        responses.add(
+            responses.POST,
+            "https://api.hetzner.cloud/v1/servers/3/actions/shutdown",
+            json={"action": {"id": 1, "command": "shutdown_server", "status": "error", "error": {"message": "locked"}}},
+            status=201,
+        )
+        responses.add(
+            responses.DELETE,
+            "https://api.hetzner.cloud/v1/servers/4",
+            json={"action": {"id": 2, "command": "delete_server", "status": "running"}},
+        )
+
+        result = runner.invoke(app, ["-o", "ndjson", "server", "down", "3"])
+        assert result.exit_code == 1
+        assert json.loads(result.stdout) == {"id": 3, "result": "error", "status": "error", "message": "locked"}
+
+        result = runner.invoke(app, ["-o", "ndjson", "server", "delete", "4"])
+        assert result.exit_code == 0
+        assert json.loads(result.stdout) == {"id": 4, "result": "ok", "status": "running", "message": None}